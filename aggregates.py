@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import derived
+
+# **Cubo de agregados de sobrevivência**
+# Contagens, sobreviventes e soma das idades para todas as combinações das
+# dimensões categóricas e das faixas etárias usadas nos gráficos. Cada
+# gráfico de taxa vira uma consulta sobre as células do cubo, não uma
+# varredura do DataFrame inteiro. Passageiros com Survived ausente entram
+# em Count mas não em Outcomes, o denominador das taxas (como o mean() do
+# pandas, que ignora NaN).
+AGE_GROUP_BINS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+AGE_GROUP_LABELS = ['0-10', '10-20', '20-30', '30-40', '40-50',
+                    '50-60', '60-70', '70-80', '80-90', '90-100']
+AGE_BAND_BINS = [0, 12, 18, 30, 50, 100]
+AGE_BAND_LABELS = ['0-12', '13-18', '19-30', '31-50', '51+']
+
+DIMENSIONS = ['Sex', 'Pclass', 'Embarked', 'Has_SibSp', 'AgeGroup', 'AgeBand']
+MEASURES = ['Count', 'Outcomes', 'Survivors', 'AgeSum']
+
+
+def age_groups(age):
+    # Faixas de 10 anos (Survival Analytics)
+    return pd.cut(age, bins=AGE_GROUP_BINS, labels=AGE_GROUP_LABELS)
+
+
+def age_bands(age):
+    # Faixas da aba Additional Insights (intervalos fechados à esquerda)
+    return pd.cut(age, bins=AGE_BAND_BINS, labels=AGE_BAND_LABELS, right=False)
+
+
+def has_sibsp(sibsp):
+    return pd.Categorical(np.where(sibsp.fillna(0) > 0, 'Yes', 'No'),
+                          categories=['No', 'Yes'])
+
+
+def build_cube(df):
+    cells = pd.DataFrame({
+        'Sex': df['Sex'].to_numpy(),
+        'Pclass': df['Pclass'].to_numpy(),
+        'Embarked': df['Embarked'].to_numpy(),
+        'Has_SibSp': has_sibsp(df['SibSp']),
+        'AgeGroup': age_groups(df['Age']).to_numpy(),
+        'AgeBand': age_bands(df['Age']).to_numpy(),
+        'Count': 1,
+        'Outcomes': df['Survived'].notna().to_numpy(),
+        # Ausente conta como 0 sobreviventes (soma que ignora NaN)
+        'Survivors': df['Survived'].fillna(0).to_numpy(dtype='int64'),
+        # Soma em float64 (Age é float32 no frame compacto)
+        'AgeSum': df['Age'].to_numpy(dtype='float64'),
+    })
+    return _collapse(cells)
+
+
+def update_cube(cube, new_rows):
+    # Atualização incremental: só as linhas novas são agregadas
+    return _collapse(pd.concat([cube, build_cube(new_rows)], ignore_index=True))
+
+
+def _collapse(cells):
+    # dropna=False mantém idades fora das faixas na contagem total
+    return (cells.groupby(DIMENSIONS, observed=True, dropna=False)[MEASURES]
+            .sum().reset_index())
+
+
+def get_cube(df):
+    # Um cubo por DataFrame carregado, compartilhado entre reruns; numa
+    # consulta do backend SQL (query_backend) o GROUP BY roda no banco
+    build = build_cube if isinstance(df, pd.DataFrame) else df.build_cube
+    return derived(df, 'survival_cube', build)
+
+
+def totals(cube, dims):
+    if not dims:
+        return pd.DataFrame({m: [cube[m].sum()] for m in MEASURES})
+    return cube.groupby(dims, observed=True)[MEASURES].sum().reset_index()
+
+
+def survival_rate(cube, dims=()):
+    # Equivalente a df.groupby(dims)['Survived'].mean().reset_index()
+    table = totals(cube, list(dims))
+    table['Survived'] = table['Survivors'] / table['Outcomes']
+    table['Count'] = table['Outcomes']
+    return table[list(dims) + ['Survived', 'Count']]
+
+
+def average_age(cube, dims):
+    table = totals(cube, list(dims))
+    table['Age'] = table['AgeSum'] / table['Count']
+    return table[list(dims) + ['Age']]
@@ -0,0 +1,343 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from data_loader import derived
+from filters import as_view
+from confidence import CONFIDENCE, z_score, survival_rate_intervals
+from aggregates import get_cube, age_groups, age_bands, has_sibsp
+from figure_cache import frame_hash
+from figure_pipeline import FigurePipeline, submit, wait_for
+
+# **Modo aproximado: amostras estratificadas com limites de erro**
+# Amostras aninhadas por estrato (Pclass x Sex x Embarked), construídas uma
+# vez por frame: as linhas de cada estrato são embaralhadas uma vez e o nível
+# k usa as primeiras n_h linhas de cada estrato (alocação proporcional, com
+# um mínimo por estrato). Cada linha da amostra leva o peso N_h / n_h.
+# Os gráficos recebem o frame da amostra com a coluna Weight e mostram:
+# - taxas: estimador de razão ponderado, com limite de erro pela variância
+#   linearizada com correção de população finita (zero quando o estrato
+#   inteiro está na amostra);
+# - quantis (box plots): quantis ponderados, com limite de Woodruff (o
+#   intervalo da proporção acumulada levado de volta pela função quantil).
+# Os limites são em relação ao valor exato nos dados completos (confiança de
+# 95%). Em segundo plano, os gráficos do próximo nível (e por fim os exatos)
+# são construídos no figure_cache e a página passa a usá-los quando ficam prontos.
+STRATA = ['Pclass', 'Sex', 'Embarked']
+SAMPLE_LEVELS = [50_000, 500_000, 5_000_000]
+MIN_PER_STRATUM = 200
+# Frames de amostra (visão x nível) mantidos por frame carregado
+MAX_CACHED_FRAMES = 8
+# Níveis prontos lembrados por (visão, seção, parâmetros), por frame carregado
+MAX_READY_ENTRIES = 256
+SEED = 0
+
+# Uma refinação por vez: cada uma já usa o pool de gráficos
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="approximate")
+
+
+def approximate_mode():
+    return st.session_state.get('approximate', False)
+
+
+def is_sample(df):
+    # QueryView (backend SQL) não é DataFrame nem amostra
+    return isinstance(df, pd.DataFrame) and 'Weight' in df.columns
+
+
+def sample_weights(df):
+    return df['Weight'].to_numpy() if is_sample(df) else None
+
+
+def _strata_codes(df):
+    codes = np.zeros(len(df), dtype=np.int64)
+    for col in STRATA:
+        column = df[col].astype('category')
+        # Ausente (-1) vira um estrato próprio
+        codes = codes * (len(column.cat.categories) + 1) + column.cat.codes.to_numpy() + 1
+    return codes
+
+
+class StratifiedSample:
+    def __init__(self, df, seed=SEED):
+        self.n_rows = len(df)
+        strata = np.unique(_strata_codes(df), return_inverse=True)[1]
+        # Agrupa as linhas por estrato, em ordem aleatória dentro de cada um
+        noise = np.random.default_rng(seed).random(self.n_rows)
+        self.order = np.argsort(strata + noise, kind='stable')
+        self.strata = strata[self.order]
+        self.counts = np.bincount(strata)
+        self.rank = np.arange(self.n_rows) - (np.cumsum(self.counts) - self.counts)[self.strata]
+        self.levels = [size for size in SAMPLE_LEVELS if size < self.n_rows]
+        self._positions = {}
+
+    def positions(self, level):
+        # (posições ordenadas, pesos) das linhas do nível
+        if level not in self._positions:
+            size = self.levels[level]
+            allocation = np.rint(size * self.counts / self.n_rows)
+            allocation = np.minimum(self.counts, np.maximum(allocation, MIN_PER_STRATUM))
+            selected = self.rank < allocation[self.strata]
+            positions = self.order[selected]
+            weights = (self.counts / allocation)[self.strata[selected]]
+            sort = np.argsort(positions)
+            self._positions[level] = (positions[sort], weights[sort])
+        return self._positions[level]
+
+
+class ApproximateEngine:
+    def __init__(self, df):
+        self.df = df
+        self._sample = None
+        self._frames = OrderedDict()
+        # Melhor nível já pronto por (visão, seção) (LRU) e refinações em andamento
+        self.ready = OrderedDict()
+        self._refining = {}
+        self._lock = threading.Lock()
+
+    @property
+    def sample(self):
+        with self._lock:
+            if self._sample is None:
+                self._sample = StratifiedSample(self.df)
+            return self._sample
+
+    @property
+    def n_levels(self):
+        # Níveis de amostra + o resultado exato
+        return len(self.sample.levels) + 1
+
+    def view_key(self, view):
+        if view.positions is None:
+            return 'all'
+        return hashlib.sha1(np.asarray(view.positions).tobytes()).hexdigest()
+
+    def frame(self, view, level):
+        # Frame da amostra da visão (coluna Weight); o último nível é o exato
+        if level >= len(self.sample.levels):
+            return view.frame
+        key = (self.view_key(view), level)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return self._frames[key]
+        positions, weights = self.sample.positions(level)
+        if view.positions is not None:
+            mask = np.zeros(len(self.df), dtype=bool)
+            mask[view.positions] = True
+            keep = mask[positions]
+            positions, weights = positions[keep], weights[keep]
+        frame = self.df.take(positions).assign(Weight=weights)
+        # O conteúdo é definido pelo frame, pela visão e pelo nível: o hash
+        # para o figure_cache sai deles, sem ler a amostra
+        derived(frame, 'content_hash', lambda _: hashlib.sha1(
+            f"{frame_hash(self.df)}/{key}/{SEED}".encode()).hexdigest())
+        with self._lock:
+            self._frames[key] = frame
+            if len(self._frames) > MAX_CACHED_FRAMES:
+                self._frames.popitem(last=False)
+        return frame
+
+    def level(self, view, section, binned=False, params=()):
+        key = (self.view_key(view), section, binned, params)
+        with self._lock:
+            if key not in self.ready:
+                return 0
+            self.ready.move_to_end(key)
+            return self.ready[key]
+
+    def _remember(self, ready_key, level):
+        # Chamado com o lock: guarda o nível pronto e descarta o menos usado
+        self.ready[ready_key] = max(self.ready.get(ready_key, 0), level)
+        self.ready.move_to_end(ready_key)
+        if len(self.ready) > MAX_READY_ENTRIES:
+            self.ready.popitem(last=False)
+
+    def refine(self, view, section, figures, level, binned=False, params=()):
+        # Future que constrói os gráficos do próximo nível no figure_cache
+        ready_key = (self.view_key(view), section, binned, params)
+        key = ready_key + (level + 1,)
+        with self._lock:
+            if key in self._refining:
+                return self._refining[key]
+
+        def run():
+            frame = self.frame(view, level + 1)
+            pipeline = FigurePipeline(section, figures, frame, binned, params)
+            for future in pipeline.futures.values():
+                future.result()
+            with self._lock:
+                self._remember(ready_key, level + 1)
+                self._refining.pop(key, None)
+
+        future = submit(run, executor=_executor)
+        with self._lock:
+            self._refining[key] = future
+        return future
+
+
+def get_engine(df):
+    return derived(df, 'approximate_engine', ApproximateEngine)
+
+
+def section_frame(view, section, binned=False, params=()):
+    # (frame para os gráficos, nível) no modo aproximado: o nível mais fino
+    # já construído para esta visão, seção e parâmetros
+    view = as_view(view)
+    engine = get_engine(view.df)
+    level = engine.level(view, section, binned, params)
+    return engine.frame(view, level), level
+
+
+def show_refinement(view, section, figures, level, binned=False, params=()):
+    # Legenda com o tamanho da amostra e refinação em segundo plano
+    view = as_view(view)
+    engine = get_engine(view.df)
+    sample = engine.sample
+    if level >= len(sample.levels):
+        st.caption("Approximate mode: exact results." if sample.levels else
+                   "Approximate mode: the dataset is small enough for exact results.")
+        return
+    rows = len(engine.frame(view, level))
+    st.caption(f"Approximate mode: stratified sample of {rows:,} of {len(view):,} passengers "
+               f"(level {level + 1} of {engine.n_levels}). Error bars on the rates and the grey "
+               f"whiskers beside each box show {CONFIDENCE:.0%} bounds on each rate and quartile.")
+    future = engine.refine(view, section, figures, level, binned, params)
+    if future.done() and future.exception() is not None:
+        st.warning(f"Could not refine the approximate results: {future.exception()}")
+        return
+    next_level = level + 1
+    label = ("the exact results" if next_level >= len(sample.levels)
+             else f"a {sample.levels[next_level]:,}-row sample")
+    wait_for(future, f"Refining toward {label} in the background...")
+
+
+# **Estimativas ponderadas**
+def survival_rates(df, dims, intervals='Wilson'):
+    # Taxas da amostra (limite de erro) ou do frame exato (cubo + intervalo)
+    if is_sample(df):
+        return sample_rates(df, dims)
+    return survival_rate_intervals(get_cube(df), dims, intervals)
+
+
+def sample_rates(df, dims, value='Survived', confidence=CONFIDENCE):
+    # Mesmas colunas de survival_rate_intervals: Survived, Count (estimado),
+    # Low/High (limite de erro da amostra)
+    # Linhas com Survived ausente ficam fora das somas (peso zero), como no
+    # denominador Outcomes do cubo
+    y = df[value].to_numpy(dtype=float)
+    known = ~np.isnan(y)
+    w = np.where(known, df['Weight'].to_numpy(), 0.0)
+    y = np.where(known, y, 0.0)
+    cells = pd.DataFrame({'w': w, 'wy': w * y, 'c': w * (w - 1), 'cy': w * (w - 1) * y})
+    if dims:
+        for dim in dims:
+            cells[dim] = _dimension(df, dim)
+        table = cells.groupby(dims, observed=True)[['w', 'wy', 'c', 'cy']].sum().reset_index()
+    else:
+        table = cells[['w', 'wy', 'c', 'cy']].sum().to_frame().T
+    p = table['wy'] / table['w']
+    variance = (table['cy'] * (1 - 2 * p) + p ** 2 * table['c']) / table['w'] ** 2
+    margin = z_score(confidence) * np.sqrt(np.maximum(variance, 0))
+    table['Survived'] = p
+    table['Count'] = np.rint(table['w']).astype(np.int64)
+    table['Low'] = np.clip(p - margin, 0, 1)
+    table['High'] = np.clip(p + margin, 0, 1)
+    return table[list(dims) + ['Survived', 'Count', 'Low', 'High']]
+
+
+def _dimension(df, dim):
+    # Arrays posicionais, mantendo as categorias (ordem dos grupos do cubo)
+    if dim == 'AgeGroup':
+        return age_groups(df['Age']).array
+    if dim == 'AgeBand':
+        return age_bands(df['Age']).array
+    if dim == 'Has_SibSp':
+        return has_sibsp(df['SibSp'])
+    return df[dim].array
+
+
+def value_counts(series, df):
+    # value_counts() com as contagens estimadas pelos pesos da amostra
+    if not is_sample(df):
+        return series.value_counts()
+    counts = df['Weight'].groupby(series.to_numpy(), observed=True).sum()
+    return np.rint(counts).astype(np.int64).sort_values(ascending=False).rename('count')
+
+
+def weighted_box_stats(values, groups, weights, confidence=CONFIDENCE, max_outliers=1000):
+    # Como binned_charts.box_stats, com quantis ponderados e colunas
+    # <quartil>_low/<quartil>_high do limite de erro de cada quartil
+    categorical = pd.Categorical(groups)
+    codes = categorical.codes
+    v = np.asarray(values, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    keep = (codes >= 0) & ~np.isnan(v)
+    v, codes, w = v[keep], codes[keep], w[keep]
+    order = np.lexsort((v, codes))
+    v, codes, w = v[order], codes[order], w[order]
+
+    n_groups = len(categorical.categories)
+    counts = np.bincount(codes, minlength=n_groups)
+    present = counts > 0
+    totals = np.bincount(codes, weights=w, minlength=n_groups)
+    squares = np.bincount(codes, weights=w ** 2, minlength=n_groups)
+    # Contagem a tamanho efetivo da amostra e correção de população finita
+    effective = totals ** 2 / np.maximum(squares, 1e-12)
+    fpc = np.clip(1 - counts / np.maximum(totals, 1), 0, 1)
+    cumulative = np.cumsum(w)
+    before = np.concatenate([[0], np.cumsum(totals)[:-1]])
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    last = np.maximum(starts + counts - 1, 0)
+
+    def quantile(p):
+        p = np.clip(p, 0, 1)
+        index = np.searchsorted(cumulative, before + p * totals, side='left')
+        return v[np.clip(index, starts, last)]
+
+    z = z_score(confidence)
+    stats = {'group': categorical.categories, 'count': np.rint(totals).astype(np.int64)}
+    for name, p in [('q1', 0.25), ('median', 0.5), ('q3', 0.75)]:
+        margin = z * np.sqrt(p * (1 - p) / np.maximum(effective, 1) * fpc)
+        stats[name] = quantile(np.full(n_groups, p))
+        stats[f'{name}_low'] = quantile(p - margin)
+        stats[f'{name}_high'] = quantile(p + margin)
+    q1, q3 = stats['q1'], stats['q3']
+    low_limit, high_limit = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    below, above = v < low_limit[codes], v > high_limit[codes]
+    n_below = np.bincount(codes[below], minlength=n_groups)
+    n_above = np.bincount(codes[above], minlength=n_groups)
+    stats['lowerfence'] = v[np.minimum(starts + n_below, last)]
+    stats['upperfence'] = v[np.maximum(last - n_above, starts)]
+    stats['mean'] = np.bincount(codes, weights=w * v, minlength=n_groups) / np.maximum(totals, 1e-12)
+    stats = pd.DataFrame(stats)[present].reset_index(drop=True)
+
+    outliers = {}
+    for code in np.flatnonzero(present):
+        points = np.unique(v[(below | above) & (codes == code)])
+        if len(points) > max_outliers:
+            points = points[np.linspace(0, len(points) - 1, max_outliers).astype(np.int64)]
+        outliers[categorical.categories[code]] = points
+    return stats, outliers
+
+
+def add_quantile_bounds(fig, stats):
+    # Marcadores pontilhados com o limite de erro de Q1, mediana e Q3
+    for row in stats.itertuples(index=False):
+        quartiles = [row.q1, row.median, row.q3]
+        fig.add_trace(go.Scatter(
+            x=[str(row.group)] * 3, y=quartiles, mode='markers', showlegend=False,
+            marker=dict(color='rgba(0, 0, 0, 0)'), name=f'{row.group} bounds',
+            error_y=dict(type='data', symmetric=False, color='#6c757d', thickness=1, width=12,
+                         array=[row.q1_high - row.q1, row.median_high - row.median,
+                                row.q3_high - row.q3],
+                         arrayminus=[row.q1 - row.q1_low, row.median - row.median_low,
+                                     row.q3 - row.q3_low]),
+            hovertemplate=f'%{{y:.2f}} ({CONFIDENCE:.0%} bound)<extra></extra>'))
+    return fig
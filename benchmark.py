@@ -0,0 +1,323 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+from data_loader import clean_data, read_csv, load_clean_data
+import synthetic_data
+
+# **Benchmarks dos caminhos quentes do dashboard**
+# Mede tempo (melhor de N repetições) e pico de memória (tracemalloc, em uma
+# execução separada) para carga/limpeza, agregações, cálculos de cada seção e
+# construção + serialização dos gráficos, em datasets sintéticos de tamanho
+# crescente. Os resultados vão para um JSON que pode ser comparado com um
+# baseline salvo:
+#
+#   python benchmark.py --sizes 891 100000 1000000 --output bench.json
+#   python benchmark.py --full --output bench_full.json     (até 10M linhas)
+#   python benchmark.py --output bench.json --save-baseline bench_baseline.json
+#   python benchmark.py --baseline bench_baseline.json --tolerance 0.2
+DEFAULT_SIZES = [891, 10_000, 100_000, 1_000_000]
+# Preset completo (--full): inclui o dataset de 10M linhas, que leva minutos
+FULL_SIZES = DEFAULT_SIZES + [10_000_000]
+
+# Gráficos com variante agregada no servidor (binned_charts)
+BINNED_FIGURES = {
+    'data_distribution': {'age_distribution', 'sibsp_distribution', 'parch_distribution',
+                          'age_by_class', 'fare_by_class', 'age_by_gender'},
+    'survival_analytics': {'fare_survival'},
+}
+# Bootstrap linha a linha (matriz réplicas x linhas) só até esse tamanho
+MAX_BOOTSTRAP_ROWS = 10_000
+
+
+def _measure(func, repeats):
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def _serialize(fig):
+    if hasattr(fig, 'savefig'):
+        fig.savefig(os.devnull, format='png')
+    else:
+        fig.to_json()
+
+
+def _once(build):
+    # Preparação compartilhada entre casos: feita só quando um caso selecionado
+    # pede, e uma única vez por tamanho
+    value = []
+
+    def get():
+        if not value:
+            value.append(build())
+        return value[0]
+    return get
+
+
+def benchmark_cases(csv_path, df, max_rf_rows):
+    # Cada caso é uma preparação que devolve a função medida (ou None para
+    # pular o caso): com --only, o que é caro (modelos, amostra, motor de
+    # correlação, DuckDB) só é montado para os casos escolhidos
+    import aggregates
+    import approximate
+    import binned_charts
+    import confidence
+    import correlation
+    import time_series
+    import correlation_analyses
+    import figure_cache
+    import importance
+    import model_cache
+    import query_backend
+    import snapshots
+    import overview
+    import data_distribution
+    import survival_analytics
+    import additional_insights
+
+    stat = os.stat(csv_path)
+    cube = _once(lambda: aggregates.get_cube(df))
+    cases = {
+        'load/read_csv': lambda: lambda: read_csv(csv_path),
+        'load/clean': lambda: lambda: clean_data(read_csv(csv_path)),
+        'load/feather_cache': lambda: lambda: load_clean_data(csv_path, stat.st_mtime_ns, stat.st_size),
+        'aggregate/build_cube': lambda: lambda: aggregates.build_cube(df),
+        'aggregate/rate_lookups': lambda cube=cube: lambda: [
+            aggregates.survival_rate(cube(), dims) for dims in
+            (['Sex'], ['Pclass'], ['AgeGroup'], ['Pclass', 'Sex'], ['Has_SibSp'], ['AgeBand'])],
+        'aggregate/box_stats': lambda: lambda: binned_charts.box_stats(df['Fare'], df['Pclass']),
+        'aggregate/histogram': lambda: lambda: binned_charts.histogram_bins(df['Age'], density=True),
+        'aggregate/wilson': lambda: lambda: confidence.survival_rate_intervals(
+            cube(), ['Pclass', 'Sex'], 'Wilson'),
+        'aggregate/bootstrap_counts': lambda: lambda: confidence.survival_rate_intervals(
+            cube(), ['Pclass', 'Sex'], 'Bootstrap'),
+        'correlation/matrices': lambda: lambda: correlation.correlations(df.copy()),
+    }
+    # Modo aproximado: amostras estratificadas e estimativas no primeiro nível
+    cases['approximate/sample_build'] = lambda: lambda: approximate.StratifiedSample(df)
+
+    def first_level():
+        sample = approximate.StratifiedSample(df)
+        if not sample.levels:
+            return None
+        positions, weights = sample.positions(0)
+        return df.take(positions).assign(Weight=weights)
+    sample_df = _once(first_level)
+
+    def sample_case(func):
+        return lambda: None if sample_df() is None else (lambda: func(sample_df()))
+    cases['approximate/rates'] = sample_case(lambda sample: approximate.sample_rates(sample, ['Sex', 'Pclass']))
+    cases['approximate/box'] = sample_case(lambda sample: approximate.weighted_box_stats(
+        sample['Fare'], sample['Pclass'], sample['Weight']))
+    # Série de contratos: leitura do arquivo e as três frequências do zero
+    cases['timeseries/views'] = lambda: lambda: [time_series.load_series().view(freq)
+                                                 for freq in time_series.FREQUENCIES]
+
+    def bootstrap_rows():
+        if len(df) > MAX_BOOTSTRAP_ROWS:
+            return None
+        survived, sex = df['Survived'].to_numpy(dtype=float), df['Sex'].cat.codes.to_numpy()
+        return lambda: confidence.bootstrap_rates_rows(survived, sex, 2)
+    cases['aggregate/bootstrap_rows'] = bootstrap_rows
+
+    # Troca de filtro com o motor já construído (atualização incremental)
+    def filter_update():
+        engine = correlation.CorrelationEngine(df)
+        halves = [np.flatnonzero(df['Age'].to_numpy() >= age) for age in (20, 21)]
+        return lambda: (engine.clear_selections(), [engine.pearson(positions) for positions in halves])
+    cases['correlation/filter_update'] = filter_update
+
+    split = _once(lambda: importance.split(df))
+
+    def random_forest(func):
+        def setup():
+            if len(df) > max_rf_rows:
+                return None
+            factory, params = importance.MODEL_BACKENDS['Random Forest']
+            X, y = split()[:2]
+            return lambda: func(factory, params, X, y)
+        return setup
+    cases['correlation/rf_fit'] = random_forest(lambda factory, params, X, y: factory(**params).fit(X, y))
+    cases['correlation/rf_fingerprint'] = random_forest(
+        lambda factory, params, X, y: model_cache.fingerprint(X, y, params))
+
+    # Gradient Boosting (histogramas) e a permutação sobre o modelo treinado
+    def hgb_fit():
+        factory, params = importance.MODEL_BACKENDS['Gradient Boosting']
+        X, y = split()[:2]
+        return lambda: factory(**params).fit(X, y)
+    cases['importance/hgb_fit'] = hgb_fit
+
+    def permutation():
+        factory, params = importance.MODEL_BACKENDS['Gradient Boosting']
+        X, y, X_test, y_test = split()
+        hgb = factory(**params).fit(X, y)
+        return lambda: importance.permutation_importance(hgb, X_test, y_test)
+    cases['importance/permutation'] = permutation
+
+    # serialize/* inclui a construção do gráfico mais o to_json()
+    for module in (overview, data_distribution, survival_analytics, additional_insights):
+        for name, build in module.FIGURES.items():
+            section = module.__name__
+            cases[f'figure/{section}.{name}'] = lambda build=build: lambda: build(df, False)
+            cases[f'serialize/{section}.{name}'] = lambda build=build: lambda: _serialize(build(df, False))
+            if name in BINNED_FIGURES.get(section, ()):
+                cases[f'figure/{section}.{name}[binned]'] = lambda build=build: lambda: build(df, True)
+                cases[f'serialize/{section}.{name}[binned]'] = \
+                    lambda build=build: lambda: _serialize(build(df, True))
+    cases['serialize/correlation_analyses.heatmap'] = \
+        lambda: lambda: _serialize(correlation_analyses.heatmap_figure(df))
+
+    # Visão repetida: gráfico reidratado do JSON guardado (hash do frame já calculado)
+    def cached(module, name, build):
+        key = figure_cache.figure_key(df, f'{module.__name__}.{name}', False)
+        figure_cache.cached_figure(key, lambda: build(df, False))
+        return lambda: figure_cache.cached_figure(key, None)
+    for module in (overview, data_distribution):
+        for name, build in module.FIGURES.items():
+            cases[f'figure_cache/{module.__name__}.{name}'] = \
+                lambda module=module, name=name, build=build: cached(module, name, build)
+    cases['figure_cache/frame_hash'] = lambda: lambda: figure_cache.frame_hash(df.copy())
+
+    # Comparação de snapshots: resumo do frame (primeira vez) e a releitura do JSON
+    summary = _once(lambda: snapshots.SnapshotSummary.from_frame(df, 'benchmark'))
+    cases['snapshots/summarize'] = lambda: lambda: snapshots.SnapshotSummary.from_frame(df, 'benchmark')
+
+    def load_summary():
+        payload = json.dumps(summary().to_dict())
+        return lambda: snapshots.SnapshotSummary.from_dict(json.loads(payload))
+    cases['snapshots/load_summary'] = load_summary
+    cases['snapshots/rates'] = lambda: lambda: snapshots.rate_deltas(
+        snapshots.rates_table([summary(), summary()], ['Pclass', 'Sex']), ['Pclass', 'Sex'], 'benchmark')
+
+    # Backend SQL (opcional): as mesmas agregações calculadas no DuckDB sobre o CSV
+    def open_query():
+        try:
+            return query_backend.DuckDBSource(csv_path).view()
+        except ImportError:
+            return None
+    query = _once(open_query)
+
+    def query_case(func):
+        return lambda: None if query() is None else (lambda: func(query()))
+    cases['query/open'] = query_case(lambda view: query_backend.DuckDBSource(csv_path))
+    cases['query/build_cube'] = query_case(lambda view: view.build_cube())
+    cases['query/box_stats'] = query_case(lambda view: view.box_stats('Fare', 'Pclass'))
+    cases['query/histogram'] = query_case(lambda view: view.histogram_bins('Age', density=True))
+    cases['query/correlations'] = query_case(lambda view: view.correlations(correlation.CANDIDATE_COLUMNS))
+    return cases
+
+
+def run(sizes, repeats, max_rf_rows, only=None, seed=0):
+    results = []
+    # Datasets sintéticos ajustados ao Titanic-Dataset.csv (synthetic_data)
+    model = synthetic_data.fit_from_csv()
+    cache_dir = data_loader.CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Caches Feather dos CSVs temporários vão para a pasta temporária (e saem com ela)
+        data_loader.CACHE_DIR = os.path.join(tmp_dir, '.cache')
+        try:
+            for n_rows in sizes:
+                csv_path = os.path.join(tmp_dir, f"passengers_{n_rows}.csv")
+                synthetic_data.write_dataset(model, csv_path, n_rows, seed=seed)
+                df = clean_data(read_csv(csv_path))
+                for case, setup in benchmark_cases(csv_path, df, max_rf_rows).items():
+                    if only and not any(pattern in case for pattern in only):
+                        continue
+                    func = setup()
+                    if func is None:
+                        continue
+                    seconds, peak = _measure(func, repeats)
+                    results.append({'case': case, 'rows': n_rows,
+                                    'seconds': seconds, 'peak_bytes': peak})
+                    print(f"{case:<55} {n_rows:>10,} rows {seconds * 1000:>10.1f} ms "
+                          f"{peak / 2 ** 20:>9.1f} MiB", flush=True)
+        finally:
+            data_loader.CACHE_DIR = cache_dir
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeats': repeats,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    # Regressão: tempo ou memória acima de (1 + tolerance) vezes o baseline
+    previous = {(r['case'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['case'], result['rows']))
+        if before is None or before['seconds'] == 0:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        mem_ratio = result['peak_bytes'] / max(before['peak_bytes'], 1)
+        if ratio > 1 + tolerance or mem_ratio > 1 + tolerance:
+            regressions.append((result['case'], result['rows'], ratio, mem_ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard hot paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--full', action='store_true',
+                        help=f"run the full size preset {FULL_SIZES} (overrides --sizes)")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--max-rf-rows', type=int, default=200_000,
+                        help="skip the Random Forest fit above this many rows")
+    parser.add_argument('--only', nargs='+', help="run only cases containing these substrings")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help="compare against this results file")
+    parser.add_argument('--save-baseline', help="also write the results to this baseline file")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown/memory growth ratio before flagging a regression")
+    args = parser.parse_args(argv)
+
+    sizes = FULL_SIZES if args.full else args.sizes
+    current = run(sizes, args.repeats, args.max_rf_rows, args.only)
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        for case, rows, ratio, mem_ratio in regressions:
+            print(f"REGRESSION {case} @ {rows:,} rows: time x{ratio:.2f}, memory x{mem_ratio:.2f}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# **Agregação no servidor para histogramas e box plots**
+# Em vez de mandar todas as linhas para o px.histogram/px.box (que serializa
+# cada ponto no payload do navegador), calculamos contagens por bin e o resumo
+# de quartis/whiskers/outliers em NumPy e enviamos só isso para o gráfico.
+MAX_OUTLIERS = 1000
+
+
+def server_side_charts():
+    return st.session_state.get('server_side_charts', False)
+
+
+def histogram_bins(values, nbins=30, density=False, weights=None):
+    # weights: pesos das linhas de uma amostra (contagens estimadas)
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    values = values[valid]
+    weights = None if weights is None else np.asarray(weights, dtype=float)[valid]
+    counts, edges = np.histogram(values, bins=nbins, weights=weights)
+    widths = np.diff(edges)
+    if density and len(values):
+        heights = counts / (counts.sum() * widths)
+    else:
+        heights = counts
+    return pd.DataFrame({'center': edges[:-1] + widths / 2, 'width': widths,
+                         'count': counts, 'height': heights})
+
+
+def discrete_counts(values, weights=None):
+    # Histograma de variáveis inteiras (SibSp, Parch): uma barra por valor
+    values = np.asarray(values)
+    valid = values >= 0
+    values = values[valid].astype(np.int64)
+    if weights is None:
+        counts = np.bincount(values)
+    else:
+        counts = np.rint(np.bincount(values, weights=np.asarray(weights)[valid])).astype(np.int64)
+    present = np.flatnonzero(counts)
+    return pd.DataFrame({'value': present, 'count': counts[present]})
+
+
+def box_stats(values, groups, max_outliers=MAX_OUTLIERS):
+    # Quartis (interpolação linear), whiskers de 1.5*IQR e outliers por grupo,
+    # tudo vetorizado: uma ordenação por (grupo, valor) e aritmética de índices.
+    categorical = pd.Categorical(groups)
+    codes = categorical.codes
+    v = np.asarray(values, dtype=float)
+    keep = (codes >= 0) & ~np.isnan(v)
+    v, codes = v[keep], codes[keep]
+    order = np.lexsort((v, codes))
+    v, codes = v[order], codes[order]
+
+    counts = np.bincount(codes, minlength=len(categorical.categories))
+    present = counts > 0
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    def quantile(p):
+        pos = starts + p * np.maximum(counts - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        lo, hi = np.minimum(lo, len(v) - 1), np.minimum(hi, len(v) - 1)
+        return v[lo] + (v[hi] - v[lo]) * (pos - lo)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    below = v < low_limit[codes]
+    above = v > high_limit[codes]
+    n_below = np.bincount(codes[below], minlength=len(counts))
+    n_above = np.bincount(codes[above], minlength=len(counts))
+    last = np.maximum(starts + counts - 1, 0)
+    lowerfence = v[np.minimum(starts + n_below, last)]
+    upperfence = v[np.maximum(last - n_above, starts)]
+    sums = np.bincount(codes, weights=v, minlength=len(counts))
+
+    stats = pd.DataFrame({
+        'group': categorical.categories, 'count': counts,
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': lowerfence, 'upperfence': upperfence,
+        'mean': sums / np.maximum(counts, 1),
+    })[present].reset_index(drop=True)
+
+    # Outliers: valores distintos, com amostragem uniforme acima do limite
+    outliers = {}
+    outlier_mask = below | above
+    for code in np.flatnonzero(present):
+        points = np.unique(v[outlier_mask & (codes == code)])
+        if len(points) > max_outliers:
+            points = points[np.linspace(0, len(points) - 1, max_outliers).astype(np.int64)]
+        outliers[categorical.categories[code]] = points
+    return stats, outliers
+
+
+def histogram_figure(bins, title, color, xaxis_title, yaxis_title):
+    fig = go.Figure(go.Bar(x=bins['center'], y=bins['height'], width=bins['width'],
+                           marker_color=color, marker_line_width=0))
+    fig.update_layout(title=title, xaxis_title=xaxis_title,
+                      yaxis_title=yaxis_title, bargap=0)
+    return fig
+
+
+def discrete_figure(counts, title, color, xaxis_title, yaxis_title):
+    fig = go.Figure(go.Bar(x=counts['value'], y=counts['count'],
+                           text=counts['count'], marker_color=color))
+    fig.update_layout(title=title, xaxis_title=xaxis_title,
+                      yaxis_title=yaxis_title, bargap=0.1)
+    return fig
+
+
+def box_figure(stats, outliers, title, xaxis_title, yaxis_title, color_map=None):
+    fig = go.Figure()
+    for row in stats.itertuples(index=False):
+        color = (color_map or {}).get(row.group)
+        name = str(row.group)
+        fig.add_trace(go.Box(x=[name], q1=[row.q1], median=[row.median], q3=[row.q3],
+                             lowerfence=[row.lowerfence], upperfence=[row.upperfence],
+                             mean=[row.mean], name=name, marker_color=color,
+                             boxpoints=False))
+        points = outliers.get(row.group, [])
+        if len(points):
+            fig.add_trace(go.Scatter(x=[name] * len(points), y=points, mode='markers',
+                                     marker=dict(color=color, size=4), name=name,
+                                     showlegend=False, hoverinfo='y'))
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+    return fig
@@ -0,0 +1,131 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import streamlit as st
+
+from aggregates import totals
+
+# **Intervalos de confiança para as taxas de sobrevivência**
+# - Wilson: fórmula fechada sobre (sobreviventes, total) de cada grupo;
+# - Bootstrap por contagens: reamostrar as N linhas equivale a sortear as
+#   células (grupo x sobreviveu) de uma multinomial(N, contagens / N), então
+#   cada réplica custa O(grupos) em vez de O(linhas);
+# - Bootstrap por linhas: matriz de índices (réplicas x linhas) em lotes, para
+#   quando só há os dados linha a linha.
+# As réplicas são divididas em lotes com sementes independentes
+# (SeedSequence.spawn) e os lotes rodam em threads (o NumPy libera o GIL ao
+# sortear), então o resultado para uma semente não depende do número de threads.
+CONFIDENCE = 0.95
+N_BOOT = 2000
+INTERVAL_METHODS = ['Wilson', 'Bootstrap', 'None']
+# Réplicas por lote e limite de elementos da matriz de índices por lote
+BATCH_SIZE = 500
+MAX_BATCH_ELEMENTS = 2 ** 24
+
+_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bootstrap")
+
+
+def rate_intervals(settings=None):
+    # settings: escolhas explícitas (relatório sem servidor); padrão = a sessão
+    settings = st.session_state if settings is None else settings
+    return settings.get('rate_intervals', 'Wilson')
+
+
+def z_score(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes, n, confidence=CONFIDENCE):
+    successes = np.asarray(successes, dtype=float)
+    n = np.asarray(n, dtype=float)
+    z = z_score(confidence)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = successes / n
+        center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+        margin = z / (1 + z ** 2 / n) * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+    return center - margin, center + margin
+
+
+def _batches(n_boot, batch_size):
+    sizes = [batch_size] * (n_boot // batch_size)
+    if n_boot % batch_size:
+        sizes.append(n_boot % batch_size)
+    return sizes
+
+
+def _replicate(sample, n_boot, batch_size, seed):
+    # sample(rng, size) -> matriz (size x grupos) de taxas
+    sizes = _batches(n_boot, batch_size)
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(sizes))]
+    if len(sizes) == 1:
+        return sample(rngs[0], sizes[0])
+    return np.vstack(list(_executor.map(sample, rngs, sizes)))
+
+
+def bootstrap_rates(successes, n, n_boot=N_BOOT, seed=0):
+    # Réplicas (n_boot x grupos) por reamostragem multinomial das contagens
+    successes = np.asarray(successes, dtype=np.int64)
+    n = np.asarray(n, dtype=np.int64)
+    cells = np.column_stack([successes, n - successes]).ravel()
+    total = int(cells.sum())
+    probabilities = cells / total if total else cells.astype(float)
+
+    def sample(rng, size):
+        draws = rng.multinomial(total, probabilities, size=size).reshape(size, len(n), 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return draws[..., 0] / draws.sum(axis=-1)
+
+    return _replicate(sample, n_boot, BATCH_SIZE, seed)
+
+
+def bootstrap_rates_rows(outcomes, groups, n_groups, n_boot=N_BOOT, seed=0):
+    # Mesmo bootstrap a partir das linhas: índices (lote x linhas) e bincount
+    # por (réplica, grupo), sem laço sobre as réplicas
+    outcomes = np.asarray(outcomes, dtype=float)
+    groups = np.asarray(groups, dtype=np.int64)
+    n_rows = len(outcomes)
+
+    def sample(rng, size):
+        index = rng.integers(0, n_rows, size=(size, n_rows))
+        keys = (groups[index] + (np.arange(size) * n_groups)[:, None]).ravel()
+        survivors = np.bincount(keys, weights=outcomes[index].ravel(), minlength=size * n_groups)
+        counts = np.bincount(keys, minlength=size * n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (survivors / counts).reshape(size, n_groups)
+
+    batch_size = max(1, min(BATCH_SIZE, MAX_BATCH_ELEMENTS // max(n_rows, 1)))
+    return _replicate(sample, n_boot, batch_size, seed)
+
+
+def percentile_interval(replicates, confidence=CONFIDENCE):
+    tail = (1 - confidence) / 2 * 100
+    with np.errstate(invalid='ignore'):
+        low, high = np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+    return low, high
+
+
+def survival_rate_intervals(cube, dims=(), method='Wilson', confidence=CONFIDENCE,
+                            n_boot=N_BOOT, seed=0):
+    # survival_rate() com as colunas Low/High do intervalo de cada grupo
+    table = totals(cube, list(dims))
+    # Count das taxas = passageiros com Survived conhecido
+    table['Count'] = table['Outcomes']
+    table['Survived'] = table['Survivors'] / table['Count']
+    if method == 'Wilson':
+        table['Low'], table['High'] = wilson_interval(table['Survivors'], table['Count'], confidence)
+    elif method == 'Bootstrap':
+        replicates = bootstrap_rates(table['Survivors'], table['Count'], n_boot, seed)
+        table['Low'], table['High'] = percentile_interval(replicates, confidence)
+    else:
+        table['Low'] = table['High'] = np.nan
+    return table[list(dims) + ['Survived', 'Count', 'Low', 'High']]
+
+
+def error_bars(table, scale=1):
+    # Argumentos error_y/error_y_minus do plotly a partir de Low/High
+    if table['Low'].isna().all():
+        return {}
+    return {'error_y': (table['High'] - table['Survived']) * scale,
+            'error_y_minus': (table['Survived'] - table['Low']) * scale}
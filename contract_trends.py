@@ -0,0 +1,72 @@
+import streamlit as st
+import plotly.express as px
+import plotly.graph_objects as go
+from time_series import SERIES_PATH, FREQUENCIES, VALUE_COLUMN, ContractSeries
+from instrumentation import span, plotly_chart
+
+# Janela padrão da média móvel (em períodos) para cada frequência
+DEFAULT_WINDOWS = {'Daily': 7, 'Weekly': 4, 'Monthly': 3}
+
+
+# Uma série por processo, atualizada de forma incremental a cada rerun
+@st.cache_resource(show_spinner=False)
+def get_series(path=SERIES_PATH):
+    return ContractSeries(path)
+
+
+# **Construção dos gráficos (sem chamadas st.*)**
+def contracts_figure(table, freq, window):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=table.index, y=table[VALUE_COLUMN], name='Contracts',
+                         marker_color='#a0c6f0'))
+    fig.add_trace(go.Scatter(x=table.index, y=table['Rolling'], mode='lines',
+                             name=f'{window}-period rolling mean', line=dict(color='#004b87')))
+    fig.update_layout(title=f'{freq} Contracts', xaxis_title='Date',
+                      yaxis_title='Contracts', bargap=0.1)
+    return fig
+
+
+def cumulative_figure(table):
+    cumulative_df = table.reset_index()
+    return px.area(cumulative_df, x=cumulative_df.columns[0], y='Cumulative',
+                   title='Cumulative Contracts',
+                   labels={cumulative_df.columns[0]: 'Date', 'Cumulative': 'Total Contracts'},
+                   color_discrete_sequence=['#0073b7'])
+
+
+# Aba "Contract Trends" (resultados.csv; não depende dos filtros de passageiros)
+def show_contract_trends(view=None):
+    series = get_series()
+    with span('timeseries/refresh'):
+        series.refresh()
+
+    st.title('Contract Trends')
+    st.write("""
+    Daily contract counts from resultados.csv, resampled to the selected frequency with a rolling mean and the cumulative total. New rows appended to the file are picked up on the next rerun without reprocessing older dates.
+    """)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        freq = st.radio('Frequency', list(FREQUENCIES), horizontal=True, key='contracts_frequency')
+    with col2:
+        window = st.slider('Rolling window (periods)', 1, 30, DEFAULT_WINDOWS[freq],
+                           key=f'contracts_window_{freq}')
+
+    with span('timeseries/view'):
+        table = series.view(freq, window)
+    if table.empty:
+        st.info("resultados.csv has no rows yet.")
+        return
+
+    totals = series.totals()
+    days = (totals.index[-1] - totals.index[0]).days + 1
+    col3, col4, col5 = st.columns(3)
+    col3.metric('Total Contracts', f"{totals.sum():,.0f}")
+    col4.metric(f'Last {freq.lower()} period', f"{table[VALUE_COLUMN].iloc[-1]:,.0f}")
+    col5.metric('Average per day', f"{totals.sum() / days:,.1f}")
+
+    plotly_chart('contracts', contracts_figure(table, freq, window))
+
+    st.write("---")
+
+    plotly_chart('contracts_cumulative', cumulative_figure(table))
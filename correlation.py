@@ -0,0 +1,291 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_loader import derived
+from filters import as_view
+from query_backend import is_query
+
+# **Motor de correlação com estatísticas suficientes**
+# Para as colunas candidatas, guarda somas por par de colunas (contagem,
+# somas, somas de quadrados e produtos cruzados sobre as linhas em que as duas
+# colunas têm valor), calculadas com produtos de matrizes em uma passada.
+# Como são somas, o resultado de um filtro sai do resultado do filtro anterior
+# somando as linhas que entraram e subtraindo as que saíram, e linhas novas
+# (append) só somam.
+# Pearson usa as linhas completas de cada par, como DataFrame.corr. Spearman
+# usa as linhas completas em todas as colunas escolhidas; os postos saem da
+# ordem global de cada coluna, sem reordenar a cada filtro.
+# Point-biserial é o Pearson entre uma coluna binária e as demais.
+CANDIDATE_COLUMNS = ['Age', 'Fare', 'Pclass', 'Survived', 'SibSp', 'Parch', 'Sex', 'Embarked']
+CONFIDENCE = 0.95
+# Filtros recentes mantidos como base para atualizações incrementais
+MAX_CACHED_SELECTIONS = 8
+# Depois de tantas atualizações encadeadas, recalcula do zero (erro de arredondamento)
+MAX_INCREMENTAL_STEPS = 32
+# Variância (n * soma dos quadrados - soma²) abaixo dessa fração de n * soma
+# dos quadrados é resto de arredondamento das somas/subtrações: coluna constante
+VARIANCE_TOLERANCE = 1e-10
+
+
+def encode_column(series):
+    # Categorias numéricas (Pclass) mantêm o valor; as demais viram códigos
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        codes = series.cat.codes.to_numpy()
+        if pd.api.types.is_numeric_dtype(categories):
+            values = np.asarray(categories, dtype=float)[codes]
+        else:
+            values = codes.astype(float)
+        values[codes < 0] = np.nan
+        return values
+    if series.dtype == object:
+        return encode_column(series.astype('category'))
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+
+def encode_matrix(df, columns):
+    return np.column_stack([encode_column(df[col]) for col in columns])
+
+
+class PairwiseMoments:
+    # Somas por par (i, j) sobre as linhas em que i e j têm valor, com os
+    # dados deslocados por `shift` (estabilidade numérica)
+    def __init__(self, n, sums, squares, cross, shift):
+        self.n = n            # linhas completas do par
+        self.sums = sums      # sums[i, j]: soma de x_i nas linhas completas de (i, j)
+        self.squares = squares
+        self.cross = cross
+        self.shift = shift
+
+    @classmethod
+    def from_values(cls, values, shift):
+        valid = ~np.isnan(values)
+        centered = np.where(valid, values - shift, 0.0)
+        valid = valid.astype(float)
+        return cls(valid.T @ valid, centered.T @ valid, (centered ** 2).T @ valid,
+                   centered.T @ centered, shift)
+
+    def __add__(self, other):
+        return PairwiseMoments(self.n + other.n, self.sums + other.sums,
+                               self.squares + other.squares, self.cross + other.cross, self.shift)
+
+    def __sub__(self, other):
+        return PairwiseMoments(self.n - other.n, self.sums - other.sums,
+                               self.squares - other.squares, self.cross - other.cross, self.shift)
+
+    def pearson(self):
+        n, sx, sy = self.n, self.sums, self.sums.T
+        covariance = n * self.cross - sx * sy
+        variance_x = n * self.squares - sx ** 2
+        variance_y = n * self.squares.T - sy ** 2
+        varying = ((variance_x > VARIANCE_TOLERANCE * n * self.squares)
+                   & (variance_y > VARIANCE_TOLERANCE * n * self.squares.T))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = np.where(varying, covariance / np.sqrt(variance_x * variance_y), np.nan)
+        r = np.clip(r, -1.0, 1.0)
+        np.fill_diagonal(r, np.where(np.diag(varying), 1.0, np.nan))
+        return r
+
+
+class RankIndex:
+    # Ordem global de uma coluna e o grupo de empate de cada posição da ordem
+    def __init__(self, values):
+        self.order = np.argsort(values, kind='stable')
+        self._set_groups(values)
+
+    def _set_groups(self, values):
+        sorted_values = values[self.order]
+        # NaN != NaN: cada ausente fica no próprio grupo (e nunca é selecionado)
+        self.groups = np.concatenate([[0], np.cumsum(sorted_values[1:] != sorted_values[:-1])])
+        self.n_groups = int(self.groups[-1]) + 1 if len(self.groups) else 0
+
+    def append(self, values, start):
+        # values: coluna inteira já com as linhas novas a partir de `start`
+        new = values[start:]
+        new_order = np.argsort(new, kind='stable')
+        positions = np.searchsorted(values[self.order], new[new_order], side='right')
+        self.order = np.insert(self.order, positions, start + new_order)
+        self._set_groups(values)
+
+    def ranks(self, mask):
+        # Postos médios (empates) das linhas de `mask` entre elas: O(n), sem ordenar
+        selected = mask[self.order]
+        counts = np.bincount(self.groups, weights=selected, minlength=self.n_groups)
+        before = np.cumsum(counts) - counts
+        average = before + (counts + 1) / 2
+        ranks = np.empty(len(mask))
+        ranks[self.order] = average[self.groups]
+        return ranks
+
+
+def significance(r, n, method='pearson', confidence=CONFIDENCE):
+    # p-valor bicaudal (t com n - 2 graus de liberdade) e intervalo de
+    # confiança pela transformação de Fisher; para Spearman o erro padrão usa
+    # a correção de Fieller et al. (1.06 / (n - 3))
+    from scipy.special import betainc, ndtri
+
+    r = np.asarray(r, dtype=float)
+    n = np.broadcast_to(np.asarray(n, dtype=float), r.shape)
+    dof = n - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_squared = r ** 2 * dof / np.maximum(1 - r ** 2, 0)
+        p_value = np.where(np.abs(r) >= 1, 0.0, betainc(dof / 2, 0.5, dof / (dof + t_squared)))
+        p_value = np.where(dof > 0, p_value, np.nan)
+        variance = (1.06 if method == 'spearman' else 1.0) / (n - 3)
+        z = np.arctanh(np.clip(r, -1 + 1e-15, 1 - 1e-15))
+        margin = ndtri(0.5 + confidence / 2) * np.sqrt(np.where(n > 3, variance, np.nan))
+    low, high = np.tanh(z - margin), np.tanh(z + margin)
+    exact = np.abs(r) >= 1
+    return p_value, np.where(exact, r, low), np.where(exact, r, high)
+
+
+def correlation_result(r, n, columns, method, rows=None):
+    # Matrizes r, p-valor, IC e n (também usado pelo backend SQL)
+    p_value, low, high = significance(r, n, method)
+    rows = rows or columns
+    frame = lambda values: pd.DataFrame(values, index=rows, columns=columns)
+    return {'r': frame(r), 'p_value': frame(p_value), 'ci_low': frame(low),
+            'ci_high': frame(high), 'n': frame(np.broadcast_to(n, r.shape).astype(int))}
+
+
+class CorrelationEngine:
+    def __init__(self, df, columns=None):
+        self.columns = [col for col in (columns or CANDIDATE_COLUMNS) if col in df.columns]
+        self.values = encode_matrix(df, self.columns)
+        self.shift = np.nanmean(self.values, axis=0) if len(self.values) else np.zeros(len(self.columns))
+        self.shift = np.nan_to_num(self.shift)
+        self.total = PairwiseMoments.from_values(self.values, self.shift)
+        self._ranks = {}
+        self._selections = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, rows):
+        # Linhas novas: soma as estatísticas delas e insere nos postos
+        new_values = encode_matrix(rows, self.columns)
+        with self._lock:
+            start = len(self.values)
+            self.values = np.vstack([self.values, new_values])
+            self.total = self.total + PairwiseMoments.from_values(new_values, self.shift)
+            for i, rank_index in self._ranks.items():
+                rank_index.append(self.values[:, i], start)
+            self._selections.clear()
+        return self
+
+    def clear_selections(self):
+        # Esquece as seleções guardadas: o próximo filtro recalcula a partir do total
+        with self._lock:
+            self._selections.clear()
+
+    # **Seleção de linhas (posições do PassengerView; None = todas)**
+    def _mask(self, positions):
+        mask = np.zeros(len(self.values), dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def moments(self, positions=None):
+        if positions is None:
+            return self.total
+        positions = np.asarray(positions)
+        key = hashlib.sha1(positions.tobytes()).hexdigest()
+        with self._lock:
+            if key in self._selections:
+                self._selections.move_to_end(key)
+                return self._selections[key][1]
+            base = next(reversed(self._selections.values()), None)
+
+        moments, steps = None, 0
+        if base is not None and base[2] < MAX_INCREMENTAL_STEPS:
+            # Diferença em relação ao último filtro calculado
+            base_positions, base_moments, base_steps = base
+            mask, base_mask = self._mask(positions), self._mask(base_positions)
+            added = np.flatnonzero(mask & ~base_mask)
+            removed = np.flatnonzero(base_mask & ~mask)
+            if len(added) + len(removed) < len(positions):
+                moments = (base_moments
+                           + PairwiseMoments.from_values(self.values[added], self.shift)
+                           - PairwiseMoments.from_values(self.values[removed], self.shift))
+                steps = base_steps + 1
+        if moments is None:
+            moments = PairwiseMoments.from_values(self.values[positions], self.shift)
+
+        with self._lock:
+            self._selections[key] = (positions, moments, steps)
+            if len(self._selections) > MAX_CACHED_SELECTIONS:
+                self._selections.popitem(last=False)
+        return moments
+
+    def _rank_index(self, i):
+        with self._lock:
+            if i not in self._ranks:
+                self._ranks[i] = RankIndex(self.values[:, i])
+            return self._ranks[i]
+
+    def is_binary(self, col):
+        values = self.values[:, self.columns.index(col)]
+        return len(np.unique(values[~np.isnan(values)])) == 2
+
+    # **Matrizes**
+    def pearson(self, positions=None, columns=None):
+        columns = columns or self.columns
+        idx = [self.columns.index(col) for col in columns]
+        moments = self.moments(positions)
+        r = moments.pearson()[np.ix_(idx, idx)]
+        return correlation_result(r, moments.n[np.ix_(idx, idx)], columns, 'pearson')
+
+    def spearman(self, positions=None, columns=None):
+        columns = columns or self.columns
+        idx = [self.columns.index(col) for col in columns]
+        mask = np.ones(len(self.values), dtype=bool) if positions is None else self._mask(positions)
+        mask &= ~np.isnan(self.values[:, idx]).any(axis=1)
+        ranks = np.column_stack([self._rank_index(i).ranks(mask)[mask] for i in idx])
+        moments = PairwiseMoments.from_values(ranks, (mask.sum() + 1) / 2)
+        return correlation_result(moments.pearson(), int(mask.sum()), columns, 'spearman')
+
+    def point_biserial(self, positions=None, columns=None):
+        # Linhas: colunas binárias (duas categorias); colunas: as demais
+        pearson = self.pearson(positions, columns)
+        columns = list(pearson['r'].columns)
+        binary = [col for col in columns if self.is_binary(col)]
+        others = [col for col in columns if col not in binary]
+        return {name: frame.loc[binary, others] for name, frame in pearson.items()}
+
+
+def get_engine(df):
+    # Um motor por DataFrame carregado, compartilhado entre reruns e sessões
+    return derived(df, 'correlation_engine', CorrelationEngine)
+
+
+def correlations(view, columns=None):
+    # Pearson, Spearman e point-biserial de um PassengerView (ou DataFrame)
+    if is_query(view):
+        # Backend SQL: somas por par calculadas no banco
+        return view.correlations(columns or CANDIDATE_COLUMNS)
+    view = as_view(view)
+    engine = get_engine(view.df)
+    return {
+        'pearson': engine.pearson(view.positions, columns),
+        'spearman': engine.spearman(view.positions, columns),
+        'point_biserial': engine.point_biserial(view.positions, columns),
+    }
+
+
+def pairs_table(result):
+    # Tabela longa (um par por linha) do triângulo superior, sem laço em Python
+    r = result['r']
+    i, j = np.triu_indices(len(r.columns), k=1)
+    columns = np.asarray(r.columns)
+    return pd.DataFrame({
+        'x': columns[i], 'y': columns[j],
+        'r': r.to_numpy()[i, j],
+        'p_value': result['p_value'].to_numpy()[i, j],
+        'ci_low': result['ci_low'].to_numpy()[i, j],
+        'ci_high': result['ci_high'].to_numpy()[i, j],
+        'n': result['n'].to_numpy()[i, j],
+    })
@@ -1,40 +1,162 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
 import numpy as np
+from correlation import CANDIDATE_COLUMNS, correlations, pairs_table
+from importance import (IMPORTANCE_METHODS, MODEL_BACKENDS, feature_importances,
+                        importance_settings, impurity_importance, permutation_importance_async,
+                        supports_impurity, train_model)
+from filters import as_view
+from instrumentation import span, timed, timed_figures, plotly_chart
+from figure_pipeline import FigurePipeline, wait_for
 
 
-def show_correlation_analyses(df):
-    # **2. Convert Categorical Variables to Numeric for Analysis**
-    df_encoded = df.copy()
-    le = LabelEncoder()
-    categorical_cols = ['Sex', 'Embarked']
+CORR_COLUMNS = ['Age', 'Fare', 'Pclass', 'Survived']
 
-    for col in categorical_cols:
-        df_encoded[col] = le.fit_transform(df_encoded[col])
 
-    # **3. Heatmap de Correlação com Triângulo Inferior**
-    st.title('Correlation Analyses')
-    st.write("""
-    ### Correlation Heatmap
-    This heatmap shows the correlation matrix of numerical variables, displayed as a lower triangle for clarity. The size of the heatmap has been adjusted for better visibility.
-    """)
+# seaborn, matplotlib e sklearn são importados só quando a seção precisa deles:
+# juntos custam alguns segundos e atrasariam o primeiro paint do app.
 
-    corr = df_encoded[['Age', 'Fare', 'Pclass', 'Survived']].corr()
+def compute_correlations(view, columns=CORR_COLUMNS):
+    # Pearson, Spearman e point-biserial com p-valores e intervalos de
+    # confiança (correlation.py); cada filtro reaproveita as somas do anterior
+    with span('correlation/matrices'):
+        return correlations(view, columns)
+
+
+# **Construção dos gráficos (sem chamadas st.*)**
+def heatmap_figure(view, columns=CORR_COLUMNS):
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    corr = compute_correlations(view, columns)['pearson']['r']
 
     # Criar uma máscara para a parte superior do heatmap
     mask = np.triu(np.ones_like(corr, dtype=bool))
 
-    # Reduzir ainda mais o tamanho da figura
-    fig_heatmap = plt.figure(figsize=(5, 3))  # Ajuste para ser menor
+    # Reduzir ainda mais o tamanho da figura (Figure direto, fora do estado
+    # global do pyplot, para poder ser gerada em outras threads/processos)
+    fig_heatmap = Figure(figsize=(5, 3))  # Ajuste para ser menor
+    ax = fig_heatmap.subplots()
     sns.heatmap(corr, mask=mask, annot=True, cmap='Blues', vmin=-
-                1, vmax=1, center=0, linewidths=0.5, fmt='.2f')
-    plt.title('Correlation Heatmap')
-    st.pyplot(fig_heatmap)
+                1, vmax=1, center=0, linewidths=0.5, fmt='.2f', ax=ax)
+    ax.set_title('Correlation Heatmap')
+    return fig_heatmap
+
+
+def feature_importance_figure(importance_df, backend='Random Forest', method='Permutation'):
+    # Permutação: barra de erro com o desvio padrão entre as repetições
+    error = importance_df['Std'] if importance_df['Std'].notna().any() else None
+    return px.bar(importance_df, x='Importance', y='Feature', error_x=error,
+                  title=f'Feature Importance with {backend} ({method.lower()})',
+                  orientation='h', color='Importance', color_continuous_scale='Blues')
+
+
+FIGURES = timed_figures('correlation_analyses', {
+    'heatmap': lambda df, binned, settings=None: heatmap_figure(df),
+    'feature_importance': lambda df, binned, settings=None: feature_importance_figure(
+        feature_importances(df, *importance_settings(settings)), *importance_settings(settings)),
+})
+
+
+def build_figures(view, binned=False):
+    df = as_view(view).frame
+    return {name: build(df, binned) for name, build in FIGURES.items()}
+
+
+def prefetch_correlation_analyses(view):
+    # Usado pela navegação por seção para adiantar os cálculos em segundo plano
+    compute_correlations(view)
+    train_model(as_view(view).frame, importance_settings()[0])
+
+
+def show_feature_importance(df):
+    col1, col2 = st.columns(2)
+    with col1:
+        backend = st.selectbox('Model', list(MODEL_BACKENDS), key='importance_model')
+    with col2:
+        if not supports_impurity(backend):
+            st.session_state['importance_method'] = 'Permutation'
+        st.radio('Importance', IMPORTANCE_METHODS, key='importance_method', horizontal=True,
+                 disabled=not supports_impurity(backend),
+                 help="Permutation: drop in held-out accuracy when a feature is shuffled. "
+                      "Impurity is only available for the Random Forest.")
+    backend, method = importance_settings()
+
+    model_future = train_model(df, backend)
+    if not model_future.done():
+        wait_for(model_future, f"Training the {backend} model in the background...")
+        return
+
+    if method == 'Impurity':
+        importance_df = impurity_importance(model_future.result())
+    else:
+        importance_future = permutation_importance_async(df, backend, model_future.result())
+        if not importance_future.done():
+            wait_for(importance_future, "Computing permutation importance in the background...")
+            return
+        importance_df = importance_future.result()
+
+    plotly_chart('feature_importance', feature_importance_figure(
+        importance_df.sort_values(by='Importance', ascending=True), backend, method))
+
+
+INTERPRETATIONS = [
+    (0.5, 'Strong positive correlation', '#004b87'),  # Azul forte
+    (0.2, 'Moderate positive correlation', '#66b3ff'),  # Azul médio
+    (-0.2, 'Weak correlation', '#c2c2f0'),  # Azul claro
+    (-0.5, 'Moderate negative correlation', '#ff9999'),  # Rosa claro
+    (-np.inf, 'Strong negative correlation', '#ff4d4d'),  # Rosa forte
+]
+
+
+def coefficient_table(result, label, upper=True):
+    # Um par por linha, com p-valor e intervalo de confiança de 95%
+    if upper:
+        table = pairs_table(result)
+    else:
+        table = pd.concat({name: frame.stack() for name, frame in result.items()}, axis=1)
+        table = table.rename_axis(['x', 'y']).reset_index()
+    coef = table['r'].to_numpy()
+    conditions = [coef > threshold for threshold, _, _ in INTERPRETATIONS]
+    interpretation = np.select(conditions, [f'<span style="color:{color}">{text}</span>'
+                                            for _, text, color in INTERPRETATIONS], '')
+    return pd.DataFrame({
+        'Pair': table['x'] + ' vs ' + table['y'],
+        label: table['r'].map('{:.2f}'.format),
+        '95% CI': ('[' + table['ci_low'].map('{:.2f}'.format) + ', '
+                   + table['ci_high'].map('{:.2f}'.format) + ']'),
+        'p-value': table['p_value'].map('{:.3g}'.format),
+        'Interpretation': interpretation,
+    }).to_html(escape=False)
+
+
+def show_correlation_analyses(view):
+    df = as_view(view).frame
+
+    st.title('Correlation Analyses')
+    columns = st.multiselect('Columns', CANDIDATE_COLUMNS, default=CORR_COLUMNS,
+                             key='correlation_columns',
+                             help="Sex and Embarked are encoded as category codes.")
+    if len(columns) < 2:
+        st.info("Select at least two columns.")
+        return
+
+    # **2. Pearson, Spearman e point-biserial em uma passada (correlation.py)**
+    results = compute_correlations(view, columns)
+
+    # **3. Heatmap de Correlação com Triângulo Inferior**
+    st.write("""
+    ### Correlation Heatmap
+    This heatmap shows the correlation matrix of numerical variables, displayed as a lower triangle for clarity. The size of the heatmap has been adjusted for better visibility.
+    """)
+
+    # O heatmap (seaborn) é construído no pool enquanto as tabelas são montadas
+    # e guardado como PNG no figure_cache (por frame filtrado e colunas)
+    charts = FigurePipeline('correlation_analyses', {
+        'heatmap': timed('figure/correlation_analyses.heatmap')(
+            lambda df, binned: heatmap_figure(view, columns))}, df, params=(tuple(columns),))
+    charts.slot('heatmap', height=300, width='stretch')
 
     st.write("---")
 
@@ -60,90 +182,37 @@ def show_correlation_analyses(df):
     - Spearman's correlation is useful for ordinal data or when the relationship between variables is not linear but monotonic.
     """)
 
-    # Pearson Correlation Coefficients
-    pearson_corr = df_encoded[['Age', 'Fare',
-                               'Pclass', 'Survived']].corr(method='pearson')
-    spearman_corr = df_encoded[['Age', 'Fare',
-                                'Pclass', 'Survived']].corr(method='spearman')
-
-    pairs = [
-        ('Age', 'Fare'),
-        ('Age', 'Pclass'),
-        ('Age', 'Survived'),
-        ('Fare', 'Pclass'),
-        ('Fare', 'Survived'),
-        ('Pclass', 'Survived')
-    ]
-
-    def interpret_correlation(coef):
-        if coef > 0.5:
-            return 'Strong positive correlation', '#004b87'  # Azul forte
-        elif coef > 0.2:
-            return 'Moderate positive correlation', '#66b3ff'  # Azul médio
-        elif coef > -0.2:
-            return 'Weak correlation', '#c2c2f0'  # Azul claro
-        elif coef > -0.5:
-            return 'Moderate negative correlation', '#ff9999'  # Rosa claro
-        else:
-            return 'Strong negative correlation', '#ff4d4d'  # Rosa forte
-
     st.subheader('Pearson Correlation Coefficients')
-    pearson_data = []
-    for x, y in pairs:
-        coef = pearson_corr.loc[x, y]
-        interpretation, color = interpret_correlation(coef)
-        pearson_data.append({
-            'Pair': f'{x} vs {y}',
-            'Pearson Coefficient': f'{coef:.2f}',
-            'Interpretation': f'<span style="color:{color}">{interpretation}</span>'
-        })
-
-    pearson_df = pd.DataFrame(pearson_data)
-    st.markdown(pearson_df.to_html(escape=False), unsafe_allow_html=True)
+    st.markdown(coefficient_table(results['pearson'], 'Pearson Coefficient'), unsafe_allow_html=True)
 
     st.write("---")
 
     st.subheader('Spearman Correlation Coefficients')
-    spearman_data = []
-    for x, y in pairs:
-        coef = spearman_corr.loc[x, y]
-        interpretation, color = interpret_correlation(coef)
-        spearman_data.append({
-            'Pair': f'{x} vs {y}',
-            'Spearman Coefficient': f'{coef:.2f}',
-            'Interpretation': f'<span style="color:{color}">{interpretation}</span>'
-        })
-
-    spearman_df = pd.DataFrame(spearman_data)
-    st.markdown(spearman_df.to_html(escape=False), unsafe_allow_html=True)
+    st.markdown(coefficient_table(results['spearman'], 'Spearman Coefficient'), unsafe_allow_html=True)
 
     st.write("---")
 
-    # **6. Feature Importance with Random Forest (Horizontal Bar Chart)**
+    # **5. Point-biserial (coluna binária vs. demais)**
+    point_biserial = results['point_biserial']
+    if point_biserial['r'].size:
+        st.subheader('Point-Biserial Correlation Coefficients')
+        st.write("""
+        Correlation between each binary column (for example Survived or Sex) and the other selected columns. It is the Pearson coefficient with one dichotomous variable.
+        """)
+        st.markdown(coefficient_table(point_biserial, 'Point-Biserial Coefficient', upper=False),
+                    unsafe_allow_html=True)
+
+        st.write("---")
+
+    charts.fill()
+
+    # **6. Feature Importance (Horizontal Bar Chart)**
     st.write("""
-    ### Feature Importance with Random Forest
-    This plot shows the importance of each feature in predicting survival, based on a Random Forest model. Feature importance helps us understand which features contribute most to the model's predictions.
+    ### Feature Importance
+    This plot shows the importance of each feature in predicting survival, based on a Random Forest or a histogram-based Gradient Boosting model trained on 75% of the passengers. Permutation importance measures how much the accuracy on the remaining 25% drops when a feature is shuffled, which avoids the bias of impurity importance toward features with many distinct values such as Age and Fare.
     """)
 
-    # Defining features and target
-    X = df_encoded[['Age', 'Fare', 'Pclass', 'Sex', 'Embarked']]
-    y = df_encoded['Survived']
-
-    # Training Random Forest
-    rf = RandomForestClassifier(n_estimators=100, random_state=42)
-    rf.fit(X, y)
-
-    # Extracting feature importances
-    feature_importances = rf.feature_importances_
-    features = X.columns
-    importance_df = pd.DataFrame(
-        {'Feature': features, 'Importance': feature_importances})
-    importance_df = importance_df.sort_values(by='Importance', ascending=True)
-
-    fig_feature_importance = px.bar(importance_df, x='Importance', y='Feature',
-                                    title='Feature Importance with Random Forest',
-                                    orientation='h', color='Importance', color_continuous_scale='Blues')
-    st.plotly_chart(fig_feature_importance)
+    show_feature_importance(df)
 
     st.write("""
     **Insight:**
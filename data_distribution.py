@@ -1,34 +1,125 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-
-
-def load_data():
-    # Carregar o dataset
-    df = pd.read_csv("Titanic-Dataset.csv")
-
-    # Convertendo colunas categóricas
-    df['Sex'] = df['Sex'].astype('category')
-    df['Pclass'] = df['Pclass'].astype('category')
-    df['Embarked'] = df['Embarked'].astype('category')
-
-    # Garantir tipo numérico e tratar valores faltantes
-    df['Survived'] = pd.to_numeric(df['Survived'], errors='coerce')
-    df['Age'].fillna(df['Age'].median(), inplace=True)
-    df['Embarked'].fillna(df['Embarked'].mode()[0], inplace=True)
-
-    # Remover colunas não necessárias para a análise
-    df.drop(columns=['PassengerId', 'Name', 'Ticket', 'Cabin'], inplace=True)
-
-    return df
-
-
-def show_data_distribution():
-    df = load_data()
-
-    # Mapear os códigos de embarque para os nomes dos portos
-    port_map = {'S': 'Southampton', 'C': 'Cherbourg', 'Q': 'Queenstown'}
-    df['Embarked'] = df['Embarked'].map(port_map)
+from filters import as_view
+from binned_charts import (server_side_charts, histogram_bins, discrete_counts, box_stats,
+                           histogram_figure, discrete_figure, box_figure)
+from approximate import (approximate_mode, is_sample, sample_weights, section_frame,
+                         show_refinement, value_counts, weighted_box_stats, add_quantile_bounds)
+from query_backend import is_query
+from instrumentation import timed_figures
+from figure_pipeline import FigurePipeline
+
+# Mapear os códigos de embarque para os nomes dos portos
+PORT_MAP = {'S': 'Southampton', 'C': 'Cherbourg', 'Q': 'Queenstown'}
+CLASS_COLORS = {1: '#004b87', 2: '#0073b7', 3: '#00a3e0'}  # Cores distintas para cada classe
+GENDER_COLORS = {'male': '#004b87', 'female': '#ff6f91'}  # Cores distintas para gênero
+
+
+# **Construção dos gráficos (sem chamadas st.*)**
+# No modo aproximado df é a amostra (coluna Weight): contagens e quantis
+# ponderados, sempre pelo caminho agregado. No backend SQL df é um QueryView:
+# bins, contagens e quartis vêm do banco
+def age_distribution_figure(df, binned=False):
+    # Criar histograma da distribuição de idade
+    if is_query(df):
+        return histogram_figure(df.histogram_bins('Age', nbins=30, density=True),
+                                'Age Distribution of Passengers', '#003d6c',
+                                'Age', 'Density')
+    if binned or is_sample(df):
+        return histogram_figure(histogram_bins(df['Age'], nbins=30, density=True,
+                                               weights=sample_weights(df)),
+                                'Age Distribution of Passengers', '#003d6c',
+                                'Age', 'Density')
+    fig_age_distribution = px.histogram(df, x='Age', nbins=30, title='Age Distribution of Passengers',
+                                        color_discrete_sequence=[
+                                            '#003d6c'],
+                                        histnorm='density')
+    fig_age_distribution.update_layout(
+        xaxis_title='Age', yaxis_title='Density')
+    return fig_age_distribution
+
+
+def embarked_distribution_figure(df):
+    if is_query(df):
+        embarked_dist_df = df.value_counts('Embarked').rename(index=PORT_MAP).reset_index()
+    else:
+        embarked_dist_df = value_counts(df['Embarked'].map(PORT_MAP), df).reset_index()
+    embarked_dist_df.columns = ['Embarked', 'Count']
+    fig_embarked_distribution = px.bar(embarked_dist_df, x='Embarked', y='Count',
+                                       labels={
+                                           'Embarked': 'Embarked Port', 'Count': 'Count'},
+                                       title='Passenger Distribution by Embarked Port',
+                                       # Tons de azul mais distintos
+                                       color='Embarked', color_discrete_sequence=['#003d6c', '#0063e5', '#0090f9'],
+                                       text='Count')
+    fig_embarked_distribution.update_layout(
+        xaxis_title='Embarked Port', yaxis_title='Count')
+    return fig_embarked_distribution
+
+
+def count_distribution_figure(df, col, title, xaxis_title, binned=False):
+    # Histogramas de SibSp e Parch com a contagem absoluta em cada barra
+    if is_query(df):
+        return discrete_figure(df.discrete_counts(col), title, '#003d6c', xaxis_title, 'Count')
+    if binned or is_sample(df):
+        return discrete_figure(discrete_counts(df[col], sample_weights(df)), title, '#003d6c',
+                               xaxis_title, 'Count')
+    fig = px.histogram(df, x=col, title=title,
+                       color_discrete_sequence=[
+                           '#003d6c'],
+                       text_auto=True)  # Mostra contagem absoluta
+    fig.update_layout(
+        xaxis_title=xaxis_title, yaxis_title='Count')
+    return fig
+
+
+def box_plot_figure(df, x, y, title, xaxis_title, color_map, binned=False):
+    if is_query(df):
+        return box_figure(*df.box_stats(y, x), title, xaxis_title, y, color_map)
+    if is_sample(df):
+        stats, outliers = weighted_box_stats(df[y], df[x], df['Weight'])
+        return add_quantile_bounds(box_figure(stats, outliers, title, xaxis_title, y, color_map),
+                                   stats)
+    if binned:
+        return box_figure(*box_stats(df[y], df[x]), title,
+                          xaxis_title, y, color_map)
+    fig = px.box(df, x=x, y=y, title=title,
+                 color=x,
+                 color_discrete_map=color_map)
+    fig.update_layout(xaxis_title=xaxis_title, yaxis_title=y)
+    return fig
+
+
+FIGURES = timed_figures('data_distribution', {
+    'age_distribution': lambda df, binned, settings=None: age_distribution_figure(df, binned),
+    'embarked_distribution': lambda df, binned, settings=None: embarked_distribution_figure(df),
+    'sibsp_distribution': lambda df, binned, settings=None: count_distribution_figure(
+        df, 'SibSp', 'Distribution of SibSp (Siblings/Spouses) Aboard', 'Number of SibSp', binned),
+    'parch_distribution': lambda df, binned, settings=None: count_distribution_figure(
+        df, 'Parch', 'Distribution of Parch (Parents/Children) Aboard', 'Number of Parch', binned),
+    'age_by_class': lambda df, binned, settings=None: box_plot_figure(
+        df, 'Pclass', 'Age', 'Age Distribution by Pclass', 'Pclass', CLASS_COLORS, binned),
+    'fare_by_class': lambda df, binned, settings=None: box_plot_figure(
+        df, 'Pclass', 'Fare', 'Fare Distribution by Pclass', 'Pclass', CLASS_COLORS, binned),
+    'age_by_gender': lambda df, binned, settings=None: box_plot_figure(
+        df, 'Sex', 'Age', 'Age Distribution by Gender', 'Gender', GENDER_COLORS, binned),
+})
+
+
+def build_figures(view, binned=False):
+    df = as_view(view).frame
+    return {name: build(df, binned) for name, build in FIGURES.items()}
+
+
+def show_data_distribution(view):
+    df = as_view(view).frame
+    binned = server_side_charts()
+    # A amostra estratificada vem do frame em memória (não do backend SQL)
+    approximate = approximate_mode() and not is_query(df)
+    if approximate:
+        # Amostra estratificada do nível já pronto; refinada no fim da seção
+        df, level = section_frame(view, 'data_distribution', binned)
+    charts = FigurePipeline('data_distribution', FIGURES, df, binned)
 
     # Abas
     with st.container():
@@ -39,15 +130,7 @@ def show_data_distribution():
         ### Age Distribution of Passengers
         This histogram shows the age distribution of all passengers. The density curve provides a smooth estimate of the age distribution, highlighting the age range where most passengers fall.
         """)
-
-        # Criar histograma da distribuição de idade
-        fig_age_distribution = px.histogram(df, x='Age', nbins=30, title='Age Distribution of Passengers',
-                                            color_discrete_sequence=[
-                                                '#003d6c'],
-                                            histnorm='density')
-        fig_age_distribution.update_layout(
-            xaxis_title='Age', yaxis_title='Density')
-        st.plotly_chart(fig_age_distribution)
+        charts.slot('age_distribution')
 
         # Linha divisória
         st.markdown("""<hr style="border: 1px solid #ccc;"/>""",
@@ -58,18 +141,7 @@ def show_data_distribution():
         ### Passenger Distribution by Embarked Port
         This bar chart illustrates the number of passengers boarding from each port. It provides an overview of the distribution of passengers across different embarkation points.
         """)
-        embarked_dist_df = df['Embarked'].value_counts().reset_index()
-        embarked_dist_df.columns = ['Embarked', 'Count']
-        fig_embarked_distribution = px.bar(embarked_dist_df, x='Embarked', y='Count',
-                                           labels={
-                                               'Embarked': 'Embarked Port', 'Count': 'Count'},
-                                           title='Passenger Distribution by Embarked Port',
-                                           # Tons de azul mais distintos
-                                           color='Embarked', color_discrete_sequence=['#003d6c', '#0063e5', '#0090f9'],
-                                           text='Count')
-        fig_embarked_distribution.update_layout(
-            xaxis_title='Embarked Port', yaxis_title='Count')
-        st.plotly_chart(fig_embarked_distribution)
+        charts.slot('embarked_distribution')
 
         # Linha divisória
         st.markdown("""<hr style="border: 1px solid #ccc;"/>""",
@@ -80,13 +152,7 @@ def show_data_distribution():
         ### Distribution of SibSp (Siblings/Spouses) Aboard
         This histogram depicts the number of siblings or spouses aboard the Titanic. It shows how many passengers had family members accompanying them on the journey.
         """)
-        fig_sibsp_distribution = px.histogram(df, x='SibSp', title='Distribution of SibSp (Siblings/Spouses) Aboard',
-                                              color_discrete_sequence=[
-                                                  '#003d6c'],
-                                              text_auto=True)  # Mostra contagem absoluta
-        fig_sibsp_distribution.update_layout(
-            xaxis_title='Number of SibSp', yaxis_title='Count')
-        st.plotly_chart(fig_sibsp_distribution)
+        charts.slot('sibsp_distribution')
 
         # Linha divisória
         st.markdown("""<hr style="border: 1px solid #ccc;"/>""",
@@ -97,13 +163,7 @@ def show_data_distribution():
         ### Distribution of Parch (Parents/Children) Aboard
         This histogram illustrates the number of parents or children aboard the Titanic. It highlights how many passengers traveled with their family members.
         """)
-        fig_parch_distribution = px.histogram(df, x='Parch', title='Distribution of Parch (Parents/Children) Aboard',
-                                              color_discrete_sequence=[
-                                                  '#003d6c'],
-                                              text_auto=True)  # Mostra contagem absoluta
-        fig_parch_distribution.update_layout(
-            xaxis_title='Number of Parch', yaxis_title='Count')
-        st.plotly_chart(fig_parch_distribution)
+        charts.slot('parch_distribution')
 
         # Linha divisória
         st.markdown("""<hr style="border: 1px solid #ccc;"/>""",
@@ -114,11 +174,7 @@ def show_data_distribution():
         ### Age Distribution by Pclass
         This box plot displays the age distribution across different passenger classes. It shows the spread of ages within each class, providing insight into the age profile of passengers in each class.
         """)
-        fig_age_by_class = px.box(df, x='Pclass', y='Age', title='Age Distribution by Pclass',
-                                  color='Pclass',
-                                  color_discrete_map={1: '#004b87', 2: '#0073b7', 3: '#00a3e0'})  # Cores distintas para cada classe
-        fig_age_by_class.update_layout(xaxis_title='Pclass', yaxis_title='Age')
-        st.plotly_chart(fig_age_by_class)
+        charts.slot('age_by_class')
 
         # Linha divisória
         st.markdown("""<hr style="border: 1px solid #ccc;"/>""",
@@ -129,12 +185,7 @@ def show_data_distribution():
         ### Fare Distribution by Pclass
         This box plot shows the distribution of fare prices across different passenger classes. It highlights how fare prices vary between classes, reflecting the differences in ticket pricing.
         """)
-        fig_fare_by_class = px.box(df, x='Pclass', y='Fare', title='Fare Distribution by Pclass',
-                                   color='Pclass',
-                                   color_discrete_map={1: '#004b87', 2: '#0073b7', 3: '#00a3e0'})  # Cores distintas para cada classe
-        fig_fare_by_class.update_layout(
-            xaxis_title='Pclass', yaxis_title='Fare')
-        st.plotly_chart(fig_fare_by_class)
+        charts.slot('fare_by_class')
 
         # Linha divisória
         st.markdown("""<hr style="border: 1px solid #ccc;"/>""",
@@ -145,9 +196,8 @@ def show_data_distribution():
         ### Age Distribution by Gender
         This box plot illustrates the age distribution by gender. It provides insights into the age profile of male and female passengers.
         """)
-        fig_age_by_gender = px.box(df, x='Sex', y='Age', title='Age Distribution by Gender',
-                                   color='Sex',
-                                   color_discrete_map={'male': '#004b87', 'female': '#ff6f91'})  # Cores distintas para gênero
-        fig_age_by_gender.update_layout(
-            xaxis_title='Gender', yaxis_title='Age')
-        st.plotly_chart(fig_age_by_gender)
+        charts.slot('age_by_gender')
+
+    charts.fill()
+    if approximate:
+        show_refinement(view, 'data_distribution', FIGURES, level, binned)
@@ -0,0 +1,261 @@
+import hashlib
+import importlib.util
+import os
+import threading
+
+import numpy as np
+import streamlit as st
+import pandas as pd
+
+from instrumentation import span
+
+DATA_PATH = "Titanic-Dataset.csv"
+DROP_COLUMNS = ['PassengerId', 'Name', 'Ticket', 'Cabin']
+CACHE_DIR = ".cache"
+# Arquivos acima desse tamanho são lidos em blocos (streaming_loader)
+STREAMING_MIN_BYTES = 256 * 2 ** 20
+# Muda quando o esquema do frame limpo muda (invalida o cache em disco)
+SCHEMA_VERSION = 2
+
+# **Esquema compacto do frame limpo**
+# - categorias com dicionário fixo (valores inesperados são acrescentados no
+#   fim, em ordem), Pclass com categorias int8;
+# - Age (2 casas) e Fare (4 casas, < 10^4) cabem nos ~7 dígitos do float32;
+# - SibSp/Parch com a menor largura inteira que comporta os valores;
+# - Survived booleano (float32 se houver valores ausentes).
+CATEGORIES = {
+    'Sex': ['female', 'male'],
+    'Pclass': [1, 2, 3],
+    'Embarked': ['C', 'Q', 'S'],
+}
+FLOAT32_COLUMNS = ['Age', 'Fare']
+INTEGER_COLUMNS = ['SibSp', 'Parch']
+
+
+def category_dtype(col, observed=()):
+    expected = CATEGORIES[col]
+    extra = sorted(set(observed) - set(expected))
+    values = pd.Index(expected + extra)
+    if pd.api.types.is_integer_dtype(values):
+        values = values.astype(np.min_scalar_type(-max(abs(values.min()), abs(values.max()))))
+    return pd.CategoricalDtype(values)
+
+
+def _categories_of(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.categories
+    return series.dropna().unique()
+
+
+def compact(df):
+    for col in CATEGORIES:
+        if col in df.columns:
+            df[col] = df[col].astype(category_dtype(col, _categories_of(df[col])))
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+    for col in INTEGER_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+            if df[col].dtype.kind == 'f':
+                df[col] = df[col].astype('float32')
+    if 'Survived' in df.columns:
+        survived = df['Survived']
+        if survived.notna().all() and survived.isin([0, 1]).all():
+            df['Survived'] = survived.astype(bool)
+        else:
+            df['Survived'] = survived.astype('float32')
+    return df
+
+
+def clean_data(df):
+    # Convertendo colunas categóricas
+    df['Sex'] = df['Sex'].astype('category')
+    df['Pclass'] = df['Pclass'].astype('category')
+    df['Embarked'] = df['Embarked'].astype('category')
+
+    # Garantir tipo numérico e tratar valores faltantes
+    df['Survived'] = pd.to_numeric(df['Survived'], errors='coerce')
+    df['Age'] = df['Age'].fillna(df['Age'].median())
+    df['Embarked'] = df['Embarked'].fillna(df['Embarked'].mode()[0])
+
+    # Remover colunas não necessárias para a análise e compactar os dtypes
+    return compact(df.drop(columns=DROP_COLUMNS, errors='ignore'))
+
+
+def read_csv(path):
+    # Colunas descartadas pela limpeza nem chegam a ser tokenizadas
+    return pd.read_csv(path, usecols=lambda col: col not in DROP_COLUMNS)
+
+
+# **Cache colunar em disco (Feather/Arrow)**
+# O frame já limpo é salvo com os dtypes categóricos e relido via memory map
+# enquanto o CSV de origem não mudar.
+def path_digest(path):
+    # Identifica o arquivo pelo caminho absoluto (não só pelo nome)
+    return hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+
+
+def cache_prefix(path):
+    # Nome do arquivo + digest do caminho absoluto: arquivos com o mesmo nome
+    # em pastas diferentes têm caches (e limpezas) separados
+    return f"{os.path.basename(path)}.{path_digest(path)}."
+
+
+def _cache_path(path, mtime_ns, size):
+    key = hashlib.sha1(f"{path}:{mtime_ns}:{size}:{SCHEMA_VERSION}".encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{cache_prefix(path)}{key}.feather")
+
+
+def _read_cache(cache_path):
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        # split_blocks: colunas numéricas sem cópia, apontando para o arquivo
+        # mapeado (páginas compartilhadas entre sessões e processos)
+        return feather.read_table(cache_path, memory_map=True).to_pandas(split_blocks=True)
+    except Exception:
+        # Cache corrompido ou de outra versão: volta para o CSV
+        return None
+
+
+def _write_cache(df, cache_path, source_path):
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return
+    _store_cache(cache_path, source_path,
+                 lambda tmp_path: feather.write_feather(df, tmp_path, compression='uncompressed'))
+
+
+def _store_cache(cache_path, source_path, write):
+    # write(tmp_path) grava o arquivo; a troca para cache_path é atômica
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        write(tmp_path)
+        os.replace(tmp_path, cache_path)
+        # Versões antigas do mesmo arquivo não serão mais lidas
+        prefix = cache_prefix(source_path)
+        for name in os.listdir(CACHE_DIR):
+            stale = os.path.join(CACHE_DIR, name)
+            if name.startswith(prefix) and name.endswith('.feather') and stale != cache_path:
+                os.remove(stale)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_clean_data(path, mtime_ns, size):
+    cache_path = _cache_path(path, mtime_ns, size)
+    with span('load/feather_cache'):
+        df = _read_cache(cache_path)
+    if df is None and size >= STREAMING_MIN_BYTES and importlib.util.find_spec('pyarrow'):
+        # Arquivo grande: os blocos limpos vão direto para o cache Arrow, um
+        # lote por vez, e o frame é lido do arquivo mapeado. O to_pandas junta
+        # os lotes numa cópia: o pico fica em ~1 frame, sem a lista de blocos
+        # mais o concat
+        from streaming_loader import write_streaming
+        with span('load/streaming'):
+            _store_cache(cache_path, path, lambda tmp_path: write_streaming(path, tmp_path))
+        df = _read_cache(cache_path)
+    if df is None:
+        if size >= STREAMING_MIN_BYTES:
+            from streaming_loader import load_streaming
+            with span('load/streaming'):
+                df = load_streaming(path)
+        else:
+            with span('load/read_csv'):
+                df = read_csv(path)
+            with span('load/clean'):
+                df = clean_data(df)
+        with span('load/write_cache'):
+            _write_cache(df, cache_path, path)
+        # Relido do cache: o frame compartilhado fica no arquivo mapeado
+        # mesmo no primeiro carregamento
+        mapped = _read_cache(cache_path)
+        if mapped is not None:
+            df = mapped
+    return df
+
+
+# Um único DataFrame por versão do arquivo, compartilhado entre reruns e sessões.
+# mtime e tamanho fazem parte da chave para que edições no CSV invalidem o cache.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_cached(path, mtime_ns, size):
+    df = load_clean_data(path, mtime_ns, size)
+    guard_frame(df)
+    return df
+
+
+def load_data(path=DATA_PATH):
+    # O frame retornado é compartilhado: as abas não devem alterá-lo
+    # (check_unchanged verifica isso no fim de cada rerun)
+    stat = os.stat(path)
+    return _load_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+# **Estruturas derivadas por DataFrame carregado**
+# Cubos, índices e codificações são calculados uma vez por frame e guardados
+# no próprio objeto, sendo liberados junto com ele quando o cache do loader o
+# descarta (cópias do frame não herdam essas estruturas).
+_derived_lock = threading.Lock()
+
+
+def derived(df, name, build):
+    with _derived_lock:
+        cache = vars(df).setdefault('_derived_cache', {})
+        if name in cache:
+            return cache[name]
+    value = build(df)
+    with _derived_lock:
+        return cache.setdefault(name, value)
+
+
+# **Garantia de frame compartilhado intacto**
+# Com copy-on-write (pandas 3), o guarda manter referências às colunas faz
+# qualquer escrita no frame compartilhado copiar o bloco em vez de alterá-lo:
+# os dados originais nunca mudam e a troca de buffer denuncia a escrita.
+# check_unchanged compara colunas, dtypes, índice e a identidade dos buffers
+# (O(colunas), sem ler os dados).
+def _buffer(series):
+    if not isinstance(series.dtype, np.dtype):
+        return series.array
+    values = np.asarray(series)
+    while isinstance(values.base, np.ndarray):
+        values = values.base
+    return values
+
+
+class FrameGuard:
+    def __init__(self, df):
+        self.series = {col: df[col] for col in df.columns}
+        self.dtypes = df.dtypes.to_dict()
+        self.index = df.index
+        self.buffers = {col: id(_buffer(series)) for col, series in self.series.items()}
+
+    def changes(self, df):
+        changed = [col for col in df.columns if col not in self.series]
+        changed += [col for col in self.series if col not in df.columns]
+        changed += [col for col in self.series if col in df.columns and (
+            df[col].dtype != self.dtypes[col] or id(_buffer(df[col])) != self.buffers[col])]
+        if df.index is not self.index:
+            changed.append('<index>')
+        return changed
+
+
+def guard_frame(df):
+    return derived(df, 'frame_guard', FrameGuard)
+
+
+def check_unchanged(df):
+    changed = guard_frame(df).changes(df)
+    if changed:
+        # O frame em cache está corrompido: descarta para o próximo rerun recarregar
+        _load_cached.clear()
+        raise RuntimeError(f"The shared passenger frame was modified in place (columns: {changed}). "
+                           "Render functions must work on copies.")
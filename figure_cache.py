@@ -0,0 +1,113 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from data_loader import derived
+from instrumentation import span
+
+# **Cache de gráficos prontos**
+# Guarda o gráfico já serializado (JSON do Plotly; PNG para as figuras do
+# matplotlib, como o heatmap) com a chave = hash do conteúdo do frame (ou da
+# fatia filtrada) + nome do gráfico + parâmetros (modo agregado, intervalos,
+# colunas...). Repetir uma visão ou um estado de filtro não reconstrói nada:
+# o Plotly é reidratado a partir do JSON e o PNG vai direto para st.image.
+# LRU com limite de memória (FIGURE_CACHE_MB, padrão 64 MiB), compartilhado
+# entre as sessões do processo.
+MAX_CACHE_BYTES = int(os.environ.get('FIGURE_CACHE_MB', 64)) * 2 ** 20
+# Mesmos parâmetros do st.pyplot
+PNG_OPTIONS = {'format': 'png', 'dpi': 200, 'bbox_inches': 'tight'}
+
+
+class FigureCache:
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, kind, payload):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key)[1])
+            self._entries[key] = (kind, payload)
+            self.size += size
+            while self.size > self.max_bytes:
+                self.size -= len(self._entries.popitem(last=False)[1][1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_cache = FigureCache()
+
+
+def frame_hash(df):
+    # Hash do conteúdo (colunas, dtypes e valores), uma vez por frame
+    def build(df):
+        h = hashlib.sha1()
+        h.update(repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+
+    return derived(df, 'content_hash', build)
+
+
+def figure_key(df, name, *params):
+    return hashlib.sha1(repr((frame_hash(df), name, params)).encode()).hexdigest()
+
+
+def png_bytes(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **PNG_OPTIONS)
+    return buffer.getvalue()
+
+
+def cached_figure(key, build):
+    # Figura Plotly (reidratada do JSON) ou bytes PNG (matplotlib)
+    entry = _cache.get(key)
+    if entry is not None:
+        kind, payload = entry
+        if kind == 'png':
+            return payload
+        import plotly.io as pio
+
+        with span('figure_cache/load'):
+            return pio.from_json(payload, skip_invalid=True)
+
+    fig = build()
+    with span('figure_cache/store'):
+        if hasattr(fig, 'to_json'):
+            _cache.put(key, 'plotly', fig.to_json())
+            return fig
+        payload = png_bytes(fig)
+        _cache.put(key, 'png', payload)
+        return payload
+
+
+def cache_stats():
+    return {'entries': len(_cache), 'bytes': _cache.size, 'max_bytes': _cache.max_bytes,
+            'hits': _cache.hits, 'misses': _cache.misses}
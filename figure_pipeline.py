@@ -0,0 +1,94 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from instrumentation import current_rerun, use_rerun, span, plotly_chart, image
+from figure_cache import cached_figure, figure_key, frame_hash
+
+# **Construção concorrente dos gráficos de uma seção**
+# A seção declara os gráficos (FIGURES) e o pipeline começa a construir todos
+# eles no pool assim que é criado. O layout reserva um espaço com placeholder
+# para cada gráfico (slot) e, no fim da seção, fill() desenha cada um na
+# ordem em que ficam prontos: o primeiro aparece sem esperar o mais lento.
+# As tarefas herdam o contexto do script (session_state: intervalos, modo
+# agregado) e contam os spans no rerun que as pediu.
+# Cada gráfico passa pelo figure_cache: a chave é o hash do frame + seção,
+# nome, modo agregado e os parâmetros que a seção informa (params).
+MAX_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+PLACEHOLDER_HEIGHT = 450
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="figures")
+
+
+def _placeholder(height):
+    return f"""
+        <div style="height: {height}px; border-radius: 10px; background-color: #f0f0f0; display: flex; align-items: center; justify-content: center;">
+            <span style="color: #6c757d;">Loading chart...</span>
+        </div>
+    """
+
+
+def submit(build, *args, executor=_executor):
+    # Future de build(*args) no pool, com o contexto do script atual
+    ctx = get_script_run_ctx()
+    rerun = current_rerun()
+
+    def run():
+        thread = threading.current_thread()
+        add_script_run_ctx(thread, ctx)
+        try:
+            with use_rerun(rerun):
+                return build(*args)
+        finally:
+            add_script_run_ctx(thread, None)
+
+    return executor.submit(run)
+
+
+def wait_for(future, message):
+    # Placeholder enquanto o cálculo roda em background; o fragmento consulta
+    # o Future a cada segundo e recarrega a página quando termina
+    @st.fragment(run_every=1.0)
+    def poll():
+        if future.done():
+            st.rerun()
+        st.info(message)
+
+    poll()
+
+
+def _build(build, df, binned):
+    return lambda: build(df, binned)
+
+
+class FigurePipeline:
+    def __init__(self, section, figures, df, binned=False, params=(), names=None):
+        # O hash do frame é calculado aqui, uma vez, e não em cada tarefa
+        frame_hash(df)
+        self.futures = {name: submit(cached_figure,
+                                     figure_key(df, f"{section}.{name}", binned, *params),
+                                     _build(figures[name], df, binned))
+                        for name in names or figures}
+        self.slots = {}
+
+    def slot(self, name, height=PLACEHOLDER_HEIGHT, **kwargs):
+        # Reserva o lugar do gráfico no layout atual (coluna, container...)
+        placeholder = st.empty()
+        placeholder.markdown(_placeholder(height), unsafe_allow_html=True)
+        self.slots[name] = (placeholder, kwargs)
+
+    def fill(self):
+        # Desenha os gráficos reservados conforme ficam prontos
+        pending = {self.futures[name]: name for name in self.slots}
+        with span('figures/wait'):
+            for future in as_completed(pending):
+                name = pending[future]
+                placeholder, kwargs = self.slots.pop(name)
+                fig = future.result()
+                # PNG (heatmap do matplotlib) ou figura Plotly
+                render = image if isinstance(fig, bytes) else plotly_chart
+                render(name, fig, target=placeholder, **kwargs)
+
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_loader import derived, guard_frame
+from query_backend import is_query
+
+CATEGORY_COLUMNS = ['Pclass', 'Sex', 'Embarked']
+RANGE_COLUMNS = ['Age', 'Fare']
+
+
+class PassengerView:
+    # Subconjunto filtrado do DataFrame compartilhado. positions=None
+    # significa "todas as linhas" e evita qualquer cópia.
+    def __init__(self, df, positions=None):
+        self.df = df
+        self.positions = positions
+        self._frame = None
+
+    def __len__(self):
+        return len(self.df) if self.positions is None else len(self.positions)
+
+    @property
+    def frame(self):
+        if self.positions is None:
+            return self.df
+        if self._frame is None:
+            # Também compartilhado (cache de views do índice): mesmo guarda do frame completo
+            frame = self.df.take(self.positions)
+            guard_frame(frame)
+            self._frame = frame
+        return self._frame
+
+
+class PassengerIndex:
+    # Índices construídos uma vez por DataFrame carregado:
+    # - para cada valor categórico, as posições (ordenadas) das linhas;
+    # - para Age e Fare, a ordem das linhas por valor (busca binária nos intervalos).
+    def __init__(self, df, max_views=16):
+        self.df = df
+        self.categories = {col: _positions_by_category(df[col])
+                           for col in CATEGORY_COLUMNS}
+        self.ranges = {}
+        for col in RANGE_COLUMNS:
+            values = df[col].to_numpy(dtype=float, na_value=np.nan)
+            order = np.argsort(values, kind='stable')
+            # O argsort põe os NaN no fim: só os primeiros `valid` são buscáveis
+            valid = np.count_nonzero(~np.isnan(values))
+            self.ranges[col] = (order, values[order], valid)
+        self._views = OrderedDict()
+        self._max_views = max_views
+
+    def bounds(self, col):
+        _, sorted_values, valid = self.ranges[col]
+        return float(sorted_values[0]), float(sorted_values[valid - 1])
+
+    def select(self, **filters):
+        # filters: coluna categórica -> valores aceitos, ou
+        # coluna numérica -> (mínimo, máximo) inclusivo.
+        # Retorna as posições selecionadas (ordenadas) ou None para todas.
+        selections = []
+        for col, wanted in filters.items():
+            if col in self.categories:
+                by_value = self.categories[col]
+                wanted = [value for value in wanted if value in by_value]
+                if len(wanted) == len(by_value):
+                    continue
+                parts = [by_value[value] for value in wanted]
+                selections.append(np.sort(np.concatenate(parts)) if parts
+                                  else np.empty(0, dtype=np.int64))
+            elif col in self.ranges:
+                order, sorted_values, valid = self.ranges[col]
+                low, high = wanted
+                start = np.searchsorted(sorted_values[:valid], low, side='left')
+                stop = np.searchsorted(sorted_values[:valid], high, side='right')
+                # Intervalo cobrindo todos os valores = sem filtro (mantém os
+                # ausentes); ausentes só saem quando o intervalo é estreitado
+                if start == 0 and stop == valid:
+                    continue
+                selections.append(np.sort(order[start:stop]))
+            else:
+                raise KeyError(f"No index for column '{col}'")
+
+        if not selections:
+            return None
+        # Interseção a partir da menor lista: custo proporcional às linhas selecionadas
+        selections.sort(key=len)
+        positions = selections[0]
+        for other in selections[1:]:
+            if not len(positions):
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def view(self, **filters):
+        key = tuple(sorted((col, tuple(sorted(value))) for col, value in filters.items()))
+        if key in self._views:
+            self._views.move_to_end(key)
+            return self._views[key]
+        view = PassengerView(self.df, self.select(**filters))
+        self._views[key] = view
+        if len(self._views) > self._max_views:
+            self._views.popitem(last=False)
+        return view
+
+
+def _positions_by_category(series):
+    categorical = pd.Categorical(series)
+    codes, categories = categorical.codes, categorical.categories
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    start = np.count_nonzero(codes < 0)
+    positions = {}
+    for category, count in zip(categories, counts):
+        positions[category] = order[start:start + count]
+        start += count
+    return positions
+
+
+def get_index(df):
+    return derived(df, 'passenger_index', PassengerIndex)
+
+
+def as_view(data):
+    # As seções aceitam um PassengerView, um DataFrame cru ou um QueryView
+    # (backend SQL), que já faz o papel da visão
+    if isinstance(data, PassengerView) or is_query(data):
+        return data
+    return PassengerView(data)
@@ -0,0 +1,76 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# **Relatório de custo de import por módulo**
+# Roda `python -X importtime` em um processo novo para cada módulo do app,
+# com streamlit e pandas já importados (eles são pagos por qualquer página),
+# e mostra o custo incremental de cada módulo e os pacotes mais pesados que
+# ele puxa.
+#
+#   python import_report.py
+#   python import_report.py --baseline '' --top 5 --json
+APP_MODULES = [
+    'data_loader', 'query_backend', 'filters', 'aggregates', 'overview', 'binned_charts',
+    'data_distribution', 'survival_analytics', 'additional_insights',
+    'model_cache', 'importance', 'correlation_analyses',
+]
+# Bibliotecas carregadas sob demanda pelas seções
+DEFERRED_MODULES = ['seaborn', 'matplotlib.figure', 'sklearn.ensemble', 'scipy.stats']
+DEFAULT_BASELINE = ['streamlit', 'pandas']
+
+
+def import_times(module, baseline):
+    # Retorna {módulo importado: (self_us, cumulative_us)} do import de `module`
+    setup = "".join(f"import {name}; " for name in baseline)
+    code = f"{setup}import sys; sys.stderr.write('--mark--\\n'); import {module}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    lines = result.stderr.split('--mark--\n', 1)[-1].splitlines()
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def module_report(module, baseline, top):
+    times = import_times(module, baseline)
+    total = times.get(module, (0, 0))[1]
+    # Pacotes de nível mais alto (sem ponto no nome), exceto o próprio módulo
+    packages = sorted(((name, cumulative) for name, (_, cumulative) in times.items()
+                       if '.' not in name and name != module and not name.startswith('_')),
+                      key=lambda item: item[1], reverse=True)
+    return {'module': module, 'cumulative_ms': total / 1000,
+            'heaviest': [{'package': name, 'cumulative_ms': us / 1000}
+                         for name, us in packages[:top]]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the import cost of each app module.")
+    parser.add_argument('modules', nargs='*', default=APP_MODULES + DEFERRED_MODULES)
+    parser.add_argument('--baseline', nargs='*', default=DEFAULT_BASELINE,
+                        help="modules imported before measuring (already paid by every page)")
+    parser.add_argument('--top', type=int, default=3, help="heaviest packages listed per module")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    reports = [module_report(module, [b for b in args.baseline if b], args.top)
+               for module in args.modules]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"Incremental import cost after: {', '.join(args.baseline) or '(nothing)'}")
+    for report in sorted(reports, key=lambda r: r['cumulative_ms'], reverse=True):
+        heaviest = ", ".join(f"{h['package']} {h['cumulative_ms']:.0f} ms" for h in report['heaviest'])
+        print(f"{report['module']:<24} {report['cumulative_ms']:>9.1f} ms   {heaviest}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import model_cache
+from data_loader import derived
+from instrumentation import span
+from query_backend import is_query
+
+# **Importância das features com modelos intercambiáveis**
+# Cada backend é (fábrica, hiperparâmetros); o modelo é treinado em 75% das
+# linhas (separação fixa por frame) e guardado pelo model_cache.
+# - Random Forest: importância por impureza (feature_importances_), que
+#   favorece colunas com muitos valores distintos (Age, Fare);
+# - Gradient Boosting (HistGradientBoostingClassifier): agrupa as colunas em
+#   até 255 faixas antes de treinar, então escala para milhões de linhas, e
+#   trata Sex/Embarked como categorias e valores ausentes nativamente.
+# A importância por permutação é a queda de acurácia nas linhas separadas
+# quando uma coluna é embaralhada. Cada par (feature, repetição) é uma tarefa
+# com semente própria (SeedSequence.spawn) em um pool de threads (a predição
+# do sklearn libera o GIL), e o resultado fica em cache pelo fingerprint do
+# modelo, em memória e em disco.
+FEATURE_COLUMNS = ['Age', 'Fare', 'Pclass', 'Sex', 'Embarked']
+CATEGORICAL_FEATURES = ['Sex', 'Embarked']
+IMPORTANCE_METHODS = ['Permutation', 'Impurity']
+HOLDOUT_FRACTION = 0.25
+N_REPEATS = 5
+# Linhas separadas usadas na permutação (amostra acima disso)
+MAX_PERMUTATION_ROWS = 10_000
+SEED = 42
+
+_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="permutation")
+
+
+def random_forest(**params):
+    from sklearn.ensemble import RandomForestClassifier
+
+    return RandomForestClassifier(n_jobs=-1, **params)
+
+
+def hist_gradient_boosting(**params):
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    return HistGradientBoostingClassifier(categorical_features=CATEGORICAL_FEATURES, **params)
+
+
+MODEL_BACKENDS = {
+    'Random Forest': (random_forest, {'n_estimators': 100, 'random_state': SEED}),
+    'Gradient Boosting': (hist_gradient_boosting, {'max_iter': 200, 'learning_rate': 0.1,
+                                                   'random_state': SEED}),
+}
+
+
+def supports_impurity(backend):
+    return backend == 'Random Forest'
+
+
+def importance_settings(settings=None):
+    # (backend, método) escolhidos na seção (ou em settings, fora do Streamlit);
+    # o Gradient Boosting só tem permutação
+    settings = st.session_state if settings is None else settings
+    backend = settings.get('importance_model', 'Random Forest')
+    method = settings.get('importance_method', 'Permutation')
+    if not supports_impurity(backend):
+        method = 'Permutation'
+    return backend, method
+
+
+# Sex e Embarked viram os códigos das categorias (dicionário fixo do esquema,
+# int8; -1 = ausente). O frame codificado reaproveita as demais colunas sem
+# cópia (copy-on-write) e é calculado uma vez por frame compartilhado.
+def _encode_features(df):
+    return df.assign(Sex=df['Sex'].cat.codes, Embarked=df['Embarked'].cat.codes)
+
+
+def encode_features(df):
+    return derived(df, 'encoded_features', _encode_features)
+
+
+def _holdout(df):
+    return np.random.default_rng(SEED).random(len(df)) < HOLDOUT_FRACTION
+
+
+def split(df):
+    # (X_train, y_train, X_test, y_test), fixo para o frame
+    def build(df):
+        encoded = encode_features(df)
+        holdout = _holdout(df)
+        X, y = encoded[FEATURE_COLUMNS], encoded['Survived']
+        return X[~holdout], y[~holdout], X[holdout], y[holdout]
+
+    return derived(df, 'importance_split', build)
+
+
+def model_key(df, backend):
+    # Fingerprint dos dados de treino + hiperparâmetros, guardado junto do frame
+    def build(df):
+        X, y = split(df)[:2]
+        return model_cache.fingerprint(X, y, {'backend': backend, **MODEL_BACKENDS[backend][1]})
+
+    return derived(df, f'model_fingerprint/{backend}', build)
+
+
+def training_frame(df):
+    # Backend SQL: os modelos treinam numa amostra trazida do banco
+    return df.sample_frame() if is_query(df) else df
+
+
+def train_model(df, backend='Random Forest'):
+    # Future com o modelo (treino em background, todos os núcleos)
+    factory, params = MODEL_BACKENDS[backend]
+    df = training_frame(df)
+    X, y = split(df)[:2]
+    return model_cache.train_async(factory, X, y, params, key=model_key(df, backend))
+
+
+# **Importância por permutação**
+def _accuracy(model, X, y):
+    return float(np.mean(model.predict(X) == y))
+
+
+def permutation_importance(model, X, y, n_repeats=N_REPEATS, seed=SEED,
+                           max_rows=MAX_PERMUTATION_ROWS):
+    # Tabela Feature/Importance/Std: queda média de acurácia por feature
+    if len(X) > max_rows:
+        rows = np.sort(np.random.default_rng(seed).choice(len(X), max_rows, replace=False))
+        X, y = X.iloc[rows], y.iloc[rows]
+    X = X.reset_index(drop=True)
+    y = np.asarray(y)
+    baseline = _accuracy(model, X, y)
+    columns = list(X.columns)
+    tasks = [column for column in columns for _ in range(n_repeats)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    def score(column, seed):
+        order = np.random.default_rng(seed).permutation(len(X))
+        return baseline - _accuracy(model, X.assign(**{column: X[column].to_numpy()[order]}), y)
+
+    drops = np.array(list(_executor.map(score, tasks, seeds))).reshape(len(columns), n_repeats)
+    return pd.DataFrame({'Feature': columns, 'Importance': drops.mean(axis=1),
+                         'Std': drops.std(axis=1)})
+
+
+def permutation_importance_async(df, backend, model):
+    # Future com a tabela; `model` já treinado (não espera o treino no worker)
+    df = training_frame(df)
+    X_test, y_test = split(df)[2:]
+    key = hashlib.sha1(f"{model_key(df, backend)}/permutation/{N_REPEATS}/{MAX_PERMUTATION_ROWS}"
+                       .encode()).hexdigest()[:20]
+
+    def compute():
+        with span('importance/permutation'):
+            return permutation_importance(model, X_test, y_test)
+
+    return model_cache.cached_async(key, compute, name='importance')
+
+
+def impurity_importance(model):
+    return pd.DataFrame({'Feature': FEATURE_COLUMNS, 'Importance': model.feature_importances_,
+                         'Std': np.nan})
+
+
+def feature_importances(df, backend='Random Forest', method='Permutation'):
+    # Versão bloqueante (relatórios, benchmark), ordenada para o gráfico
+    model = train_model(df, backend).result()
+    if method == 'Impurity':
+        table = impurity_importance(model)
+    else:
+        table = permutation_importance_async(df, backend, model).result()
+    return table.sort_values(by='Importance', ascending=True)
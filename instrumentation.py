@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+# **Instrumentação dos caminhos quentes**
+# span(name) mede tempo de parede, tempo de CPU e pico de memória (tracemalloc)
+# de um trecho. Os spans de um rerun ficam na thread do script e aparecem no
+# painel de desenvolvedor; spans de threads em segundo plano (treino do modelo,
+# prefetch) ficam em uma fila separada, exceto os de tarefas ligadas ao rerun
+# com use_rerun() (ex.: gráficos construídos no pool de figure_pipeline). Com DASHBOARD_TRACE=arquivo.jsonl cada
+# span também é gravado no arquivo, um JSON por linha.
+#
+# Desligado (sem painel e sem DASHBOARD_TRACE), span() não mede nada.
+#
+# O tracemalloc é global ao processo: fica ligado enquanto alguma sessão
+# estiver com o painel aberto (contagem por sessão, com expiração das que
+# sumirem), e os picos de memória são do processo inteiro durante o span,
+# incluindo o que outras threads e sessões alocaram no mesmo intervalo.
+TRACE_PATH = os.environ.get('DASHBOARD_TRACE')
+BACKGROUND_SPANS = 200
+# Sessão com o painel aberto que não roda há esse tempo deixa de contar
+PANEL_IDLE_SECONDS = 900
+
+_local = threading.local()
+_background = deque(maxlen=BACKGROUND_SPANS)
+_write_lock = threading.Lock()
+# Sessões com o painel aberto -> último rerun (time.monotonic)
+_panel_sessions = {}
+_panel_lock = threading.Lock()
+# Spans abertos que medem memória, de todas as threads
+_memory_frames = {}
+_memory_lock = threading.Lock()
+
+
+class Rerun:
+    def __init__(self, panel=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.panel = panel
+        self.started = time.perf_counter()
+        self.timestamp = time.time()
+        self.thread = threading.current_thread().name
+        self.spans = []
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _tracing():
+    # Spans fora de um rerun (threads em segundo plano) são guardados se
+    # houver arquivo de trace ou algum painel aberto
+    return bool(TRACE_PATH) or bool(_panel_sessions)
+
+
+def start_rerun(enabled):
+    # Chamado no início do script. O painel vale só para a sessão que o
+    # ligou; o tracemalloc (global, deixa as alocações mais lentas) fica
+    # ligado enquanto ao menos uma sessão estiver com o painel aberto
+    now = time.monotonic()
+    with _panel_lock:
+        if enabled:
+            _panel_sessions[_session_id()] = now
+        else:
+            _panel_sessions.pop(_session_id(), None)
+        for session, seen in list(_panel_sessions.items()):
+            if now - seen > PANEL_IDLE_SECONDS:
+                del _panel_sessions[session]
+        with _memory_lock:
+            if _panel_sessions and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            elif not _panel_sessions and tracemalloc.is_tracing():
+                tracemalloc.stop()
+    _local.rerun = Rerun(enabled) if enabled or TRACE_PATH else None
+    return _local.rerun
+
+
+def current_rerun():
+    return getattr(_local, 'rerun', None)
+
+
+@contextmanager
+def use_rerun(rerun):
+    # Spans de uma thread de trabalho contados no rerun que pediu a tarefa
+    previous = current_rerun()
+    _local.rerun = rerun
+    try:
+        yield
+    finally:
+        _local.rerun = previous
+
+
+def _export(record):
+    if not TRACE_PATH:
+        return
+    with _write_lock:
+        with open(TRACE_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+def _collect_peak():
+    # Pico desde o último reset_peak() repassado a todos os spans abertos
+    # (de qualquer thread) antes de zerar o contador: nenhum span perde o
+    # pico de outro reset nem herda o de antes de começar
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in _memory_frames.values():
+        frame['peak'] = max(frame['peak'], peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+@contextmanager
+def span(name):
+    rerun = current_rerun()
+    if rerun is None and not _tracing():
+        yield
+        return
+
+    # Pilha por thread: spans de threads diferentes do mesmo rerun não se aninham
+    stack = vars(_local).setdefault('stack', [])
+    memory = tracemalloc.is_tracing()
+    frame = {'name': name, 'peak': 0}
+    if memory:
+        with _memory_lock:
+            frame['start_memory'] = frame['peak'] = _collect_peak()
+            _memory_frames[id(frame)] = frame
+    parent = stack[-1]['name'] if stack else None
+    stack.append(frame)
+    start_wall = time.perf_counter()
+    # process_time inclui as threads de trabalho (ex.: n_jobs do Random Forest)
+    start_cpu = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+        stack.pop()
+        peak_bytes = None
+        if memory:
+            with _memory_lock:
+                if tracemalloc.is_tracing():
+                    _collect_peak()
+                    peak_bytes = frame['peak'] - frame['start_memory']
+                del _memory_frames[id(frame)]
+        record = {
+            'rerun': rerun.id if rerun is not None else None,
+            'name': name,
+            'parent': parent,
+            'depth': len(stack),
+            'thread': threading.current_thread().name,
+            'start_ms': (start_wall - rerun.started) * 1000 if rerun is not None else None,
+            'timestamp': time.time() - wall,
+            'wall_ms': wall * 1000,
+            'cpu_ms': cpu * 1000,
+            'peak_bytes': peak_bytes,
+        }
+        if rerun is not None:
+            rerun.spans.append(record)
+        else:
+            _background.append(record)
+        _export(record)
+
+
+def timed(name):
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+def timed_figures(section, figures):
+    # FIGURES de uma seção com cada construção medida como figure/<seção>.<nome>
+    return {name: timed(f"figure/{section}.{name}")(build) for name, build in figures.items()}
+
+
+# **Renderização medida (inclui a serialização do Plotly/matplotlib)**
+# target: onde desenhar (st, uma coluna ou um st.empty() reservado antes)
+def plotly_chart(name, fig, target=st, **kwargs):
+    with span(f"render/{name}"):
+        return target.plotly_chart(fig, **kwargs)
+
+
+def pyplot(name, fig, target=st, **kwargs):
+    with span(f"render/{name}"):
+        return target.pyplot(fig, **kwargs)
+
+
+def image(name, data, target=st, **kwargs):
+    with span(f"render/{name}"):
+        return target.image(data, **kwargs)
+
+
+# **Exportação e painel de desenvolvedor**
+def chrome_trace(spans):
+    # Formato "Trace Event" (chrome://tracing, Perfetto)
+    events = [{'name': s['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': s['thread'],
+               'ts': s['timestamp'] * 1e6, 'dur': s['wall_ms'] * 1000,
+               'args': {'cpu_ms': s['cpu_ms'], 'peak_bytes': s['peak_bytes']}}
+              for s in spans]
+    return json.dumps({'traceEvents': events})
+
+
+def _span_table(spans):
+    import pandas as pd
+
+    rows = [{'Span': ' ' * s['depth'] + s['name'],
+             'Wall (ms)': round(s['wall_ms'], 1),
+             'CPU (ms)': round(s['cpu_ms'], 1),
+             'Peak memory (MiB)': None if s['peak_bytes'] is None else round(s['peak_bytes'] / 2 ** 20, 2),
+             'Thread': s['thread']}
+            for s in sorted(spans, key=lambda s: s['timestamp'])]
+    return pd.DataFrame(rows)
+
+
+def show_panel(rerun=None):
+    rerun = rerun or current_rerun()
+    if rerun is None:
+        return
+    total_ms = (time.perf_counter() - rerun.started) * 1000
+    with st.expander(f"Developer panel — rerun {rerun.id} ({total_ms:.0f} ms)", expanded=True):
+        top_level = [s for s in rerun.spans if s['depth'] == 0 and s['thread'] == rerun.thread]
+        slowest = sorted(top_level, key=lambda s: s['wall_ms'], reverse=True)[:3]
+        st.write("Slowest stages: " + ", ".join(f"`{s['name']}` {s['wall_ms']:.0f} ms" for s in slowest))
+        st.dataframe(_span_table(rerun.spans), use_container_width=True, hide_index=True)
+        st.caption("Peak memory is process-wide: it includes allocations made by other threads "
+                   "and sessions while the stage was running.")
+        # figure_cache importa este módulo: import local
+        from figure_cache import cache_stats
+
+        stats = cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        st.caption(f"Figure cache: {stats['entries']} figures, {stats['bytes'] / 2 ** 20:.1f} of "
+                   f"{stats['max_bytes'] / 2 ** 20:.0f} MiB, {stats['hits']} hits / {lookups} lookups "
+                   "(all sessions).")
+        if _background:
+            st.write("Background threads (latest spans)")
+            st.dataframe(_span_table(list(_background)), use_container_width=True, hide_index=True)
+        st.download_button("Download trace (Chrome trace format)",
+                           chrome_trace(rerun.spans + list(_background)),
+                           file_name=f"trace_{rerun.id}.json", mime="application/json")
+        if TRACE_PATH:
+            st.caption(f"Spans are also appended to {TRACE_PATH}")
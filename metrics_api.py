@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from data_loader import DATA_PATH, load_clean_data
+from filters import get_index, CATEGORY_COLUMNS, RANGE_COLUMNS
+from aggregates import DIMENSIONS, get_cube, average_age
+from confidence import INTERVAL_METHODS, survival_rate_intervals
+from overview import overview_metrics
+
+# **API local de métricas (JSON) sem sessão do Streamlit**
+# Mesmo carregamento/limpeza (cache Feather), índice de filtros e cubo de
+# agregados do dashboard, expostos por HTTP:
+#   GET /api/overview                            KPIs da aba Overview
+#   GET /api/survival?by=Pclass,Sex&intervals=Wilson
+#   GET /api/average_age?by=Pclass
+#   GET /api/health
+# Filtros opcionais em qualquer rota: Sex=female&Pclass=1,2&Age=10,40
+# (listas também repetindo o parâmetro: Pclass=1&Pclass=2)
+#
+# Cada resposta fica em cache (LRU) pela versão do arquivo + rota + parâmetros,
+# já serializada e com ETag: uma repetição custa um os.stat e um dict lookup,
+# e If-None-Match devolve 304 sem corpo. HTTP/1.1 mantém a conexão aberta.
+#
+#   python metrics_api.py --port 8502
+MAX_CACHED_RESPONSES = 1024
+LIST_PARAMS = ['by'] + CATEGORY_COLUMNS
+KNOWN_PARAMS = LIST_PARAMS + RANGE_COLUMNS + ['intervals']
+
+
+class MetricsData:
+    # Frame limpo da versão atual do arquivo (recarregado se o CSV mudar)
+    def __init__(self, path=DATA_PATH):
+        self.path = path
+        self.version = None
+        self.df = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        stat = os.stat(self.path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if version != self.version:
+                self.df = load_clean_data(os.path.abspath(self.path), *version)
+                self.version = version
+            return self.version, self.df
+
+
+def parse_filters(df, params):
+    index = get_index(df)
+    filters = {}
+    for col in CATEGORY_COLUMNS:
+        if col in params:
+            by_text = {str(value): value for value in index.categories[col]}
+            wanted = params[col].split(',') if params[col] else []
+            unknown = [value for value in wanted if value not in by_text]
+            if unknown:
+                raise ValueError(f"unknown {col} value(s): {', '.join(unknown)}")
+            filters[col] = [by_text[value] for value in wanted]
+    for col in RANGE_COLUMNS:
+        if col in params:
+            filters[col] = parse_range(col, params[col])
+    return index.view(**filters).frame, filters
+
+
+def parse_range(col, text):
+    # "mínimo,máximo": dois números, com mínimo <= máximo
+    message = f"{col} must be two comma-separated numbers, e.g. {col}=10,40"
+    parts = text.split(',')
+    if len(parts) != 2:
+        raise ValueError(message)
+    try:
+        low, high = float(parts[0]), float(parts[1])
+    except ValueError:
+        raise ValueError(message) from None
+    if np.isnan(low) or np.isnan(high):
+        raise ValueError(message)
+    if low > high:
+        raise ValueError(f"{col} range is empty: {low:g} is greater than {high:g}")
+    return low, high
+
+
+def parse_params(query):
+    # Parâmetros de lista (by e filtros categóricos) repetidos são somados
+    # (Pclass=1&Pclass=2 = Pclass=1,2); os demais não podem se repetir.
+    # Nomes desconhecidos (Pclas=1) são erro, não um filtro ignorado
+    params = {}
+    for name, values in parse_qs(query, keep_blank_values=True).items():
+        if name not in KNOWN_PARAMS:
+            raise ValueError(f"unknown parameter '{name}'; use {', '.join(KNOWN_PARAMS)}")
+        if len(values) > 1 and name not in LIST_PARAMS:
+            raise ValueError(f"parameter '{name}' given more than once")
+        params[name] = ','.join(value for value in values if value)
+    return params
+
+
+def _dims(params):
+    dims = [dim for dim in params.get('by', '').split(',') if dim]
+    unknown = [dim for dim in dims if dim not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"unknown dimension(s): {', '.join(unknown)}; use {', '.join(DIMENSIONS)}")
+    return dims
+
+
+def _records(table):
+    # NaN -> null; tipos do NumPy viram tipos do Python no json.dumps
+    return table.astype(object).where(table.notna(), None).to_dict('records')
+
+
+# **Rotas: parâmetros -> objeto JSON**
+def overview(df, params):
+    return overview_metrics(df)
+
+
+def survival(df, params):
+    method = params.get('intervals', 'Wilson')
+    if method not in INTERVAL_METHODS:
+        raise ValueError(f"intervals must be one of {', '.join(INTERVAL_METHODS)}")
+    table = survival_rate_intervals(get_cube(df), _dims(params), method)
+    return {'intervals': method, 'rows': _records(table)}
+
+
+def average_ages(df, params):
+    return {'rows': _records(average_age(get_cube(df), _dims(params)))}
+
+
+ROUTES = {
+    '/api/overview': overview,
+    '/api/survival': survival,
+    '/api/average_age': average_ages,
+}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ResponseCache:
+    def __init__(self, max_entries=MAX_CACHED_RESPONSES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class MetricsService:
+    def __init__(self, path=DATA_PATH):
+        self.data = MetricsData(path)
+        self.cache = ResponseCache()
+
+    def respond(self, target):
+        # (status, ETag, corpo em bytes)
+        url = urlsplit(target)
+        if url.path == '/api/health':
+            version = self.data.current()[0]
+            return 200, None, json.dumps({'status': 'ok', 'version': list(version)}).encode()
+        route = ROUTES.get(url.path)
+        if route is None:
+            return 404, None, json.dumps({'error': f"unknown path {url.path}",
+                                          'paths': sorted(ROUTES)}).encode()
+
+        try:
+            params = parse_params(url.query)
+        except ValueError as error:
+            return 400, None, json.dumps({'error': str(error)}).encode()
+        version, df = self.data.current()
+        key = (version, url.path, tuple(sorted(params.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            frame, filters = parse_filters(df, params)
+            # Sem passageiros no filtro: só a contagem (zero)
+            payload = route(frame, params) if len(frame) else {}
+        except ValueError as error:
+            return 400, None, json.dumps({'error': str(error)}).encode()
+        body = json.dumps({'filters': filters, 'passengers': len(frame), **payload},
+                          default=_json_default).encode()
+        entry = (200, '"' + hashlib.sha1(body).hexdigest()[:20] + '"', body)
+        self.cache.put(key, entry)
+        return entry
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    service = None
+    verbose = False
+
+    def do_GET(self):
+        status, etag, body = self.service.respond(self.path)
+        if etag is not None and etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8502, path=DATA_PATH, verbose=False):
+    handler = type('Handler', (MetricsHandler,), {'service': MetricsService(path), 'verbose': verbose})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard metrics as JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--path', default=DATA_PATH, help="passenger CSV")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.path, args.verbose)
+    # Carrega os dados antes de aceitar conexões
+    server.RequestHandlerClass.service.data.current()
+    print(f"Serving metrics on http://{args.host}:{server.server_port}/api/overview")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
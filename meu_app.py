@@ -1,154 +1,151 @@
+import importlib
+import threading
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from data_distribution import show_data_distribution
-from survival_analytics import show_survival_analytics
-from correlation_analyses import show_correlation_analyses
-from additional_insights import show_additional_insights
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+from data_loader import load_data, check_unchanged
+from filters import get_index
+from query_backend import BACKEND, SOURCE_PATH, open_source
+from instrumentation import start_rerun, span, show_panel
+from confidence import INTERVAL_METHODS
+
+# Spans deste rerun (painel de desenvolvedor, ver instrumentation.py)
+rerun = start_rerun(st.session_state.get("dev_panel", False))
 
 # **1. Carregar e Limpar os Dados**
-df = pd.read_csv("Titanic-Dataset.csv")
-df['Sex'] = df['Sex'].astype('category')
-df['Pclass'] = df['Pclass'].astype('category')
-df['Embarked'] = df['Embarked'].astype('category')
-df['Survived'] = pd.to_numeric(df['Survived'], errors='coerce')
-df['Age'].fillna(df['Age'].median(), inplace=True)
-df['Embarked'].fillna(df['Embarked'].mode()[0], inplace=True)
-df.drop(columns=['PassengerId', 'Name', 'Ticket', 'Cabin'], inplace=True)
-
-# **2. Cálculo das Métricas**
-total_passengers = df.shape[0]
-total_survivors = df['Survived'].sum()
-total_non_survivors = total_passengers - total_survivors
-total_female_passengers = df[df['Sex'] == 'female'].shape[0]
-total_male_passengers = df[df['Sex'] == 'male'].shape[0]
-average_age = df['Age'].mean()
-
-# **3. Configurar a Página**
+# Backend pandas (padrão): frame limpo em memória. Com DASHBOARD_BACKEND=duckdb
+# os dados ficam no banco e as seções recebem consultas (query_backend.py)
+@st.cache_resource(show_spinner=False)
+def get_source(backend, path):
+    return open_source(backend, path)
+
+
+if BACKEND == "pandas":
+    with span("load_data"):
+        df = load_data()
+    with span("index"):
+        index = get_index(df)
+else:
+    with span("load_data"):
+        df = None
+        index = get_source(BACKEND, SOURCE_PATH)
+
+# **2. Configurar a Página**
 st.set_page_config(page_title="Titanic Dashboard", layout="wide")
 
-# **4. Criar Abas com st.tabs**
-tabs = st.tabs([
-    "Start Here",
-    "Overview",
-    "Data Distribution",
-    "Survival Analytics",
-    "Correlation Analyses",
-    "Additional Insights"
-])
-
-# Aba "Start Here"
-with tabs[0]:
-    st.title('Welcome to the Titanic Dashboard')
-    
-    st.write("""
-    ### Start Here
-    Welcome to our Titanic dataset analysis. This dashboard provides an in-depth overview of the Titanic passengers, including their survival rates, demographics, and class distribution.
-    Here, you will find various visualizations and metrics to help you understand the dataset better. Start by exploring the "Overview" section for key insights and statistics.
-    """)
-    st.image("titanic.jpeg", caption='Titanic Ship', use_column_width=True)
-
-# Aba "Overview"
-with tabs[1]:
-    st.title('Titanic Dashboard - Overview')
-    with st.container():
-        st.subheader("Key Metrics")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown(f"""
-                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
-                    <h4 style="margin: 0; color: #333;">Total Passengers</h4>
-                    <h3 style="margin: 5px 0 0; color: #0073b7;">{total_passengers}</h3>
-                </div>
-            """, unsafe_allow_html=True)
-        with col2:
-            st.markdown(f"""
-                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
-                    <h4 style="margin: 0; color: #333;">Total Survivors</h4>
-                    <h3 style="margin: 5px 0 0; color: #28a745;">{total_survivors}</h3>
-                </div>
-            """, unsafe_allow_html=True)
-        with col3:
-            st.markdown(f"""
-                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
-                    <h4 style="margin: 0; color: #333;">Total Non-Survivors</h4>
-                    <h3 style="margin: 5px 0 0; color: #dc3545;">{total_non_survivors}</h3>
-                </div>
-            """, unsafe_allow_html=True)
-
-        col4, col5, col6 = st.columns(3)
-        with col4:
-            st.markdown(f"""
-                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
-                    <h4 style="margin: 0; color: #333;">Total Female Passengers</h4>
-                    <h3 style="margin: 5px 0 0; color: #f75b9a;">{total_female_passengers}</h3>
-                </div>
-            """, unsafe_allow_html=True)
-        with col5:
-            st.markdown(f"""
-                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
-                    <h4 style="margin: 0; color: #333;">Total Male Passengers</h4>
-                    <h3 style="margin: 5px 0 0; color: #1e73be;">{total_male_passengers}</h3>
-                </div>
-            """, unsafe_allow_html=True)
-        with col6:
-            st.markdown(f"""
-                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
-                    <h4 style="margin: 0; color: #333;">Average Age</h4>
-                    <h3 style="margin: 5px 0 0; color: #6c757d;">{average_age:.1f}</h3>
-                </div>
-            """, unsafe_allow_html=True)
-
-    # Gráficos de Rosca
-    survival_dist_df = df['Survived'].value_counts().reset_index()
-    survival_dist_df.columns = ['Survived', 'Count']
-    survival_dist_df['Survived'] = survival_dist_df['Survived'].map(
-        {0: 'Not Survived', 1: 'Survived'})
-    survival_dist = px.pie(survival_dist_df, names='Survived', values='Count',
-                           title='Survivors vs Non-Survivors', hole=0.3,
-                           color='Survived', color_discrete_map={'Survived': '#0033a0', 'Not Survived': '#a0c6f0'})
-    st.plotly_chart(survival_dist)
-    #st.write("#### Comment:")
-    #st.write("Survival rate by gender: 20.3% male; 79.7% female")
-
-    st.write("---")
-
-    gender_dist_df = df['Sex'].value_counts().reset_index()
-    gender_dist_df.columns = ['Sex', 'Count']
-    gender_dist = px.pie(gender_dist_df, names='Sex', values='Count',
-                         title='Distribution by Gender', hole=0.3,
-                         color='Sex', color_discrete_map={'male': '#004b87', 'female': '#ff6f91'})
-    st.plotly_chart(gender_dist)
-    st.write("#### Comment:")
-    st.write( "Distribution by gender: 64.8% male; 35.2% female")
-
-    st.write("---")
-
-    class_dist_df = df['Pclass'].value_counts().reset_index()
-    class_dist_df.columns = ['Pclass', 'Count']
-    class_dist_df['Pclass'] = class_dist_df['Pclass'].map(
-        {1: 'First Class', 2: 'Second Class', 3: 'Third Class'})
-    class_dist = px.pie(class_dist_df, names='Pclass', values='Count',
-                        title='Distribution by Passenger Class', hole=0.3,
-                        color='Pclass', color_discrete_map={'First Class': '#004b87',
-                                                            'Second Class': '#0073b7',
-                                                            'Third Class': '#00a3e0'})
-    st.plotly_chart(class_dist)
-    st.write("#### Comment:")
-    st.write( "the third class had more than 50%")
-
-# Aba "Data Distribution"
-with tabs[2]:
-    show_data_distribution()
-
-# Aba "Survival Analytics"
-with tabs[3]:
-    show_survival_analytics(df)
-
-# Aba "Correlation Analyses"
-with tabs[4]:
-    show_correlation_analyses(df)
-
-# Aba "Additional Insights"
-with tabs[5]:
-    show_additional_insights()
+# **3. Seções do Dashboard**
+# Cada seção é (módulo, função): o módulo só é importado quando a seção é
+# renderizada pela primeira vez, e o restante é aquecido em segundo plano.
+SECTIONS = {
+    "Start Here": ("overview", "show_start_here"),
+    "Overview": ("overview", "show_overview"),
+    "Data Distribution": ("data_distribution", "show_data_distribution"),
+    "Survival Analytics": ("survival_analytics", "show_survival_analytics"),
+    "Correlation Analyses": ("correlation_analyses", "show_correlation_analyses"),
+    "Additional Insights": ("additional_insights", "show_additional_insights"),
+    "Contract Trends": ("contract_trends", "show_contract_trends"),
+    "Snapshot Comparison": ("snapshot_comparison", "show_snapshot_comparison"),
+}
+
+# Cálculos pesados que podem ser adiantados em segundo plano
+PREFETCH = {
+    "Correlation Analyses": ("correlation_analyses", "prefetch_correlation_analyses"),
+}
+
+# Bibliotecas pesadas usadas só por algumas seções
+WARM_UP_MODULES = ["sklearn.ensemble", "seaborn", "matplotlib.figure"]
+
+
+def load_section(entry):
+    module_name, function_name = entry
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def prefetch_sections(view, names):
+    # Import e cálculos na thread (nada antes do primeiro paint); o contexto do
+    # script deixa os jobs lerem as escolhas da sessão, como no figure_pipeline
+    entries = [PREFETCH[name] for name in names if name in PREFETCH]
+    if entries:
+        thread = threading.Thread(target=lambda: [load_section(entry)(view) for entry in entries],
+                                  name="prefetch-sections", daemon=True)
+        add_script_run_ctx(thread)
+        thread.start()
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up_imports():
+    # Uma vez por processo, depois do primeiro paint
+    modules = [module for module, _ in SECTIONS.values()] + WARM_UP_MODULES
+
+    def run():
+        for module in dict.fromkeys(modules):
+            importlib.import_module(module)
+
+    thread = threading.Thread(target=run, name="warm-up-imports", daemon=True)
+    thread.start()
+    return thread
+
+
+# **4. Filtros (aplicados a todas as seções)**
+def sidebar_filters(index):
+    st.sidebar.header("Filters")
+    filters = {}
+    for col, label in [('Pclass', 'Passenger class'), ('Sex', 'Sex'), ('Embarked', 'Embarked port')]:
+        options = list(index.categories[col])
+        filters[col] = st.sidebar.multiselect(label, options, default=options)
+    for col in ['Age', 'Fare']:
+        low, high = index.bounds(col)
+        filters[col] = st.sidebar.slider(col, low, high, (low, high))
+    return index.view(**filters)
+
+
+# **5. Navegação**
+with span("filters"):
+    view = sidebar_filters(index)
+if len(view) == 0:
+    st.warning("No passengers match the selected filters.")
+    st.stop()
+
+st.sidebar.checkbox("Server-side chart aggregation", key="server_side_charts",
+                    help="Send precomputed bins and box-plot summaries to the "
+                         "charts instead of every passenger row.")
+
+st.sidebar.selectbox("Confidence intervals", INTERVAL_METHODS, key="rate_intervals",
+                     help="95% intervals on the survival-rate charts: Wilson score, "
+                          "or a percentile bootstrap over the grouped counts.")
+
+st.sidebar.checkbox("Approximate mode", key="approximate", disabled=df is None,
+                    help="Data Distribution and Survival Analytics answer from stratified "
+                         "samples (by class, sex and port) with 95% error bounds, and "
+                         "refine toward the exact charts in the background.")
+
+nav_mode = st.sidebar.radio("Navigation mode", ["Tabs", "Single section"],
+                            help="Tabs renders every section on each rerun; "
+                                 "Single section renders only the selected one.")
+
+if nav_mode == "Tabs":
+    tabs = st.tabs(list(SECTIONS))
+    for tab, (name, entry) in zip(tabs, SECTIONS.items()):
+        with tab, span(f"section/{name}"):
+            load_section(entry)(view)
+else:
+    selected = st.sidebar.radio("Section", list(SECTIONS))
+    prefetch = st.sidebar.checkbox("Prefetch other sections in background")
+    if prefetch and not st.session_state.get("prefetch_started"):
+        st.session_state["prefetch_started"] = True
+        prefetch_sections(view, [name for name in SECTIONS if name != selected])
+    with span(f"section/{selected}"):
+        load_section(SECTIONS[selected])(view)
+
+warm_up_imports()
+
+if st.sidebar.checkbox("Developer panel", key="dev_panel",
+                       help="Time, CPU and peak memory of each stage of this rerun "
+                            "(turns on tracemalloc, which slows the app down)."):
+    show_panel(rerun)
+
+# Nenhuma seção pode ter alterado o frame compartilhado (nem o do filtro)
+if df is not None:
+    check_unchanged(df)
+if df is not None and view.positions is not None:
+    check_unchanged(view.frame)
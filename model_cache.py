@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from instrumentation import span
+
+MODEL_DIR = os.path.join(".cache", "models")
+# Cada combinação de filtros gera outro fingerprint: em memória ficam os
+# MAX_MODELS usados mais recentemente (LRU) e, em disco, os arquivos mais
+# recentes até MAX_DISK_BYTES (MODEL_CACHE_MB, padrão 512 MiB)
+MAX_MODELS = int(os.environ.get('MODEL_CACHE_ENTRIES', 8))
+MAX_DISK_BYTES = int(os.environ.get('MODEL_CACHE_MB', 512)) * 2 ** 20
+
+# Um único worker: os modelos já usam todos os núcleos (n_jobs=-1) e assim
+# dois treinos pesados nunca competem entre si nem com o script do Streamlit.
+# Além dos modelos, guarda resultados derivados deles (ex.: importâncias por
+# permutação), com a mesma chave por fingerprint em memória e em disco.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-train")
+_lock = threading.Lock()
+_models = OrderedDict()
+_pending = {}
+
+
+def fingerprint(X, y, params):
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    h.update(repr(list(X.columns)).encode())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()[:20]
+
+
+def _model_path(key):
+    return os.path.join(MODEL_DIR, f"{key}.joblib")
+
+
+def _load_model(key):
+    import joblib
+
+    path = _model_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        model = joblib.load(path)
+    except Exception:
+        return None
+    try:
+        # mtime marca o último uso (ordem da limpeza em _prune_disk)
+        os.utime(path)
+    except OSError:
+        pass
+    return model
+
+
+def _save_model(model, key):
+    import joblib
+
+    path = _model_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        joblib.dump(model, tmp_path, compress=3)
+        os.replace(tmp_path, path)
+        _prune_disk()
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _prune_disk(max_bytes=MAX_DISK_BYTES):
+    # Remove os arquivos usados há mais tempo até caber no limite
+    files = []
+    for name in os.listdir(MODEL_DIR):
+        if name.endswith('.joblib'):
+            stat = os.stat(os.path.join(MODEL_DIR, name))
+            files.append((stat.st_mtime_ns, stat.st_size, name))
+    total = sum(size for _, size, _ in files)
+    for _, size, name in sorted(files)[:-1]:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(MODEL_DIR, name))
+            total -= size
+        except OSError:
+            pass
+
+
+def _remember(key, model):
+    # Chamado com _lock
+    _models[key] = model
+    _models.move_to_end(key)
+    while len(_models) > MAX_MODELS:
+        _models.popitem(last=False)
+
+
+def _compute(key, compute, name):
+    try:
+        model = _load_model(key)
+        if model is None:
+            model = compute()
+            with span(f'{name}/save'):
+                _save_model(model, key)
+        with _lock:
+            _remember(key, model)
+        return model
+    finally:
+        with _lock:
+            _pending.pop(key, None)
+
+
+def cached_async(key, compute, name='model'):
+    # Retorna um Future com compute(): em memória, em disco ou, na falta dos
+    # dois, calculado em background (um cálculo por chave).
+    # compute não deve esperar outro Future deste executor (um só worker)
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+        pending = key in _pending
+    if model is None and not pending:
+        # Resultado persistido por uma execução anterior: carregar é rápido
+        with span(f'{name}/load'):
+            model = _load_model(key)
+        if model is not None:
+            with _lock:
+                _remember(key, model)
+    with _lock:
+        if model is not None:
+            future = Future()
+            future.set_result(model)
+            return future
+        if key not in _pending:
+            _pending[key] = _executor.submit(_compute, key, compute, name)
+        return _pending[key]
+
+
+def train_async(model_factory, X, y, params, key=None):
+    # Modelo treinado com model_factory(**params).fit(X, y)
+    # key: fingerprint(X, y, params) já calculado pelo chamador
+    def fit():
+        with span('model/fit'):
+            model = model_factory(**params)
+            model.fit(X, y)
+        return model
+
+    return cached_async(key or fingerprint(X, y, params), fit)
+
+
+def train(model_factory, X, y, params, key=None):
+    return train_async(model_factory, X, y, params, key).result()
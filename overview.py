@@ -0,0 +1,161 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from aggregates import get_cube, totals
+from filters import as_view
+from instrumentation import timed_figures
+from figure_pipeline import FigurePipeline
+
+
+# Aba "Start Here"
+def show_start_here(view):
+    st.title('Welcome to the Titanic Dashboard')
+    
+    st.write("""
+    ### Start Here
+    Welcome to our Titanic dataset analysis. This dashboard provides an in-depth overview of the Titanic passengers, including their survival rates, demographics, and class distribution.
+    Here, you will find various visualizations and metrics to help you understand the dataset better. Start by exploring the "Overview" section for key insights and statistics.
+    """)
+    st.image("titanic.jpeg", caption='Titanic Ship', use_column_width=True)
+
+
+# Cálculo das Métricas (a partir do cubo de agregados)
+def overview_metrics(df):
+    cube = get_cube(df)
+    overall = totals(cube, [])
+    by_sex = totals(cube, ['Sex']).set_index('Sex')['Count']
+    total_passengers = int(overall['Count'].iloc[0])
+    total_survivors = int(overall['Survivors'].iloc[0])
+    return {
+        'total_passengers': total_passengers,
+        'total_survivors': total_survivors,
+        # Sem os passageiros de desfecho desconhecido
+        'total_non_survivors': int(overall['Outcomes'].iloc[0]) - total_survivors,
+        'total_female_passengers': int(by_sex.get('female', 0)),
+        'total_male_passengers': int(by_sex.get('male', 0)),
+        'average_age': float(overall['AgeSum'].iloc[0] / total_passengers),
+    }
+
+
+# Gráficos de Rosca
+def survival_distribution_figure(df):
+    metrics = overview_metrics(df)
+    survival_dist_df = pd.DataFrame({'Survived': [0, 1],
+                                     'Count': [metrics['total_non_survivors'], metrics['total_survivors']]})
+    survival_dist_df['Survived'] = survival_dist_df['Survived'].map(
+        {0: 'Not Survived', 1: 'Survived'})
+    return px.pie(survival_dist_df, names='Survived', values='Count',
+                  title='Survivors vs Non-Survivors', hole=0.3,
+                  color='Survived', color_discrete_map={'Survived': '#0033a0', 'Not Survived': '#a0c6f0'})
+
+
+def gender_distribution_figure(df):
+    gender_dist_df = totals(get_cube(df), ['Sex'])[['Sex', 'Count']]
+    return px.pie(gender_dist_df, names='Sex', values='Count',
+                  title='Distribution by Gender', hole=0.3,
+                  color='Sex', color_discrete_map={'male': '#004b87', 'female': '#ff6f91'})
+
+
+def class_distribution_figure(df):
+    class_dist_df = totals(get_cube(df), ['Pclass'])[['Pclass', 'Count']]
+    class_dist_df['Pclass'] = class_dist_df['Pclass'].map(
+        {1: 'First Class', 2: 'Second Class', 3: 'Third Class'})
+    return px.pie(class_dist_df, names='Pclass', values='Count',
+                  title='Distribution by Passenger Class', hole=0.3,
+                  color='Pclass', color_discrete_map={'First Class': '#004b87',
+                                                      'Second Class': '#0073b7',
+                                                      'Third Class': '#00a3e0'})
+
+
+FIGURES = timed_figures('overview', {
+    'survival_distribution': lambda df, binned, settings=None: survival_distribution_figure(df),
+    'gender_distribution': lambda df, binned, settings=None: gender_distribution_figure(df),
+    'class_distribution': lambda df, binned, settings=None: class_distribution_figure(df),
+})
+
+
+def build_figures(view, binned=False):
+    df = as_view(view).frame
+    return {name: build(df, binned) for name, build in FIGURES.items()}
+
+
+# Aba "Overview"
+def show_overview(view):
+    df = as_view(view).frame
+    metrics = overview_metrics(df)
+    total_passengers = metrics['total_passengers']
+    total_survivors = metrics['total_survivors']
+    total_non_survivors = metrics['total_non_survivors']
+    total_female_passengers = metrics['total_female_passengers']
+    total_male_passengers = metrics['total_male_passengers']
+    average_age = metrics['average_age']
+    # Os três gráficos começam a ser construídos enquanto os cartões são desenhados
+    charts = FigurePipeline('overview', FIGURES, df)
+
+    st.title('Titanic Dashboard - Overview')
+    with st.container():
+        st.subheader("Key Metrics")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown(f"""
+                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
+                    <h4 style="margin: 0; color: #333;">Total Passengers</h4>
+                    <h3 style="margin: 5px 0 0; color: #0073b7;">{total_passengers}</h3>
+                </div>
+            """, unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"""
+                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
+                    <h4 style="margin: 0; color: #333;">Total Survivors</h4>
+                    <h3 style="margin: 5px 0 0; color: #28a745;">{total_survivors}</h3>
+                </div>
+            """, unsafe_allow_html=True)
+        with col3:
+            st.markdown(f"""
+                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
+                    <h4 style="margin: 0; color: #333;">Total Non-Survivors</h4>
+                    <h3 style="margin: 5px 0 0; color: #dc3545;">{total_non_survivors}</h3>
+                </div>
+            """, unsafe_allow_html=True)
+
+        col4, col5, col6 = st.columns(3)
+        with col4:
+            st.markdown(f"""
+                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
+                    <h4 style="margin: 0; color: #333;">Total Female Passengers</h4>
+                    <h3 style="margin: 5px 0 0; color: #f75b9a;">{total_female_passengers}</h3>
+                </div>
+            """, unsafe_allow_html=True)
+        with col5:
+            st.markdown(f"""
+                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
+                    <h4 style="margin: 0; color: #333;">Total Male Passengers</h4>
+                    <h3 style="margin: 5px 0 0; color: #1e73be;">{total_male_passengers}</h3>
+                </div>
+            """, unsafe_allow_html=True)
+        with col6:
+            st.markdown(f"""
+                <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
+                    <h4 style="margin: 0; color: #333;">Average Age</h4>
+                    <h3 style="margin: 5px 0 0; color: #6c757d;">{average_age:.1f}</h3>
+                </div>
+            """, unsafe_allow_html=True)
+
+    # Gráficos de Rosca
+    charts.slot('survival_distribution')
+    #st.write("#### Comment:")
+    #st.write("Survival rate by gender: 20.3% male; 79.7% female")
+
+    st.write("---")
+
+    charts.slot('gender_distribution')
+    st.write("#### Comment:")
+    st.write( "Distribution by gender: 64.8% male; 35.2% female")
+
+    st.write("---")
+
+    charts.slot('class_distribution')
+    st.write("#### Comment:")
+    st.write( "the third class had more than 50%")
+
+    charts.fill()
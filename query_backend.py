@@ -0,0 +1,367 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_PATH, CATEGORIES, compact, derived
+from aggregates import (AGE_GROUP_BINS, AGE_GROUP_LABELS, AGE_BAND_BINS, AGE_BAND_LABELS,
+                        DIMENSIONS)
+
+# **Backend SQL/colunar (DuckDB) com agregação no banco**
+# Com DASHBOARD_BACKEND=duckdb e DASHBOARD_DATA=arquivo(s) Parquet/CSV (aceita
+# glob), o app não carrega o frame no pandas: os filtros viram um WHERE e as
+# seções recebem um QueryView no lugar do DataFrame. O que os gráficos
+# precisam é calculado no banco (multi-core) e só o resultado pequeno volta:
+# - o cubo de sobrevivência (GROUP BY das dimensões e faixas etárias), de onde
+#   saem as taxas, intervalos, médias de idade e KPIs, como no pandas;
+# - histogramas, contagens por valor e quartis/whiskers/outliers dos box plots;
+# - as somas por par de colunas da correlação (PairwiseMoments), e os postos
+#   médios do Spearman por função de janela;
+# - uma amostra limitada para treinar os modelos de importância.
+# A limpeza (mediana da idade, moda do porto) é a mesma do clean_data, com as
+# estatísticas calculadas uma vez ao abrir a fonte. O duckdb é opcional: só é
+# importado quando o backend é escolhido. Prefira Parquet: um CSV é relido a
+# cada consulta.
+BACKEND = os.environ.get('DASHBOARD_BACKEND', 'pandas')
+SOURCE_PATH = os.environ.get('DASHBOARD_DATA', DATA_PATH)
+CATEGORY_COLUMNS = ['Pclass', 'Sex', 'Embarked']
+RANGE_COLUMNS = ['Age', 'Fare']
+MAX_CACHED_VIEWS = 16
+MAX_OUTLIERS = 1000
+# Linhas trazidas para o pandas para treinar os modelos (importance.py)
+MAX_TRAINING_ROWS = 250_000
+
+
+def is_query(df):
+    return isinstance(df, QueryView)
+
+
+def _literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def _case(column, bins, labels, right):
+    # pd.cut: (a, b] com right=True, [a, b) com right=False
+    low, high = ('>', '<=') if right else ('>=', '<')
+    whens = ' '.join(f"WHEN {column} {low} {a} AND {column} {high} {b} THEN '{label}'"
+                     for a, b, label in zip(bins[:-1], bins[1:], labels))
+    return f"CASE {whens} END"
+
+
+# Expressões das dimensões do cubo (aggregates.build_cube)
+DIMENSION_SQL = {
+    'Sex': 'Sex',
+    'Pclass': 'Pclass',
+    'Embarked': 'Embarked',
+    'Has_SibSp': "CASE WHEN COALESCE(SibSp, 0) > 0 THEN 'Yes' ELSE 'No' END",
+    'AgeGroup': _case('Age', AGE_GROUP_BINS, AGE_GROUP_LABELS, right=True),
+    'AgeBand': _case('Age', AGE_BAND_BINS, AGE_BAND_LABELS, right=False),
+}
+
+
+def encoded_sql(col):
+    # Mesma codificação do correlation.encode_column (códigos das categorias)
+    if col in ('Sex', 'Embarked'):
+        values = ', '.join(_literal(value) for value in CATEGORIES[col])
+        return f"CAST(list_position([{values}], {col}) - 1 AS DOUBLE)"
+    return f"CAST({col} AS DOUBLE)"
+
+
+class DuckDBSource:
+    # Fonte de dados: mesma interface do PassengerIndex para a barra lateral
+    # (categories, bounds, view)
+    def __init__(self, path=SOURCE_PATH):
+        import duckdb
+
+        self.path = path
+        self._connection = duckdb.connect()
+        self._local = threading.local()
+        reader = 'read_parquet' if path.endswith('.parquet') else 'read_csv_auto'
+        raw = f"{reader}({_literal(path)})"
+        age_median, embarked_mode = self._connection.execute(
+            f"SELECT median(Age), mode(Embarked) FROM {raw}").fetchone()
+        self._connection.execute(f"""
+            CREATE VIEW passengers AS SELECT
+                CAST(Survived AS DOUBLE) AS Survived,
+                CAST(Pclass AS INTEGER) AS Pclass,
+                CAST(Sex AS VARCHAR) AS Sex,
+                COALESCE(CAST(Age AS DOUBLE), {_literal(float(age_median))}) AS Age,
+                CAST(SibSp AS INTEGER) AS SibSp,
+                CAST(Parch AS INTEGER) AS Parch,
+                CAST(Fare AS DOUBLE) AS Fare,
+                COALESCE(CAST(Embarked AS VARCHAR), {_literal(embarked_mode)}) AS Embarked
+            FROM {raw}""")
+        self.categories = {col: [row[0] for row in self.execute(
+            f"SELECT DISTINCT {col} FROM passengers WHERE {col} IS NOT NULL ORDER BY 1").fetchall()]
+            for col in CATEGORY_COLUMNS}
+        self._bounds = {col: self.execute(f"SELECT min({col}), max({col}) FROM passengers").fetchone()
+                        for col in RANGE_COLUMNS}
+        self.signature = hashlib.sha1(repr((path, age_median, embarked_mode, self._bounds,
+                                            self.count())).encode()).hexdigest()
+        self._views = OrderedDict()
+        self._binary = {}
+        self._lock = threading.Lock()
+
+    def execute(self, sql):
+        # Um cursor por thread (o pipeline de gráficos consulta em paralelo)
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._local.cursor = self._connection.cursor()
+        return cursor.execute(sql)
+
+    def query(self, sql):
+        return self.execute(sql).df()
+
+    def count(self, where='TRUE'):
+        return self.execute(f"SELECT count(*) FROM passengers WHERE {where}").fetchone()[0]
+
+    def bounds(self, col):
+        low, high = self._bounds[col]
+        return float(low), float(high)
+
+    def is_binary(self, col):
+        # Mesma regra do CorrelationEngine: valores distintos no arquivo
+        # inteiro, não no filtro (Sex continua binária com Sex=female)
+        if col not in self._binary:
+            expr = encoded_sql(col)
+            self._binary[col] = self.execute(
+                f"SELECT count(DISTINCT {expr}) FROM passengers WHERE {expr} IS NOT NULL").fetchone()[0] == 2
+        return self._binary[col]
+
+    def view(self, **filters):
+        # Mesma semântica do PassengerIndex.select: todas as categorias ou o
+        # intervalo inteiro = sem filtro; ausentes só entram sem filtro
+        conditions = []
+        for col, wanted in sorted(filters.items()):
+            if col in self.categories:
+                wanted = [value for value in wanted if value in self.categories[col]]
+                if len(wanted) == len(self.categories[col]):
+                    continue
+                values = ', '.join(_literal(value) for value in wanted) or 'NULL'
+                conditions.append(f"{col} IN ({values})")
+            elif col in self._bounds:
+                low, high = wanted
+                min_value, max_value = self.bounds(col)
+                if low <= min_value and high >= max_value:
+                    continue
+                conditions.append(f"{col} BETWEEN {_literal(float(low))} AND {_literal(float(high))}")
+            else:
+                raise KeyError(f"No index for column '{col}'")
+        where = ' AND '.join(conditions) or 'TRUE'
+        with self._lock:
+            if where in self._views:
+                self._views.move_to_end(where)
+                return self._views[where]
+            view = QueryView(self, where)
+            self._views[where] = view
+            if len(self._views) > MAX_CACHED_VIEWS:
+                self._views.popitem(last=False)
+            return view
+
+
+BACKENDS = {'duckdb': DuckDBSource}
+
+
+def open_source(backend=BACKEND, path=SOURCE_PATH):
+    return BACKENDS[backend](path)
+
+
+class QueryView:
+    # Subconjunto filtrado (WHERE) de uma fonte SQL; faz o papel do
+    # PassengerView e do frame nas seções
+    def __init__(self, source, where='TRUE'):
+        self.source = source
+        self.where = where
+        self.positions = None
+        self._len = None
+        # Hash de conteúdo para o figure_cache: fonte + filtro
+        derived(self, 'content_hash', lambda _: hashlib.sha1(
+            f"{source.signature}/{where}".encode()).hexdigest())
+
+    def __len__(self):
+        if self._len is None:
+            self._len = self.source.count(self.where)
+        return self._len
+
+    @property
+    def frame(self):
+        return self
+
+    def _select(self, expressions, where=None, group=None, order=None):
+        sql = f"SELECT {expressions} FROM passengers WHERE {self.where}"
+        if where:
+            sql += f" AND {where}"
+        if group:
+            sql += f" GROUP BY {group}"
+        if order:
+            sql += f" ORDER BY {order}"
+        return self.source.query(sql)
+
+    # **Cubo de sobrevivência (aggregates.build_cube)**
+    def build_cube(self, _=None):
+        dims = ', '.join(f"{DIMENSION_SQL[dim]} AS {dim}" for dim in DIMENSIONS)
+        cube = self._select(f"{dims}, count(*) AS Count, count(Survived) AS Outcomes, "
+                            f"coalesce(sum(Survived), 0) AS Survivors, "
+                            f"sum(Age) AS AgeSum", group='ALL', order='ALL')
+        cube['Has_SibSp'] = pd.Categorical(cube['Has_SibSp'], categories=['No', 'Yes'])
+        cube['Pclass'] = cube['Pclass'].astype('int64')
+        return cube
+
+    # **Gráficos agregados (binned_charts)**
+    def histogram_bins(self, col, nbins=30, density=False):
+        low, high, total = self._select(f"min({col}), max({col}), count({col})").iloc[0]
+        if not total:
+            return pd.DataFrame({'center': [], 'width': [], 'count': [], 'height': []})
+        if high == low:
+            low, high = low - 0.5, high + 0.5
+        low, width = float(low), float(high - low) / nbins
+        counts = self._select(
+            f"LEAST(CAST(floor(({col} - {_literal(low)}) / {_literal(width)}) AS INTEGER), "
+            f"{nbins - 1}) AS bin, "
+            f"count(*) AS count", where=f"{col} IS NOT NULL", group='bin')
+        heights = np.zeros(nbins, dtype=np.int64)
+        heights[counts['bin'].to_numpy()] = counts['count'].to_numpy()
+        edges = np.linspace(low, high, nbins + 1)
+        widths = np.diff(edges)
+        bins = pd.DataFrame({'center': edges[:-1] + widths / 2, 'width': widths,
+                             'count': heights, 'height': heights})
+        if density:
+            bins['height'] = heights / (heights.sum() * widths)
+        return bins
+
+    def discrete_counts(self, col):
+        counts = self._select(f"{col} AS value, count(*) AS count", where=f"{col} >= 0",
+                              group='value', order='value')
+        return counts.astype({'value': 'int64', 'count': 'int64'})
+
+    def value_counts(self, col):
+        counts = self._select(f"{col} AS value, count(*) AS count", where=f"{col} IS NOT NULL",
+                              group='value', order='count DESC')
+        return counts.set_index('value')['count'].rename_axis(col)
+
+    def box_stats(self, value, group, max_outliers=MAX_OUTLIERS):
+        # Quartis com interpolação linear (quantile_cont), whiskers de 1.5*IQR
+        # e outliers distintos (amostrados em passo fixo acima do limite)
+        group_sql = f"CAST({group} AS TINYINT)" if group == 'Survived' else group
+        base = (f"SELECT {group_sql} AS g, {value} AS v FROM passengers "
+                f"WHERE {self.where} AND {value} IS NOT NULL AND {group} IS NOT NULL")
+        stats = self.source.query(f"""
+            WITH rows AS ({base}),
+            q AS (SELECT g, count(*) AS count, avg(v) AS mean,
+                         quantile_cont(v, 0.25) AS q1, quantile_cont(v, 0.5) AS median,
+                         quantile_cont(v, 0.75) AS q3
+                  FROM rows GROUP BY g)
+            SELECT q.g AS "group", q.count, q.q1, q.median, q.q3,
+                   min(v) FILTER (WHERE v >= q1 - 1.5 * (q3 - q1)) AS lowerfence,
+                   max(v) FILTER (WHERE v <= q3 + 1.5 * (q3 - q1)) AS upperfence,
+                   q.mean
+            FROM rows JOIN q USING (g)
+            GROUP BY ALL ORDER BY "group" """)
+        points = self.source.query(f"""
+            WITH rows AS ({base}),
+            q AS (SELECT g, quantile_cont(v, 0.25) AS q1, quantile_cont(v, 0.75) AS q3
+                  FROM rows GROUP BY g),
+            outliers AS (SELECT DISTINCT g, v FROM rows JOIN q USING (g)
+                         WHERE v < q1 - 1.5 * (q3 - q1) OR v > q3 + 1.5 * (q3 - q1))
+            SELECT g, v FROM outliers
+            QUALIFY (row_number() OVER (PARTITION BY g ORDER BY v) - 1)
+                    % CAST(ceil(count(*) OVER (PARTITION BY g) / {max_outliers}) AS BIGINT) = 0
+            ORDER BY g, v""")
+        outliers = {g: points['v'].to_numpy()[points['g'].to_numpy() == g] for g in stats['group']}
+        return stats, outliers
+
+    # **Correlação (correlation.PairwiseMoments)**
+    def _moments(self, expressions, source, shift, nullable):
+        # Somas por par em uma consulta: x + 0 * y é nulo quando y é nulo,
+        # então cada soma usa só as linhas completas do par. Pares sem nulos
+        # usam as somas da coluna, e termos repetidos (n e cross são
+        # simétricos) são calculados uma vez
+        k = len(expressions)
+        centered = [f"({expr} - {_literal(float(s))})" for expr, s in zip(expressions, shift)]
+        terms = {}
+
+        def term(sql):
+            return terms.setdefault(sql, len(terms))
+
+        index = np.empty((4, k, k), dtype=int)
+        for i in range(k):
+            for j in range(k):
+                a, b = min(i, j), max(i, j)
+                if nullable[i] or nullable[j]:
+                    index[:, i, j] = [
+                        term(f"count({centered[a]} + 0 * {centered[b]})"),
+                        term(f"sum({centered[i]} + 0 * {centered[j]})"),
+                        term(f"sum(pow({centered[i]}, 2) + 0 * {centered[j]})"),
+                        term(f"sum({centered[a]} * {centered[b]})")]
+                else:
+                    index[:, i, j] = [term("count(*)"), term(f"sum({centered[i]})"),
+                                      term(f"sum(pow({centered[i]}, 2))"),
+                                      term(f"sum({centered[a]} * {centered[b]})")]
+        values = np.nan_to_num(np.array(self.source.execute(
+            f"SELECT {', '.join(terms)} FROM {source}").fetchone(), dtype=float))
+        n, sums, squares, cross = values[index]
+
+        from correlation import PairwiseMoments
+        return PairwiseMoments(n, sums, squares, cross, np.asarray(shift))
+
+    def _encoded(self, columns):
+        return [encoded_sql(col) for col in columns]
+
+    def pearson(self, columns):
+        from correlation import correlation_result
+
+        expressions = self._encoded(columns)
+        # Médias (deslocamento) e quais colunas têm nulos
+        stats = np.array(self.source.execute(
+            f"SELECT count(*), {', '.join(f'avg({expr}), count({expr})' for expr in expressions)} "
+            f"FROM passengers WHERE {self.where}").fetchone(), dtype=float)
+        shift, counts = stats[1::2], stats[2::2]
+        moments = self._moments(expressions, f"passengers WHERE {self.where}",
+                                np.nan_to_num(shift), counts < stats[0])
+        return correlation_result(moments.pearson(), moments.n, columns, 'pearson')
+
+    def spearman(self, columns):
+        # Postos médios (empates) nas linhas completas: um posto por valor
+        # distinto (contagem acumulada do GROUP BY), ligado de volta às linhas;
+        # evita ordenar todas as linhas uma vez por coluna
+        from correlation import correlation_result
+
+        expressions = self._encoded(columns)
+        complete = ' AND '.join(f"{expr} IS NOT NULL" for expr in expressions)
+        n = self.source.count(f"{self.where} AND {complete}")
+        values = ', '.join(f"{expr} AS x{i}" for i, expr in enumerate(expressions))
+        ranks = ', '.join(f"ranks{i} AS (SELECT x{i}, sum(count(*)) OVER (ORDER BY x{i}) "
+                          f"- (count(*) - 1) / 2.0 AS r{i} FROM complete GROUP BY x{i})"
+                          for i in range(len(columns)))
+        joins = ' '.join(f"JOIN ranks{i} USING (x{i})" for i in range(len(columns)))
+        source = (f"(WITH complete AS (SELECT {values} FROM passengers "
+                  f"WHERE {self.where} AND {complete}), {ranks} SELECT * FROM complete {joins})")
+        moments = self._moments([f"r{i}" for i in range(len(columns))], source,
+                                np.full(len(columns), (n + 1) / 2), [False] * len(columns))
+        return correlation_result(moments.pearson(), n, columns, 'spearman')
+
+    def correlations(self, columns):
+        pearson = self.pearson(columns)
+        binary = [col for col in columns if self.source.is_binary(col)]
+        others = [col for col in columns if col not in binary]
+        return {
+            'pearson': pearson,
+            'spearman': self.spearman(columns),
+            'point_biserial': {name: frame.loc[binary, others] for name, frame in pearson.items()},
+        }
+
+    # **Amostra para treinar modelos**
+    def sample_frame(self):
+        # Frame limpo e compacto, como o do loader, com até MAX_TRAINING_ROWS linhas
+        def build(_):
+            sample = (f" USING SAMPLE reservoir({MAX_TRAINING_ROWS} ROWS) REPEATABLE (42)"
+                      if len(self) > MAX_TRAINING_ROWS else '')
+            frame = self.source.query(f"SELECT * FROM passengers WHERE {self.where}{sample}")
+            return compact(frame)
+
+        return derived(self, 'training_sample', build)
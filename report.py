@@ -0,0 +1,149 @@
+import argparse
+import base64
+import html
+import importlib
+import importlib.util
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from data_loader import DATA_PATH, load_clean_data, path_digest
+from confidence import INTERVAL_METHODS
+from importance import MODEL_BACKENDS
+
+# **Relatório estático (HTML/PNG) sem servidor Streamlit**
+# Reaproveita os FIGURES de cada seção; cada gráfico é gerado em um processo
+# do pool, e o HTML final é montado na ordem das seções.
+#
+#   python report.py snapshots/*.csv --out reports --png
+SECTIONS = [
+    ('Overview', 'overview'),
+    ('Data Distribution', 'data_distribution'),
+    ('Survival Analytics', 'survival_analytics'),
+    ('Correlation Analyses', 'correlation_analyses'),
+    ('Additional Insights', 'additional_insights'),
+]
+
+# Um DataFrame limpo por arquivo em cada processo do pool
+_frames = {}
+
+
+def report_dir(out_dir, path):
+    # Nome do arquivo + digest do caminho (como os caches do data_loader):
+    # snapshots de mesmo nome em pastas diferentes não se sobrescrevem
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(out_dir, f"{name}.{path_digest(path)}")
+
+
+def _frame(path):
+    if path not in _frames:
+        stat = os.stat(path)
+        _frames[path] = load_clean_data(path, stat.st_mtime_ns, stat.st_size)
+    return _frames[path]
+
+
+def _png_bytes(fig):
+    if hasattr(fig, 'savefig'):
+        # Figuras do matplotlib (heatmap)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight', dpi=150)
+        return buffer.getvalue()
+    return fig.to_image(format='png')
+
+
+def render_figure(path, module_name, name, binned, png_path, settings):
+    # settings: as escolhas que no app vêm da sessão (intervalos, modelo)
+    module = importlib.import_module(module_name)
+    fig = module.FIGURES[name](_frame(path), binned, settings)
+
+    is_image = hasattr(fig, 'savefig')
+    image = _png_bytes(fig) if png_path or is_image else None
+    if png_path:
+        with open(png_path, 'wb') as f:
+            f.write(image)
+
+    if is_image:
+        return f'<img src="data:image/png;base64,{base64.b64encode(image).decode()}"/>'
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+def _plotlyjs_tag(inline):
+    import plotly.offline
+
+    if inline:
+        return f'<script type="text/javascript">{plotly.offline.get_plotlyjs()}</script>'
+    version = plotly.offline.get_plotlyjs_version()
+    return f'<script src="https://cdn.plot.ly/plotly-{version}.min.js"></script>'
+
+
+def write_report(path, sections, out_path, inline_js):
+    title = f"Titanic Dashboard - {os.path.basename(path)}"
+    parts = [f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>",
+             _plotlyjs_tag(inline_js), "</head><body>", f"<h1>{html.escape(title)}</h1>"]
+    for section_title, figures in sections:
+        parts.append(f"<h2>{html.escape(section_title)}</h2>")
+        parts.extend(f"<div class='figure'>{figure}</div>" for figure in figures)
+    parts.append("</body></html>")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(parts))
+
+
+def generate_reports(paths, out_dir, binned=False, png=False, inline_js=False, workers=None,
+                     intervals='Wilson', model='Random Forest'):
+    settings = {'rate_intervals': intervals, 'importance_model': model}
+    jobs = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path in paths:
+            path = os.path.abspath(path)
+            snapshot_dir = report_dir(out_dir, path)
+            os.makedirs(snapshot_dir, exist_ok=True)
+            for section_title, module_name in SECTIONS:
+                for name in importlib.import_module(module_name).FIGURES:
+                    png_path = os.path.join(snapshot_dir, f"{module_name}_{name}.png") if png else None
+                    future = pool.submit(render_figure, path, module_name, name, binned, png_path,
+                                         settings)
+                    jobs.append((path, snapshot_dir, section_title, future))
+
+        reports = []
+        for path in dict.fromkeys(job[0] for job in jobs):
+            snapshot_jobs = [job for job in jobs if job[0] == path]
+            sections = {}
+            for _, snapshot_dir, section_title, future in snapshot_jobs:
+                sections.setdefault(section_title, []).append(future.result())
+            out_path = os.path.join(snapshot_jobs[0][1], 'report.html')
+            write_report(path, sections.items(), out_path, inline_js)
+            reports.append(out_path)
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Titanic dashboard as a static report.")
+    parser.add_argument('paths', nargs='*', default=[DATA_PATH], help="passenger CSV snapshots")
+    parser.add_argument('--out', default='reports', help="output directory")
+    parser.add_argument('--binned', action='store_true',
+                        help="use server-side binned histograms and box plots")
+    parser.add_argument('--intervals', choices=INTERVAL_METHODS, default='Wilson',
+                        help="confidence intervals on the survival-rate charts")
+    parser.add_argument('--model', choices=list(MODEL_BACKENDS), default='Random Forest',
+                        help="model behind the feature importance chart")
+    parser.add_argument('--png', action='store_true', help="also write one PNG per figure")
+    parser.add_argument('--inline-js', action='store_true',
+                        help="embed plotly.js in the HTML instead of loading it from the CDN")
+    parser.add_argument('--workers', type=int, default=None, help="size of the process pool")
+    args = parser.parse_args(argv)
+
+    if args.png and importlib.util.find_spec('kaleido') is None:
+        parser.error("--png requires the 'kaleido' package")
+
+    start = time.perf_counter()
+    reports = generate_reports(args.paths, args.out, binned=args.binned, png=args.png,
+                               inline_js=args.inline_js, workers=args.workers,
+                               intervals=args.intervals, model=args.model)
+    for report in reports:
+        print(report)
+    print(f"{len(reports)} report(s) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import streamlit as st
+import plotly.express as px
+import plotly.graph_objects as go
+from snapshots import (SNAPSHOT_PATTERN, snapshot_label, snapshot_paths, snapshot_versions, load_summary,
+                       overview_table, rates_table, rate_deltas, histogram_table, counts_table,
+                       sketch_box_stats, correlation_delta)
+from aggregates import DIMENSIONS
+from binned_charts import box_figure
+from confidence import rate_intervals, error_bars
+from instrumentation import span, plotly_chart
+
+BLUES = ['#003d6c', '#0073b7', '#00a3e0', '#7fc8f8', '#a0c6f0']
+
+
+# Um resumo por versão de arquivo, compartilhado entre reruns e sessões
+@st.cache_resource(show_spinner=False, max_entries=64)
+def get_summary(path, mtime_ns, size):
+    return load_summary(path, mtime_ns, size)
+
+
+# **Construção dos gráficos (sem chamadas st.*)**
+def rates_figure(table, dim):
+    return px.bar(table, x=dim, y='Survived', color='Snapshot', barmode='group',
+                  title=f'Survival Rate by {dim}', labels={'Survived': 'Survival Rate'},
+                  color_discrete_sequence=BLUES, **error_bars(table))
+
+
+def delta_figure(deltas, dim, baseline):
+    fig = px.bar(deltas, x=dim, y='Delta', color='Snapshot', barmode='group',
+                 error_y='Margin', title=f'Change in Survival Rate vs {baseline}',
+                 labels={'Delta': 'Difference (percentage points)'},
+                 color_discrete_sequence=BLUES[1:])
+    fig.add_hline(y=0, line_color='#6c757d')
+    return fig
+
+
+def histogram_overlay_figure(table, col):
+    fig = go.Figure()
+    for color, (name, bins) in zip(BLUES * len(table), table.groupby('Snapshot', sort=False)):
+        fig.add_trace(go.Scatter(x=bins['center'], y=bins['density'], mode='lines', name=name,
+                                 line=dict(color=color, shape='hvh')))
+    fig.update_layout(title=f'{col} Distribution by Snapshot', xaxis_title=col,
+                      yaxis_title='Density')
+    return fig
+
+
+def counts_figure(table, col):
+    return px.bar(table, x='value', y='share', color='Snapshot', barmode='group',
+                  title=f'Share of Passengers by {col}', labels={'value': col, 'share': 'Share'},
+                  color_discrete_sequence=BLUES)
+
+
+def sketch_box_figure(summaries, col, group):
+    title = f'{col} by Snapshot' + ('' if group == 'All' else f' (Pclass {group})')
+    colors = {summary.name: color for summary, color in zip(summaries, BLUES * len(summaries))}
+    return box_figure(sketch_box_stats(summaries, col, group), {}, title, 'Snapshot', col, colors)
+
+
+def correlation_delta_figure(delta, name, baseline):
+    return px.imshow(delta.round(2), text_auto=True, zmin=-1, zmax=1,
+                     color_continuous_scale='RdBu_r',
+                     title=f'Pearson Correlation: {name} minus {baseline}')
+
+
+# Aba "Snapshot Comparison" (arquivos inteiros; não depende dos filtros)
+def show_snapshot_comparison(view=None):
+    st.title('Snapshot Comparison')
+    paths = snapshot_paths()
+    if len(paths) < 2:
+        st.info(f"Add passenger snapshots matching {SNAPSHOT_PATTERN} (or set DASHBOARD_SNAPSHOTS) "
+                "to compare them with Titanic-Dataset.csv.")
+        return
+
+    st.write("""
+    Each snapshot is summarized once (group counts, fixed-width histograms, percentile sketches and correlation sums) and the summary is saved next to the data cache. The charts below are built from those summaries alone, so adding a snapshot costs one pass over that file. Sidebar filters do not apply here.
+    """)
+    selected = st.multiselect('Snapshots', paths, default=paths, format_func=snapshot_label,
+                              key='snapshots')
+    if len(selected) < 2:
+        st.info("Select at least two snapshots.")
+        return
+    with st.spinner("Summarizing new snapshots..."), span('snapshots/summaries'):
+        summaries = [get_summary(*version) for version in snapshot_versions(selected)]
+    baseline = st.selectbox('Baseline', [summary.name for summary in summaries],
+                            key='snapshots_baseline')
+    others = [summary for summary in summaries if summary.name != baseline]
+    base = next(summary for summary in summaries if summary.name == baseline)
+
+    st.dataframe(overview_table(summaries).style.format({
+        'Passengers': '{:,.0f}', 'Survival Rate': '{:.1%}', 'Average Age': '{:.1f}',
+        'Average Fare': '{:.2f}'}), hide_index=True)
+
+    # 1. Taxas lado a lado e diferença para a base
+    st.write("---")
+    dim = st.selectbox('Group by', DIMENSIONS, key='snapshots_dimension')
+    with span('snapshots/rates'):
+        table = rates_table(summaries, [dim], rate_intervals())
+        deltas = rate_deltas(rates_table(summaries, [dim], 'None'), [dim], baseline)
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart('snapshot_rates', rates_figure(table, dim))
+    with col2:
+        plotly_chart('snapshot_deltas', delta_figure(deltas, dim, baseline))
+
+    # 2. Distribuições
+    st.write("---")
+    col = st.radio('Distribution', ['Age', 'Fare'], horizontal=True, key='snapshots_column')
+    col3, col4 = st.columns(2)
+    with col3:
+        plotly_chart('snapshot_histograms', histogram_overlay_figure(histogram_table(summaries, col), col))
+    with col4:
+        group = st.radio('Passenger class', ['All', '1', '2', '3'], horizontal=True,
+                         key='snapshots_class')
+        plotly_chart('snapshot_boxes', sketch_box_figure(summaries, col, group))
+    col5, col6 = st.columns(2)
+    with col5:
+        plotly_chart('snapshot_sibsp', counts_figure(counts_table(summaries, 'SibSp'), 'SibSp'))
+    with col6:
+        plotly_chart('snapshot_parch', counts_figure(counts_table(summaries, 'Parch'), 'Parch'))
+
+    # 3. Correlações
+    st.write("---")
+    compared = st.selectbox('Compare correlations of', [summary.name for summary in others],
+                            key='snapshots_correlation')
+    summary = next(summary for summary in others if summary.name == compared)
+    plotly_chart('snapshot_correlation', correlation_delta_figure(
+        correlation_delta(summary, base), compared, baseline))
@@ -0,0 +1,266 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CACHE_DIR, DATA_PATH, cache_prefix, load_clean_data
+from aggregates import build_cube
+from confidence import CONFIDENCE, z_score, survival_rate_intervals
+from correlation import CANDIDATE_COLUMNS, PairwiseMoments, encode_matrix
+
+# **Resumos por snapshot (comparação entre versões dos dados)**
+# Cada arquivo de passageiros (Titanic-Dataset.csv + DASHBOARD_SNAPSHOTS, um
+# glob) é resumido uma única vez e o resumo fica salvo em .cache como JSON,
+# com a chave = caminho + mtime + tamanho. O resumo tem tudo o que a
+# comparação desenha, então N snapshots custam N leituras de alguns KB:
+# - o cubo de contagens por grupo (aggregates.build_cube): taxas, intervalos,
+#   médias de idade;
+# - histogramas com bordas fixas (iguais em todos os snapshots);
+# - contagens de SibSp/Parch;
+# - sketch de quantis (percentis 0..100) de Age e Fare, geral e por classe;
+# - somas por par das colunas da correlação (PairwiseMoments): Pearson.
+#
+#   python snapshots.py snapshots/*.csv     resume (e guarda) antes de abrir o app
+SNAPSHOT_PATTERN = os.environ.get('DASHBOARD_SNAPSHOTS', os.path.join('snapshots', '*.csv'))
+SUMMARY_VERSION = 2
+HISTOGRAM_EDGES = {
+    'Age': np.arange(0, 102, 2),
+    'Fare': np.arange(0, 530, 10),
+}
+COUNT_COLUMNS = ['SibSp', 'Parch']
+SKETCH_COLUMNS = ['Age', 'Fare']
+PERCENTILES = np.arange(101)
+
+
+def snapshot_paths(pattern=SNAPSHOT_PATTERN):
+    # O arquivo principal primeiro, depois os snapshots em ordem de nome
+    paths = [DATA_PATH] + sorted(glob.glob(pattern))
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths if os.path.exists(path)))
+
+
+def snapshot_label(path):
+    # Caminho relativo à pasta do app (absoluto se estiver fora dela): único
+    # mesmo com arquivos de mesmo nome em pastas diferentes
+    relative = os.path.relpath(path)
+    return path if relative.startswith(os.pardir) else relative
+
+
+def snapshot_versions(paths):
+    # (caminho, mtime_ns, tamanho): chave dos caches em disco e em memória
+    versions = []
+    for path in paths:
+        stat = os.stat(path)
+        versions.append((path, stat.st_mtime_ns, stat.st_size))
+    return versions
+
+
+def _histogram(values, edges):
+    # Valores acima da última borda entram no último bin
+    values = values[~np.isnan(values)]
+    return np.histogram(np.clip(values, edges[0], edges[-1]), bins=edges)[0]
+
+
+def _sketch(values):
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    return {'count': int(len(values)), 'mean': float(values.mean()),
+            'percentiles': np.percentile(values, PERCENTILES).tolist()}
+
+
+class SnapshotSummary:
+    def __init__(self, name, rows, cube, histograms, counts, sketches, moments):
+        self.name = name
+        self.rows = rows
+        self.cube = cube              # contagens por grupo (build_cube)
+        self.histograms = histograms  # coluna -> contagens nas HISTOGRAM_EDGES
+        self.counts = counts          # coluna -> {valor: contagem}
+        self.sketches = sketches      # coluna -> {'All' | classe: sketch}
+        self.moments = moments        # PairwiseMoments de CANDIDATE_COLUMNS
+
+    @classmethod
+    def from_frame(cls, df, name):
+        histograms = {col: _histogram(df[col].to_numpy(dtype=float), edges)
+                      for col, edges in HISTOGRAM_EDGES.items()}
+        counts = {col: df[col].value_counts().sort_index().to_dict() for col in COUNT_COLUMNS}
+        pclass = df['Pclass'].to_numpy()
+        sketches = {}
+        for col in SKETCH_COLUMNS:
+            values = df[col].to_numpy(dtype=float)
+            sketches[col] = {'All': _sketch(values)}
+            for group in df['Pclass'].cat.categories:
+                sketches[col][str(group)] = _sketch(values[pclass == group])
+        values = encode_matrix(df, CANDIDATE_COLUMNS)
+        shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(values.shape[1])
+        return cls(name, len(df), build_cube(df), histograms, counts, sketches,
+                   PairwiseMoments.from_values(values, shift))
+
+    # **JSON (cache em disco)**
+    def to_dict(self):
+        cube = self.cube.astype(object).where(self.cube.notna(), None)
+        moments = self.moments
+        return {
+            'version': SUMMARY_VERSION, 'name': self.name, 'rows': self.rows,
+            'cube': cube.to_dict('list'),
+            'histograms': {col: counts.tolist() for col, counts in self.histograms.items()},
+            'counts': {col: [[int(value), int(count)] for value, count in counts.items()]
+                       for col, counts in self.counts.items()},
+            'sketches': self.sketches,
+            'moments': {name: getattr(moments, name).tolist()
+                        for name in ('n', 'sums', 'squares', 'cross', 'shift')},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        cube = pd.DataFrame(data['cube'])
+        cube['Has_SibSp'] = pd.Categorical(cube['Has_SibSp'], categories=['No', 'Yes'])
+        moments = PairwiseMoments(*(np.array(data['moments'][name], dtype=float)
+                                    for name in ('n', 'sums', 'squares', 'cross', 'shift')))
+        return cls(data['name'], data['rows'], cube,
+                   {col: np.array(counts) for col, counts in data['histograms'].items()},
+                   {col: dict(map(tuple, counts)) for col, counts in data['counts'].items()},
+                   data['sketches'], moments)
+
+    # **Leituras do resumo**
+    def mean(self, col):
+        i = CANDIDATE_COLUMNS.index(col)
+        n = self.moments.n[i, i]
+        return self.moments.shift[i] + self.moments.sums[i, i] / n if n else np.nan
+
+    def pearson(self):
+        return pd.DataFrame(self.moments.pearson(), index=CANDIDATE_COLUMNS, columns=CANDIDATE_COLUMNS)
+
+
+def _summary_path(path, mtime_ns, size):
+    key = hashlib.sha1(f"{path}:{mtime_ns}:{size}:{SUMMARY_VERSION}".encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{cache_prefix(path)}{key}.summary.json")
+
+
+def load_summary(path, mtime_ns, size):
+    # Resumo salvo ou, na primeira vez que o snapshot aparece, calculado a
+    # partir do frame limpo e salvo (o frame não fica em memória)
+    summary_path = _summary_path(path, mtime_ns, size)
+    try:
+        with open(summary_path) as f:
+            data = json.load(f)
+        if data.get('version') == SUMMARY_VERSION:
+            summary = SnapshotSummary.from_dict(data)
+            summary.name = snapshot_label(path)
+            return summary
+    except (OSError, ValueError, KeyError):
+        # Resumo ausente, corrompido ou de outra versão: recalcula
+        pass
+    summary = SnapshotSummary.from_frame(load_clean_data(path, mtime_ns, size),
+                                         snapshot_label(path))
+    _write_summary(summary, summary_path, path)
+    return summary
+
+
+def _write_summary(summary, summary_path, source_path):
+    tmp_path = f"{summary_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump(summary.to_dict(), f)
+        os.replace(tmp_path, summary_path)
+        # Resumos de versões antigas do mesmo arquivo não serão mais lidos
+        prefix = cache_prefix(source_path)
+        for name in os.listdir(CACHE_DIR):
+            stale = os.path.join(CACHE_DIR, name)
+            if name.startswith(prefix) and name.endswith('.summary.json') and stale != summary_path:
+                os.remove(stale)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# **Tabelas de comparação (só a partir dos resumos)**
+def overview_table(summaries):
+    rows = []
+    for summary in summaries:
+        cube = summary.cube
+        rows.append({'Snapshot': summary.name, 'Passengers': summary.rows,
+                     'Survival Rate': cube['Survivors'].sum() / cube['Outcomes'].sum(),
+                     'Average Age': cube['AgeSum'].sum() / cube['Count'].sum(),
+                     'Average Fare': summary.mean('Fare')})
+    return pd.DataFrame(rows)
+
+
+def rates_table(summaries, dims, intervals='Wilson'):
+    return pd.concat([survival_rate_intervals(summary.cube, dims, intervals)
+                      .assign(Snapshot=summary.name) for summary in summaries], ignore_index=True)
+
+
+def rate_deltas(table, dims, baseline, confidence=CONFIDENCE):
+    # Diferença de cada snapshot para a base, em pontos percentuais, com o
+    # intervalo normal da diferença de duas proporções independentes
+    base = table[table['Snapshot'] == baseline]
+    merged = table[table['Snapshot'] != baseline].merge(base[dims + ['Survived', 'Count']],
+                                                       on=dims, suffixes=('', '_base'))
+    p, n = merged['Survived'], merged['Count']
+    p0, n0 = merged['Survived_base'], merged['Count_base']
+    se = np.sqrt(p * (1 - p) / n + p0 * (1 - p0) / n0)
+    merged['Delta'] = (p - p0) * 100
+    merged['Margin'] = z_score(confidence) * se * 100
+    return merged
+
+
+def histogram_table(summaries, col):
+    # Densidade por bin (área 1), comparável entre snapshots de tamanhos diferentes
+    edges = HISTOGRAM_EDGES[col]
+    widths = np.diff(edges)
+    frames = []
+    for summary in summaries:
+        counts = summary.histograms[col]
+        total = counts.sum()
+        frames.append(pd.DataFrame({'Snapshot': summary.name, 'center': edges[:-1] + widths / 2,
+                                    'count': counts,
+                                    'density': counts / (total * widths) if total else 0.0}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def counts_table(summaries, col):
+    frames = [pd.DataFrame({'Snapshot': summary.name, 'value': list(summary.counts[col]),
+                            'share': np.array(list(summary.counts[col].values())) / summary.rows})
+              for summary in summaries]
+    return pd.concat(frames, ignore_index=True)
+
+
+def sketch_box_stats(summaries, col, group='All'):
+    # Estatísticas do box plot (binned_charts.box_figure) a partir do sketch:
+    # quartis exatos nos percentis 25/50/75 e whiskers no percentil mais
+    # extremo dentro de 1.5*IQR (o 0 e o 100 são o mínimo e o máximo reais)
+    rows = []
+    for summary in summaries:
+        sketch = summary.sketches[col].get(str(group))
+        if sketch is None:
+            continue
+        q = np.asarray(sketch['percentiles'])
+        q1, median, q3 = q[25], q[50], q[75]
+        iqr = q3 - q1
+        rows.append({'group': summary.name, 'count': sketch['count'], 'q1': q1, 'median': median,
+                     'q3': q3, 'lowerfence': q[q >= q1 - 1.5 * iqr].min(),
+                     'upperfence': q[q <= q3 + 1.5 * iqr].max(), 'mean': sketch['mean']})
+    return pd.DataFrame(rows)
+
+
+def correlation_delta(summary, baseline):
+    return summary.pearson() - baseline.pearson()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize passenger snapshots for comparison.")
+    parser.add_argument('paths', nargs='*', help=f"snapshot CSVs (default: {SNAPSHOT_PATTERN})")
+    args = parser.parse_args(argv)
+
+    paths = [os.path.abspath(path) for path in args.paths] or snapshot_paths()
+    summaries = [load_summary(*version) for version in snapshot_versions(paths)]
+    print(overview_table(summaries).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import DROP_COLUMNS, FLOAT32_COLUMNS, INTEGER_COLUMNS, category_dtype
+
+# **Ingestão em blocos para arquivos maiores que a memória**
+# Primeira passada: lê apenas as colunas que a limpeza precisa, bloco a
+# bloco, e acumula contagens por valor (mediana exata de Age, moda de
+# Embarked e o dicionário de cada categoria) e os limites de SibSp, Parch e
+# Survived, que decidem os dtypes finais antes de ler o primeiro bloco limpo.
+# Segunda passada: limpa cada bloco com essas estatísticas globais, já nos
+# dtypes do frame final, e grava bloco a bloco no cache Arrow (write_streaming)
+# ou emite só os agregados do cubo de sobrevivência.
+CHUNK_SIZE = 1_000_000
+# Acima disso a contagem exata de idades distintas vira um histograma de
+# resolução AGE_RESOLUTION (mediana aproximada, memória limitada)
+MAX_DISTINCT_AGES = 100_000
+AGE_RESOLUTION = 0.01
+CATEGORY_COLUMNS = ['Sex', 'Pclass', 'Embarked']
+SCAN_COLUMNS = ['Age', 'Embarked', 'Sex', 'Pclass', 'SibSp', 'Parch', 'Survived']
+
+
+class StreamingStats:
+    def __init__(self):
+        self.age_counts = pd.Series(dtype='float64')
+        self.approximate_age = False
+        self.embarked_counts = pd.Series(dtype='float64')
+        self.categories = {col: set() for col in CATEGORY_COLUMNS}
+        # Coluna -> [mínimo, máximo, tem ausentes]
+        self.integers = {col: [np.inf, -np.inf, False] for col in INTEGER_COLUMNS}
+        self.survived_binary = True
+        self.rows = 0
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        ages = chunk['Age'].dropna()
+        if self.approximate_age:
+            ages = (ages / AGE_RESOLUTION).round() * AGE_RESOLUTION
+        self.age_counts = self.age_counts.add(ages.value_counts(), fill_value=0)
+        if not self.approximate_age and len(self.age_counts) > MAX_DISTINCT_AGES:
+            self.approximate_age = True
+            binned = (self.age_counts.index.to_numpy() / AGE_RESOLUTION).round() * AGE_RESOLUTION
+            self.age_counts = self.age_counts.groupby(binned).sum()
+        self.embarked_counts = self.embarked_counts.add(
+            chunk['Embarked'].value_counts(), fill_value=0)
+        for col in CATEGORY_COLUMNS:
+            self.categories[col].update(chunk[col].dropna().unique())
+        for col, bounds in self.integers.items():
+            values = pd.to_numeric(chunk[col])
+            if len(values.dropna()):
+                bounds[0] = min(bounds[0], values.min())
+                bounds[1] = max(bounds[1], values.max())
+            bounds[2] = bounds[2] or bool(values.isna().any())
+        survived = pd.to_numeric(chunk['Survived'], errors='coerce')
+        self.survived_binary = self.survived_binary and bool(survived.isin([0, 1]).all())
+
+    @property
+    def age_median(self):
+        # Mesma definição de Series.median(): média dos dois valores centrais
+        counts = self.age_counts.sort_index()
+        total = counts.sum()
+        if not total:
+            return np.nan
+        cumulative = counts.cumsum().to_numpy()
+        values = counts.index.to_numpy()
+        lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+        upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+        return (lower + upper) / 2
+
+    @property
+    def embarked_mode(self):
+        # Como Series.mode()[0]: em empate, o menor valor
+        counts = self.embarked_counts
+        return sorted(counts[counts == counts.max()].index)[0]
+
+    def dtype(self, col):
+        # Mesmo dtype que compact() daria ao frame inteiro: dicionário fixo
+        # (data_loader.CATEGORIES) mais valores extras, menor inteiro que
+        # comporta o intervalo, Survived booleano só sem ausentes
+        if col in CATEGORY_COLUMNS:
+            return category_dtype(col, self.categories[col])
+        if col in FLOAT32_COLUMNS:
+            return np.dtype('float32')
+        if col in self.integers:
+            low, high, missing = self.integers[col]
+            if missing or not np.isfinite(low):
+                return np.dtype('float32')
+            return next(np.dtype(kind) for kind in ('int8', 'int16', 'int32', 'int64')
+                        if np.iinfo(kind).min <= low and high <= np.iinfo(kind).max)
+        if col == 'Survived':
+            return np.dtype(bool) if self.survived_binary else np.dtype('float32')
+        raise KeyError(col)
+
+
+def _read_chunks(path, columns=None, chunksize=CHUNK_SIZE):
+    usecols = columns if columns is not None else (lambda col: col not in DROP_COLUMNS)
+    return pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+
+
+def scan_statistics(path, chunksize=CHUNK_SIZE):
+    stats = StreamingStats()
+    for chunk in _read_chunks(path, SCAN_COLUMNS, chunksize):
+        stats.update(chunk)
+    return stats
+
+
+def clean_chunk(chunk, stats):
+    # Mesma limpeza de data_loader.clean_data, com estatísticas globais e os
+    # dtypes finais: todos os blocos têm o mesmo esquema
+    chunk['Embarked'] = chunk['Embarked'].fillna(stats.embarked_mode)
+    chunk['Survived'] = pd.to_numeric(chunk['Survived'], errors='coerce')
+    chunk['Age'] = chunk['Age'].fillna(stats.age_median)
+    for col in CATEGORY_COLUMNS + FLOAT32_COLUMNS + INTEGER_COLUMNS + ['Survived']:
+        chunk[col] = chunk[col].astype(stats.dtype(col))
+    return chunk
+
+
+def iter_clean_chunks(path, chunksize=CHUNK_SIZE, stats=None):
+    stats = stats or scan_statistics(path, chunksize)
+    for chunk in _read_chunks(path, chunksize=chunksize):
+        yield clean_chunk(chunk, stats)
+
+
+def write_streaming(path, target, chunksize=CHUNK_SIZE):
+    # Cada bloco limpo vira um lote do arquivo Arrow/Feather em `target` e é
+    # descartado em seguida: em memória fica só um bloco por vez
+    import pyarrow as pa
+
+    stats = scan_statistics(path, chunksize)
+    writer = None
+    try:
+        for chunk in iter_clean_chunks(path, chunksize, stats):
+            batch = pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pa.ipc.new_file(target, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return stats.rows
+
+
+def load_streaming(path, chunksize=CHUNK_SIZE):
+    # Sem pyarrow (sem cache em disco): os blocos, já nos dtypes finais, são
+    # concatenados em memória
+    return pd.concat(iter_clean_chunks(path, chunksize), ignore_index=True)
+
+
+def aggregate_streaming(path, chunksize=CHUNK_SIZE):
+    # Só o cubo de agregados: o arquivo limpo nunca fica inteiro em memória
+    from aggregates import build_cube, update_cube
+
+    cube = None
+    for chunk in iter_clean_chunks(path, chunksize):
+        cube = build_cube(chunk) if cube is None else update_cube(cube, chunk)
+    return cube
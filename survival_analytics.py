@@ -1,17 +1,133 @@
 import streamlit as st
 import plotly.express as px
-import pandas as pd
+from filters import as_view
+from binned_charts import server_side_charts, box_stats, box_figure
+from confidence import rate_intervals, error_bars
+from approximate import (approximate_mode, is_sample, survival_rates, section_frame,
+                         show_refinement, weighted_box_stats, add_quantile_bounds)
+from query_backend import is_query
+from instrumentation import timed_figures
+from figure_pipeline import FigurePipeline
 
 
-def show_survival_analytics(df):
+# **Construção dos gráficos (sem chamadas st.*)**
+# No modo aproximado df é a amostra (coluna Weight) e Low/High são os
+# limites de erro da amostra em vez do intervalo escolhido
+# Nas roscas o intervalo de confiança aparece no hover
+def interval_hover(table):
+    if table['Low'].isna().all():
+        return None
+    table['95% CI (%)'] = ('[' + (table['Low'] * 100).map('{:.1f}'.format) + ', '
+                           + (table['High'] * 100).map('{:.1f}'.format) + ']')
+    return ['95% CI (%)']
+
+
+def gender_survival_figure(df, intervals='Wilson'):
+    gender_survival = survival_rates(df, ['Sex'], intervals)
+    gender_survival['Survived'] = gender_survival['Survived'] * 100
+    return px.pie(gender_survival, names='Sex', values='Survived',
+                  title='Survival Rate by Gender',
+                  hole=0.3,
+                  hover_data=interval_hover(gender_survival),
+                  color='Sex',
+                  color_discrete_map={'male': '#004b87', 'female': '#ff6f91'})
+
+
+def class_survival_figure(df, intervals='Wilson'):
+    class_survival = survival_rates(df, ['Pclass'], intervals)
+    class_survival['Survived'] = class_survival['Survived'] * 100
+    class_survival['Pclass'] = class_survival['Pclass'].map(
+        {1: 'First Class', 2: 'Second Class', 3: 'Third Class'})
+    return px.pie(class_survival, names='Pclass', values='Survived',
+                  title='Survival Rate by Passenger Class',
+                  hole=0.3,
+                  hover_data=interval_hover(class_survival),
+                  color='Pclass',
+                  color_discrete_map={'First Class': '#004b87', 'Second Class': '#0073b7', 'Third Class': '#00a3e0'})
+
+
+def age_survival_figure(df, intervals='Wilson'):
+    age_survival = survival_rates(df, ['AgeGroup'], intervals)
+    bars = error_bars(age_survival, scale=100)
+    age_survival['Survived'] = age_survival['Survived'] * 100
+    return px.line(age_survival, x='AgeGroup', y='Survived',
+                   title='Survival Rate by Age Group',
+                   labels={'Survived': 'Survival Rate (%)'},
+                   markers=True,
+                   line_shape='linear', **bars)
+
+
+def fare_survival_figure(df, binned=False):
+    if is_query(df):
+        # Quartis por status calculados no banco
+        return box_figure(*df.box_stats('Fare', 'Survived'),
+                          'Fare Distribution by Survival Status',
+                          'Survival Status', 'Fare',
+                          {0: '#f75b9a', 1: '#1e90ff'})
+    # Survived é booleano no frame compacto (float32 com ausentes, ver
+    # data_loader.compact); os gráficos mostram 0/1 e ignoram os ausentes
+    if df['Survived'].isna().any():
+        df = df[df['Survived'].notna()]
+    survived = df['Survived'].astype('int8')
+    if is_sample(df):
+        stats, outliers = weighted_box_stats(df['Fare'], survived, df['Weight'])
+        return add_quantile_bounds(box_figure(stats, outliers, 'Fare Distribution by Survival Status',
+                                              'Survival Status', 'Fare',
+                                              {0: '#f75b9a', 1: '#1e90ff'}), stats)
+    if binned:
+        return box_figure(*box_stats(df['Fare'], survived),
+                          'Fare Distribution by Survival Status',
+                          'Survival Status', 'Fare',
+                          {0: '#f75b9a', 1: '#1e90ff'})
+    fare_df = df[['Fare']].assign(Survived=survived.astype('category'))
+    return px.box(fare_df, x='Survived', y='Fare',
+                  title='Fare Distribution by Survival Status',
+                  labels={'Survived': 'Survival Status',
+                          'Fare': 'Fare'},
+                  color='Survived',
+                  color_discrete_map={0: '#f75b9a', 1: '#1e90ff'})
+
+
+FIGURES = timed_figures('survival_analytics', {
+    'gender_survival': lambda df, binned, settings=None:
+        gender_survival_figure(df, rate_intervals(settings)),
+    'class_survival': lambda df, binned, settings=None:
+        class_survival_figure(df, rate_intervals(settings)),
+    'age_survival': lambda df, binned, settings=None:
+        age_survival_figure(df, rate_intervals(settings)),
+    'fare_survival': lambda df, binned, settings=None: fare_survival_figure(df, binned),
+})
+
+
+def build_figures(view, binned=False):
+    df = as_view(view).frame
+    return {name: build(df, binned) for name, build in FIGURES.items()}
+
+
+def show_survival_analytics(view):
+    df = as_view(view).frame
+    binned = server_side_charts()
+    params = (rate_intervals(),)
+    # A amostra estratificada vem do frame em memória (não do backend SQL)
+    approximate = approximate_mode() and not is_query(df)
+    if approximate:
+        # Amostra estratificada do nível já pronto; refinada no fim da seção
+        df, level = section_frame(view, 'survival_analytics', binned, params)
+    charts = FigurePipeline('survival_analytics', FIGURES, df, binned, params=params)
+
     st.title("Survival Analytics")
 
-    # Overall Survival Rate
-    survival_rate = df['Survived'].mean() * 100
+    # Overall Survival Rate (na amostra, com o limite de erro)
+    overall = survival_rates(df, [], 'None').iloc[0]
+    overall_rate = overall['Survived'] * 100
+    if is_sample(df):
+        overall_rate = f"{overall_rate:.1f}% ± {(overall['High'] - overall['Low']) * 50:.1f}"
+    else:
+        overall_rate = f"{overall_rate:.1f}%"
     st.markdown(f"""
         <div style="padding: 15px; border-radius: 10px; background-color: #f0f0f0; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);">
             <h4 style="margin: 0; color: #333;">Overall Survival Rate</h4>
-            <h3 style="margin: 5px 0 0; color: #1e90ff;">{survival_rate:.1f}%</h3>
+            <h3 style="margin: 5px 0 0; color: #1e90ff;">{overall_rate}</h3>
         </div>
     """, unsafe_allow_html=True)
 
@@ -25,14 +141,7 @@ def show_survival_analytics(df):
 
     # Survival Rate by Gender
     with col1:
-        gender_survival = df.groupby('Sex')['Survived'].mean().reset_index()
-        gender_survival['Survived'] = gender_survival['Survived'] * 100
-        gender_survival_fig = px.pie(gender_survival, names='Sex', values='Survived',
-                                     title='Survival Rate by Gender',
-                                     hole=0.3,
-                                     color='Sex',
-                                     color_discrete_map={'male': '#004b87', 'female': '#ff6f91'})
-        st.plotly_chart(gender_survival_fig, use_container_width=True)
+        charts.slot('gender_survival', use_container_width=True)
 
         st.write("""
         **Insights on Survival Rate by Gender:**
@@ -41,16 +150,7 @@ def show_survival_analytics(df):
 
     # Survival Rate by Passenger Class
     with col2:
-        class_survival = df.groupby('Pclass')['Survived'].mean().reset_index()
-        class_survival['Survived'] = class_survival['Survived'] * 100
-        class_survival['Pclass'] = class_survival['Pclass'].map(
-            {1: 'First Class', 2: 'Second Class', 3: 'Third Class'})
-        class_survival_fig = px.pie(class_survival, names='Pclass', values='Survived',
-                                    title='Survival Rate by Passenger Class',
-                                    hole=0.3,
-                                    color='Pclass',
-                                    color_discrete_map={'First Class': '#004b87', 'Second Class': '#0073b7', 'Third Class': '#00a3e0'})
-        st.plotly_chart(class_survival_fig, use_container_width=True)
+        charts.slot('class_survival', use_container_width=True)
 
         st.write("""
         **Insights on Survival Rate by Passenger Class:**
@@ -63,18 +163,7 @@ def show_survival_analytics(df):
     """, unsafe_allow_html=True)
 
     # Survival Rate by Age Group
-    age_bins = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
-    age_labels = ['0-10', '10-20', '20-30', '30-40', '40-50',
-                  '50-60', '60-70', '70-80', '80-90', '90-100']
-    df['AgeGroup'] = pd.cut(df['Age'], bins=age_bins, labels=age_labels)
-    age_survival = df.groupby('AgeGroup')['Survived'].mean().reset_index()
-    age_survival['Survived'] = age_survival['Survived'] * 100
-    age_survival_fig = px.line(age_survival, x='AgeGroup', y='Survived',
-                               title='Survival Rate by Age Group',
-                               labels={'Survived': 'Survival Rate (%)'},
-                               markers=True,
-                               line_shape='linear')
-    st.plotly_chart(age_survival_fig)
+    charts.slot('age_survival')
 
     st.write("""
     **Insights on Survival Rate by Age Group:**
@@ -87,16 +176,13 @@ def show_survival_analytics(df):
     """, unsafe_allow_html=True)
 
     # Fare Distribution by Survival Status
-    df['Survived'] = df['Survived'].astype('category')
-    fare_survival_fig = px.box(df, x='Survived', y='Fare',
-                               title='Fare Distribution by Survival Status',
-                               labels={'Survived': 'Survival Status',
-                                       'Fare': 'Fare'},
-                               color='Survived',
-                               color_discrete_map={0: '#f75b9a', 1: '#1e90ff'})
-    st.plotly_chart(fare_survival_fig)
+    charts.slot('fare_survival')
 
     st.write("""
     **Insights on Fare Distribution by Survival Status:**
     This box plot illustrates how fare prices were distributed among survivors and non-survivors. It shows that survivors tended to pay higher fares, which may correlate with better access to lifeboats and safer positions on the ship.
     """)
+
+    charts.fill()
+    if approximate:
+        show_refinement(view, 'survival_analytics', FIGURES, level, binned, params)
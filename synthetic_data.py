@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_PATH
+
+# **Gerador sintético com o esquema do Titanic-Dataset.csv**
+# As distribuições são ajustadas a partir do arquivo real:
+# - distribuição conjunta de (Pclass, Sex, Embarked, Survived), com Embarked
+#   ausente como uma categoria própria, preservando Sex/Survived e Pclass/Survived;
+# - Age amostrada dos valores observados por (Pclass, Sex), com a taxa de
+#   ausência de Age de cada grupo;
+# - Fare amostrada dos valores observados por Pclass (mantém Pclass/Fare);
+# - pares (SibSp, Parch) amostrados por Pclass; Cabin ausente por Pclass.
+# A saída é gerada em blocos, então arquivos de 100M linhas usam memória limitada:
+#
+#   python synthetic_data.py 100000000 --out passengers_100M.csv --chunk-size 1000000
+COLUMNS = ['PassengerId', 'Survived', 'Pclass', 'Name', 'Sex', 'Age',
+           'SibSp', 'Parch', 'Ticket', 'Fare', 'Cabin', 'Embarked']
+MISSING = ''
+# Tipos Arrow de cada coluna no Parquet: fixos, e não inferidos por bloco (um
+# bloco com Cabin toda ausente teria tipo null e outro esquema)
+PARQUET_TYPES = {
+    'PassengerId': 'int64', 'Survived': 'int64', 'Pclass': 'int64', 'Name': 'string',
+    'Sex': 'string', 'Age': 'float64', 'SibSp': 'int64', 'Parch': 'int64',
+    'Ticket': 'string', 'Fare': 'float64', 'Cabin': 'string', 'Embarked': 'string',
+}
+
+
+def fit_model(df):
+    joint = (df.assign(Embarked=df['Embarked'].fillna(MISSING))
+             .groupby(['Pclass', 'Sex', 'Embarked', 'Survived']).size())
+    cells = [list(key) for key in joint.index]
+    model = {
+        'cells': [[int(p), str(s), str(e), int(v)] for p, s, e, v in cells],
+        'cell_probs': (joint / joint.sum()).tolist(),
+        'age': {}, 'age_missing': {}, 'fare': {}, 'family': {}, 'cabin_missing': {},
+    }
+    for (pclass, sex), group in df.groupby(['Pclass', 'Sex']):
+        key = f"{pclass}|{sex}"
+        model['age'][key] = group['Age'].dropna().tolist()
+        model['age_missing'][key] = float(group['Age'].isna().mean())
+    for pclass, group in df.groupby('Pclass'):
+        key = str(pclass)
+        model['fare'][key] = group['Fare'].dropna().tolist()
+        family = group.groupby(['SibSp', 'Parch']).size()
+        model['family'][key] = {
+            'pairs': [[int(s), int(p)] for s, p in family.index],
+            'probs': (family / family.sum()).tolist(),
+        }
+        model['cabin_missing'][key] = float(group['Cabin'].isna().mean())
+    return model
+
+
+def fit_from_csv(path=DATA_PATH):
+    return fit_model(pd.read_csv(path))
+
+
+def _sample_by_group(rng, keys, pools, size):
+    # Para cada grupo, sorteia com reposição entre os valores observados
+    out = np.full(size, np.nan)
+    for key in np.unique(keys):
+        where = np.flatnonzero(keys == key)
+        pool = np.asarray(pools.get(key) or [np.nan], dtype=float)
+        out[where] = pool[rng.integers(0, len(pool), len(where))]
+    return out
+
+
+def generate_chunk(model, n_rows, start_id=1, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    cells = model['cells']
+    picked = rng.choice(len(cells), size=n_rows, p=model['cell_probs'])
+    pclass = np.array([c[0] for c in cells], dtype=np.int64)[picked]
+    sex = np.array([c[1] for c in cells], dtype=object)[picked]
+    embarked = np.array([c[2] or None for c in cells], dtype=object)[picked]
+    survived = np.array([c[3] for c in cells], dtype=np.int64)[picked]
+
+    group_keys = np.char.add(np.char.add(pclass.astype(str), '|'), sex.astype(str))
+    age = _sample_by_group(rng, group_keys, model['age'], n_rows)
+    for key in np.unique(group_keys):
+        where = np.flatnonzero(group_keys == key)
+        age[where[rng.random(len(where)) < model['age_missing'].get(key, 0.0)]] = np.nan
+
+    class_keys = pclass.astype(str)
+    fare = _sample_by_group(rng, class_keys, model['fare'], n_rows)
+
+    sibsp = np.zeros(n_rows, dtype=np.int64)
+    parch = np.zeros(n_rows, dtype=np.int64)
+    cabin_missing = np.zeros(n_rows, dtype=bool)
+    for key in np.unique(class_keys):
+        where = np.flatnonzero(class_keys == key)
+        family = model['family'][key]
+        pairs = np.asarray(family['pairs'], dtype=np.int64)
+        chosen = pairs[rng.choice(len(pairs), size=len(where), p=family['probs'])]
+        sibsp[where], parch[where] = chosen[:, 0], chosen[:, 1]
+        cabin_missing[where] = rng.random(len(where)) < model['cabin_missing'][key]
+
+    ids = np.arange(start_id, start_id + n_rows)
+    id_text = ids.astype(str)
+    titles = np.where(sex == 'female', 'Mrs. Passenger ', 'Mr. Passenger ')
+    cabin = np.char.add(rng.choice(list('ABCDEFG'), size=n_rows),
+                        rng.integers(1, 150, n_rows).astype(str)).astype(object)
+    cabin[cabin_missing] = None
+
+    return pd.DataFrame({
+        'PassengerId': ids,
+        'Survived': survived,
+        'Pclass': pclass,
+        'Name': np.char.add(np.char.add('Synthetic, ', titles.astype(str)), id_text),
+        'Sex': sex,
+        'Age': age,
+        'SibSp': sibsp,
+        'Parch': parch,
+        'Ticket': rng.integers(100000, 3999999, n_rows).astype(str),
+        'Fare': fare,
+        'Cabin': cabin,
+        'Embarked': embarked,
+    }, columns=COLUMNS)
+
+
+def generate_chunks(model, n_rows, chunk_size=1_000_000, seed=None):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_size):
+        yield generate_chunk(model, min(chunk_size, n_rows - start), start_id=start + 1, rng=rng)
+
+
+def generate(model, n_rows, seed=None):
+    return generate_chunk(model, n_rows, rng=np.random.default_rng(seed))
+
+
+def write_dataset(model, path, n_rows, chunk_size=1_000_000, seed=None, fmt=None):
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'csv')
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(col, getattr(pa, PARQUET_TYPES[col])()) for col in COLUMNS])
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in generate_chunks(model, n_rows, chunk_size, seed):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return path
+
+    with open(path, 'w', newline='') as f:
+        for i, chunk in enumerate(generate_chunks(model, n_rows, chunk_size, seed)):
+            chunk.to_csv(f, index=False, header=(i == 0))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Titanic-schema passenger data at any size.")
+    parser.add_argument('rows', type=int, help="number of rows to generate")
+    parser.add_argument('--out', required=True, help="output .csv or .parquet file")
+    parser.add_argument('--source', default=DATA_PATH, help="CSV the distributions are fitted from")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--save-model', help="also write the fitted model as JSON")
+    args = parser.parse_args(argv)
+
+    model = fit_from_csv(args.source)
+    if args.save_model:
+        with open(args.save_model, 'w') as f:
+            json.dump(model, f)
+    write_dataset(model, args.out, args.rows, args.chunk_size, args.seed)
+    print(f"{args.rows:,} rows -> {args.out} ({os.path.getsize(args.out) / 2 ** 20:.1f} MiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import build_cube, survival_rate, totals
+from confidence import survival_rate_intervals
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(1)
+    n = 300
+    df = pd.DataFrame({
+        'Survived': rng.integers(0, 2, n).astype('float32'),
+        'Pclass': rng.integers(1, 4, n),
+        'Sex': rng.choice(['male', 'female'], n),
+        'Embarked': rng.choice(['S', 'C', 'Q'], n),
+        'SibSp': rng.integers(0, 3, n),
+        'Age': rng.uniform(1, 80, n).astype('float32'),
+    })
+    # Survived float32 com ausentes, como no frame compacto
+    df.loc[rng.choice(n, 40, replace=False), 'Survived'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('dims', [[], ['Sex'], ['Pclass', 'Sex']])
+def test_rates_skip_missing_survived(df, dims):
+    cube = build_cube(df)
+    table = survival_rate(cube, dims)
+    if dims:
+        expected = df.groupby(dims)['Survived'].agg(['mean', 'count']).reset_index()
+    else:
+        expected = pd.DataFrame({'mean': [df['Survived'].mean()], 'count': [df['Survived'].count()]})
+    np.testing.assert_allclose(table['Survived'], expected['mean'])
+    np.testing.assert_array_equal(table['Count'], expected['count'])
+    intervals = survival_rate_intervals(cube, dims)
+    np.testing.assert_allclose(intervals['Survived'], expected['mean'])
+    assert (intervals['Low'] <= intervals['Survived']).all()
+
+
+def test_passenger_count_includes_missing_survived(df):
+    overall = totals(build_cube(df), [])
+    assert overall['Count'].iloc[0] == len(df)
+    assert overall['Outcomes'].iloc[0] == df['Survived'].notna().sum()
+    assert overall['Survivors'].iloc[0] == df['Survived'].sum()
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+import approximate
+from approximate import ApproximateEngine, sample_rates
+
+
+def test_sample_rates_skip_missing_survived():
+    df = pd.DataFrame({
+        'Survived': [1.0, 0.0, np.nan, 1.0, np.nan, 0.0],
+        'Sex': pd.Categorical(['male', 'male', 'male', 'female', 'female', 'female']),
+        'Weight': [2.0, 2.0, 2.0, 3.0, 3.0, 3.0],
+    })
+    table = sample_rates(df, ['Sex'])
+    np.testing.assert_allclose(table['Survived'], [0.5, 0.5])
+    np.testing.assert_array_equal(table['Count'], [6, 4])
+    assert table[['Low', 'High']].notna().all().all()
+    assert sample_rates(df, [])['Survived'].iloc[0] == 0.5
+
+
+def test_ready_levels_are_bounded(monkeypatch):
+    monkeypatch.setattr(approximate, 'MAX_READY_ENTRIES', 3)
+    engine = ApproximateEngine(pd.DataFrame({'Survived': [1, 0]}))
+    keys = [(f'view{i}', 'section', False, ()) for i in range(5)]
+    for key in keys[:3]:
+        engine._remember(key, 1)
+    engine._remember(keys[0], 2)
+    for key in keys[3:]:
+        engine._remember(key, 1)
+    assert list(engine.ready) == [keys[0], keys[3], keys[4]]
+    assert engine.ready[keys[0]] == 2
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from correlation import CANDIDATE_COLUMNS, CorrelationEngine, encode_matrix
+from filters import PassengerIndex
+
+
+def make_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    age = rng.uniform(1, 80, n).round()
+    age[rng.random(n) < 0.1] = np.nan
+    fare = rng.gamma(2.0, 15.0, n).round(2)
+    fare[rng.random(n) < 0.05] = np.nan
+    embarked = rng.choice(['C', 'Q', 'S'], n).astype(object)
+    embarked[rng.random(n) < 0.02] = None
+    return pd.DataFrame({
+        'Age': age,
+        'Fare': fare,
+        'Pclass': pd.Categorical(rng.integers(1, 4, n), categories=[1, 2, 3]),
+        'Survived': rng.integers(0, 2, n),
+        'SibSp': rng.integers(0, 4, n),
+        'Parch': rng.integers(0, 3, n),
+        'Sex': pd.Categorical(rng.choice(['female', 'male'], n), categories=['female', 'male']),
+        'Embarked': pd.Categorical(embarked, categories=['C', 'Q', 'S']),
+    })
+
+
+def encoded(df):
+    return pd.DataFrame(encode_matrix(df, CANDIDATE_COLUMNS), columns=CANDIDATE_COLUMNS)
+
+
+def assert_pearson(engine, df, positions):
+    expected = encoded(df) if positions is None else encoded(df).iloc[positions]
+    result = engine.pearson(positions)
+    np.testing.assert_allclose(result['r'], expected.corr(), atol=1e-9)
+    valid = expected.notna().to_numpy(dtype=float)
+    np.testing.assert_array_equal(result['n'], valid.T @ valid)
+
+
+def assert_spearman(engine, df, positions, columns):
+    expected = encoded(df) if positions is None else encoded(df).iloc[positions]
+    complete = expected[columns].dropna()
+    result = engine.spearman(positions, columns)
+    np.testing.assert_allclose(result['r'], stats.spearmanr(complete).statistic, atol=1e-9)
+    assert (result['n'].to_numpy() == len(complete)).all()
+
+
+@pytest.fixture
+def df():
+    return make_frame(2000, seed=0)
+
+
+def test_filter_changes_update_incrementally(df):
+    engine = CorrelationEngine(df)
+    index = PassengerIndex(df)
+    low, high = index.bounds('Age')
+    filters = [dict(Age=(low + step, high)) for step in range(6)]
+    filters += [dict(Age=(20.0, 60.0), Sex=['female']), dict(Age=(20.0, 61.0), Sex=['female']),
+                dict(Fare=(5.0, 80.0)), dict(Fare=(5.0, 81.0), Pclass=[1, 2])]
+    for filter_ in filters:
+        positions = index.select(**filter_)
+        assert_pearson(engine, df, positions)
+        assert_spearman(engine, df, positions, ['Age', 'Fare', 'Pclass', 'Survived'])
+    # Os filtros vizinhos saíram do anterior (somas atualizadas, não recalculadas)
+    assert max(steps for _, _, steps in engine._selections.values()) > 0
+
+
+def test_unfiltered_view_keeps_missing_values(df):
+    engine = CorrelationEngine(df)
+    index = PassengerIndex(df)
+    positions = index.select(Age=index.bounds('Age'), Fare=index.bounds('Fare'))
+    assert positions is None
+    assert_pearson(engine, df, positions)
+
+
+def test_append_matches_full_recompute(df):
+    first, second = df.iloc[:1500], df.iloc[1500:]
+    engine = CorrelationEngine(first)
+    positions = np.flatnonzero(first['Age'].to_numpy() >= 30)
+    engine.pearson(positions)
+    engine.spearman(None, ['Age', 'Fare', 'SibSp'])
+    engine.append(second)
+    assert len(engine) == len(df)
+    assert_pearson(engine, df, None)
+    assert_spearman(engine, df, None, ['Age', 'Fare', 'SibSp'])
+    positions = np.flatnonzero(df['Age'].to_numpy() >= 30)
+    assert_pearson(engine, df, positions)
+    assert_spearman(engine, df, positions, ['Age', 'Fare', 'SibSp', 'Parch'])
+
+
+def test_rank_index_after_appends():
+    frames = [make_frame(300, seed) for seed in range(4)]
+    engine = CorrelationEngine(frames[0])
+    engine.spearman()
+    for frame in frames[1:]:
+        engine.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+    assert_spearman(engine, df, None, CANDIDATE_COLUMNS)
+
+
+def test_significance_matches_scipy(df):
+    engine = CorrelationEngine(df)
+    positions = np.flatnonzero(df['Sex'].to_numpy() == 'female')
+    subset = encoded(df).iloc[positions][['Age', 'Fare']].dropna()
+    expected = stats.pearsonr(subset['Age'], subset['Fare'])
+    result = engine.pearson(positions, ['Age', 'Fare'])
+    assert result['r'].loc['Age', 'Fare'] == pytest.approx(expected.statistic)
+    assert result['p_value'].loc['Age', 'Fare'] == pytest.approx(expected.pvalue)
+    spearman = stats.spearmanr(subset['Age'], subset['Fare'])
+    result = engine.spearman(positions, ['Age', 'Fare'])
+    assert result['r'].loc['Age', 'Fare'] == pytest.approx(spearman.statistic)
+    assert result['p_value'].loc['Age', 'Fare'] == pytest.approx(spearman.pvalue)
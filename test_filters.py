@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filters import PassengerIndex
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame({
+        'Pclass': rng.integers(1, 4, n),
+        'Sex': rng.choice(['male', 'female'], n),
+        'Embarked': rng.choice(['S', 'C', 'Q'], n),
+        'Age': rng.uniform(1, 80, n).round(),
+        'Fare': rng.uniform(0, 500, n).round(2),
+    })
+    df.loc[[3, 50, 199], 'Fare'] = np.nan
+    df.loc[[7], 'Age'] = np.nan
+    return df
+
+
+def expected(df, **filters):
+    mask = np.ones(len(df), dtype=bool)
+    for col, wanted in filters.items():
+        if col in ('Age', 'Fare'):
+            low, high = wanted
+            mask &= df[col].between(low, high).to_numpy()
+        else:
+            mask &= df[col].isin(wanted).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def test_full_range_keeps_missing_values(df):
+    index = PassengerIndex(df)
+    assert index.bounds('Fare') == (df['Fare'].min(), df['Fare'].max())
+    assert index.select(Age=index.bounds('Age'), Fare=index.bounds('Fare')) is None
+    assert index.select(Fare=(-1.0, 1000.0)) is None
+    assert len(index.view(Fare=index.bounds('Fare'), Sex=['male', 'female'])) == len(df)
+
+
+@pytest.mark.parametrize('filters', [
+    dict(Fare=(10.0, 200.0)),
+    dict(Age=(20.0, 40.0), Fare=(0.0, 100.0)),
+    dict(Sex=['female'], Fare=(5.0, 1000.0)),
+    dict(Pclass=[1, 3], Embarked=['S'], Age=(0.0, 30.0)),
+    dict(Embarked=[]),
+    dict(Fare=(600.0, 700.0)),
+])
+def test_select_matches_boolean_mask(df, filters):
+    index = PassengerIndex(df)
+    positions = index.select(**filters)
+    np.testing.assert_array_equal(positions, expected(df, **filters))
+
+
+def test_narrowed_range_excludes_missing_values(df):
+    index = PassengerIndex(df)
+    low, high = index.bounds('Fare')
+    positions = index.select(Fare=(low + 0.01, high))
+    assert not np.isnan(df['Fare'].to_numpy()[positions]).any()
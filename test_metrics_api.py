@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from metrics_api import MetricsService
+
+
+@pytest.fixture(scope='module')
+def service():
+    return MetricsService()
+
+
+def get(service, target):
+    status, _, body = service.respond(target)
+    return status, json.loads(body)
+
+
+@pytest.mark.parametrize('query, message', [
+    ('Age=5', 'two comma-separated numbers'),
+    ('Age=5,10,20', 'two comma-separated numbers'),
+    ('Fare=a,b', 'two comma-separated numbers'),
+    ('Fare=nan,10', 'two comma-separated numbers'),
+    ('Age=40,10', 'greater than'),
+    ('Pclas=1', "unknown parameter 'Pclas'"),
+    ('intervals=Wilson&intervals=None', 'more than once'),
+])
+def test_bad_parameters(service, query, message):
+    status, body = get(service, f'/api/survival?{query}')
+    assert status == 400
+    assert message in body['error']
+
+
+def test_filters(service):
+    status, body = get(service, '/api/survival?by=Sex&Pclass=1&Pclass=2&Age=10,40')
+    assert status == 200
+    assert body['filters'] == {'Pclass': [1, 2], 'Age': [10.0, 40.0]}
+    assert [row['Sex'] for row in body['rows']] == ['female', 'male']
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+from data_loader import DATA_PATH, load_clean_data
+from filters import get_index
+from query_backend import DuckDBSource
+from aggregates import get_cube
+from binned_charts import box_stats
+from correlation import correlations
+
+# **Paridade entre o backend pandas e o DuckDB**
+# Os dois caminhos devem dar os mesmos números para o mesmo filtro
+FILTERS = [
+    {},
+    dict(Sex=['female']),
+    dict(Sex=['female'], Age=(10.0, 40.0)),
+    dict(Pclass=[1, 3], Fare=(5.0, 100.0)),
+]
+
+
+@pytest.fixture(scope='module')
+def backends():
+    stat = os.stat(DATA_PATH)
+    df = load_clean_data(os.path.abspath(DATA_PATH), stat.st_mtime_ns, stat.st_size)
+    return get_index(df), DuckDBSource(DATA_PATH)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_cube(backends, filters):
+    index, source = backends
+    frame, query = index.view(**filters).frame, source.view(**filters)
+    assert len(frame) == len(query)
+    pd.testing.assert_frame_equal(get_cube(frame).reset_index(drop=True),
+                                  get_cube(query).reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('group', ['Pclass', 'Survived'])
+def test_box_stats(backends, filters, group):
+    index, source = backends
+    frame, query = index.view(**filters).frame, source.view(**filters)
+    groups = frame[group].astype('int8') if group == 'Survived' else frame[group]
+    expected, expected_outliers = box_stats(frame['Fare'], groups)
+    stats, outliers = query.box_stats('Fare', group)
+    pd.testing.assert_frame_equal(expected.reset_index(drop=True),
+                                  stats[expected.columns].reset_index(drop=True), check_dtype=False)
+    assert expected_outliers.keys() == outliers.keys()
+    for key, values in expected_outliers.items():
+        np.testing.assert_allclose(np.sort(values), np.sort(outliers[key]))
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_correlations(backends, filters):
+    index, source = backends
+    expected = correlations(index.view(**filters))
+    result = correlations(source.view(**filters))
+    for method in ['pearson', 'spearman']:
+        for name in ['r', 'p_value', 'n']:
+            pd.testing.assert_frame_equal(expected[method][name], result[method][name],
+                                          check_dtype=False, atol=1e-9)
+    # Colunas binárias decididas no arquivo inteiro: mesma forma com Sex=female
+    assert expected['point_biserial'].keys() == result['point_biserial'].keys()
+    for name, frame in expected['point_biserial'].items():
+        pd.testing.assert_frame_equal(frame, result['point_biserial'][name], check_dtype=False, atol=1e-9)
@@ -0,0 +1,183 @@
+import io
+import os
+import threading
+
+import pandas as pd
+
+# **Série temporal de contratos (resultados.csv)**
+# O arquivo é lido de forma incremental: guardamos o byte onde terminou a
+# última linha completa e, quando o arquivo cresce, só os bytes novos são
+# lidos. Uma última linha sem '\n' fica como provisória e é relida depois.
+# As linhas viram totais diários (aceita também datas com hora, várias
+# linhas por dia). Cada visão (frequência, janela da média móvel) é
+# recalculada só a partir do primeiro período alterado.
+SERIES_PATH = "resultados.csv"
+DATE_COLUMN = 'Data'
+VALUE_COLUMN = 'Contratos'
+DATE_FORMAT = '%d/%m/%Y'
+# Rótulo -> (regra do resample, período usado para achar o início do bucket)
+FREQUENCIES = {
+    'Daily': ('D', 'D'),
+    'Weekly': ('W', 'W-SUN'),
+    'Monthly': ('MS', 'M'),
+}
+
+
+def parse_dates(values):
+    try:
+        return pd.to_datetime(values, format=DATE_FORMAT)
+    except (ValueError, TypeError):
+        # Versões de alta frequência: "dd/mm/aaaa hh:mm[:ss]"
+        return pd.to_datetime(values, dayfirst=True, format='mixed')
+
+
+def daily_totals(frame):
+    dates = parse_dates(frame[DATE_COLUMN]).dt.normalize()
+    values = pd.to_numeric(frame[VALUE_COLUMN], errors='coerce').fillna(0)
+    totals = values.groupby(dates.to_numpy()).sum()
+    totals.index.name = DATE_COLUMN
+    return totals
+
+
+def _bucket_start(date, freq):
+    return pd.Timestamp(date).to_period(FREQUENCIES[freq][1]).start_time
+
+
+class ContractSeries:
+    def __init__(self, path=SERIES_PATH):
+        self.path = path
+        self.version = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.daily = pd.Series(dtype='float64', index=pd.DatetimeIndex([], name=DATE_COLUMN))
+        self.provisional = self.daily.copy()
+        self.header = None
+        self.offset = 0
+        self.signature = None
+        # (versão, primeira data alterada) de cada atualização; None = recarga total
+        self.changes = []
+        self._views = {}
+
+    # **Leitura incremental**
+    def refresh(self):
+        # Retorna True se o arquivo mudou desde a última leitura
+        stat = os.stat(self.path)
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if signature == self.signature:
+                return False
+            if self.signature is not None and (stat.st_ino != self.signature[0]
+                                               or stat.st_size < self.offset):
+                # Arquivo trocado ou truncado: recarrega do início
+                self._reset()
+                self.changes.append((self.version + 1, None))
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read()
+            self.signature = signature
+            self._consume(data)
+            return True
+
+    def _consume(self, data):
+        if self.header is None:
+            header_end = data.find(b'\n')
+            if header_end < 0:
+                return
+            self.header = data[:header_end + 1]
+            self.offset += header_end + 1
+            data = data[header_end + 1:]
+
+        last_newline = data.rfind(b'\n')
+        complete, tail = data[:last_newline + 1], data[last_newline + 1:]
+        new_daily = self._parse(complete)
+        new_provisional = self._parse(tail)
+
+        changed = [s.index.min() for s in (new_daily, new_provisional, self.provisional) if len(s)]
+        if len(new_daily):
+            if len(self.daily) == 0 or new_daily.index[0] > self.daily.index[-1]:
+                self.daily = pd.concat([self.daily, new_daily]) if len(self.daily) else new_daily
+            else:
+                self.daily = self.daily.add(new_daily, fill_value=0)
+        self.provisional = new_provisional
+        self.offset += len(complete)
+        if changed:
+            self.version += 1
+            self.changes.append((self.version, min(changed)))
+
+    def _parse(self, data):
+        if not data.strip():
+            return self.daily.iloc[:0]
+        frame = pd.read_csv(io.BytesIO(self.header + data), usecols=[DATE_COLUMN, VALUE_COLUMN])
+        return daily_totals(frame).astype('float64').sort_index()
+
+    def totals(self):
+        if len(self.provisional):
+            return self.daily.add(self.provisional, fill_value=0)
+        return self.daily
+
+    # **Visões: resample, média móvel e acumulado**
+    def view(self, freq='Daily', window=7):
+        # DataFrame indexado pela data do período: Contratos, Rolling, Cumulative
+        with self._lock:
+            key = (freq, window)
+            cached = self._views.get(key)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            since = self._first_change_since(cached[0]) if cached is not None else None
+            if cached is None or since is None:
+                table = self._compute(freq, window)
+            else:
+                table = self._update(cached[1], since, freq, window)
+            self._views[key] = (self.version, table)
+            # Mudanças já aplicadas em todas as visões não são mais necessárias
+            oldest = min(version for version, _ in self._views.values())
+            self.changes = [change for change in self.changes if change[0] > oldest]
+            return table
+
+    def _first_change_since(self, version):
+        dates = [date for v, date in self.changes if v > version]
+        if any(date is None for date in dates):
+            return None
+        return min(dates)
+
+    def _compute(self, freq, window, start=None):
+        rule = FREQUENCIES[freq][0]
+        totals = self.totals()
+        if start is not None:
+            totals = totals[totals.index >= start]
+        resampled = totals.resample(rule).sum() if len(totals) else totals
+        return pd.DataFrame({
+            VALUE_COLUMN: resampled,
+            'Rolling': resampled.rolling(window, min_periods=1).mean(),
+            'Cumulative': resampled.cumsum(),
+        })
+
+    def _update(self, table, since, freq, window):
+        # Só os períodos a partir do que contém a primeira data alterada
+        start = _bucket_start(since, freq)
+        keep = table[table.index < start]
+        tail = self._compute(freq, window, start)
+        if not len(keep) or not len(tail):
+            return pd.concat([keep, tail]) if len(tail) else keep
+        # Períodos vazios entre o que foi mantido e o recalculado, e as
+        # window - 1 contagens anteriores que a média móvel ainda enxerga
+        rule = FREQUENCIES[freq][0]
+        gap = pd.Series(0.0, index=pd.date_range(keep.index[-1], tail.index[0], freq=rule)[1:-1])
+        context = keep[VALUE_COLUMN].iloc[max(len(keep) - (window - 1), 0):]
+        counts = pd.concat([context, gap, tail[VALUE_COLUMN]])
+        new_counts = counts.iloc[len(context):]
+        new = pd.DataFrame({
+            VALUE_COLUMN: new_counts,
+            'Rolling': counts.rolling(window, min_periods=1).mean().iloc[len(context):],
+            'Cumulative': new_counts.cumsum() + keep['Cumulative'].iloc[-1],
+        })
+        new.index.name = keep.index.name
+        return pd.concat([keep, new])
+
+
+def load_series(path=SERIES_PATH):
+    series = ContractSeries(path)
+    series.refresh()
+    return series